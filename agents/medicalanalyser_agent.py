@@ -1,17 +1,296 @@
 import re
 import requests
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from utils.medical_knowledge import MedicalKnowledgeBase
+from utils.unit_registry import UnitRegistry
+from utils.lab_results import TestResult, RESULT_NUMBER, RESULT_FLAG_RE
 from utils.sarvam_client import SarvamClient
 
+# Layout row tokens: a result value (optionally a qualifier, a BP pair or an attached H/L
+# flag), a unit, and a reference range that may be split across several OCR words
+LAYOUT_NUMBER = RESULT_NUMBER
+LAYOUT_VALUE_RE = re.compile(r'^(?:[<>]=?)?' + LAYOUT_NUMBER + r'(?:/[0-9]+)?(?:\(?[HL]\)?)?$')
+LAYOUT_UNIT_RE = re.compile(r'^(?:[a-zA-Zμµ%][a-zA-Z0-9μµ%/.^]*|[0-9]+\^?[0-9]*/[a-zA-Zμµ]+)$')
+LAYOUT_BARE_UNITS = {'%', 'fl', 'pg', 'mmhg', 'iu', 'u', 'g%', 'lakhs', 'million', 'cells', 'sec', 'ratio'}
+LAYOUT_RANGE_RE = re.compile(
+    LAYOUT_NUMBER + r'\s*[-–]\s*' + LAYOUT_NUMBER + r'|[<>]=?\s*' + LAYOUT_NUMBER
+)
+LAYOUT_EXCLUDED_NAMES = ['page', 'date', 'time', 'phone', 'address', 'name', 'patient']
+
+# Plain-text lexer: one alternation, tried left to right, so each character belongs to one token
+TEXT_TOKEN_RE = re.compile(
+    r'(?P<range>' + LAYOUT_NUMBER + r'[ \t]*[-–][ \t]*' + LAYOUT_NUMBER + r')'
+    r'|(?P<value>(?:[<>]=?)?' + LAYOUT_NUMBER + r'(?:/[0-9]+)?)'
+    r'|(?P<word>[0-9]+-[A-Za-z]+|[A-Za-zμµ%][A-Za-z0-9μµ%/^]*)'
+    r'|(?P<newline>\n)'
+    r'|(?P<space>[ \t\r:=]+)'
+    r'|(?P<joiner>[().,\'-])'
+    r'|(?P<other>.)'
+)
+TEXT_MAX_NAME_WORDS = 4
+
+# Analytes the cholesterol rules apply to (they used to match any name containing "cholesterol")
+CHOLESTEROL_ANALYTES = {'cholesterol', 'hdl_cholesterol', 'ldl_cholesterol', 'vldl_cholesterol'}
+
+# Patient details as (key, pattern); group 1 is the value
+PATIENT_PATTERNS = [
+    ('name', r'(?:patient\s+)?name\s*:?\s*([A-Za-z \t]+)'),
+    ('age', r'\bage\s*:?\s*([0-9]+)\s*(?:years?|yrs?)?'),
+    ('sex', r'\b(?:gender|sex)\s*:?\s*(male|female|m|f)\b'),
+    ('date', r'date\s*:?\s*([0-9]{1,2}[/-][0-9]{1,2}[/-][0-9]{2,4})'),
+]
+
+# How each reference band reads to the patient
+BAND_STATUS = {
+    'critical_low': 'needs attention',
+    'low': 'a little low',
+    'normal': 'good',
+    'high': 'a little high',
+    'critical_high': 'needs attention'
+}
+
+# A critical band without its own wording uses the wording of the band next to it
+BAND_FALLBACK = {'critical_low': 'low', 'critical_high': 'high'}
+
+# How far each band is from normal, to pick the worse of two readings
+BAND_SEVERITY = {'normal': 0, 'low': 1, 'high': 1, 'critical_low': 2, 'critical_high': 2}
+
+# Bands for the H/L flags labs print next to out-of-range values
+FLAG_BANDS = {'H': 'high', 'L': 'low'}
+
+LOW_BANDS = {'low', 'critical_low'}
+HIGH_BANDS = {'high', 'critical_high'}
+
+CHOLESTEROL_INTERPRETATIONS = {
+    'normal': {
+        'health_implication': 'Good cholesterol levels help protect your heart and blood vessels from disease.',
+        'simple_advice': 'Your heart is happy! Keep eating good foods.'
+    },
+    'high': {
+        'health_implication': 'High cholesterol can build up in your arteries and increase your risk of heart attacks and strokes.',
+        'simple_advice': 'Eat more fruits and vegetables, less fried food.'
+    },
+    'critical_high': {
+        'health_implication': 'Very high cholesterol significantly increases your risk of heart disease, heart attacks, and strokes.',
+        'simple_advice': 'Your heart needs help - eat very healthy foods and exercise.'
+    }
+}
+
+# Wording per analyte and band
+BAND_INTERPRETATIONS = {
+    'glucose': {
+        'low': {
+            'health_implication': 'Low blood sugar can make you feel weak, dizzy, or shaky and can be dangerous if it drops too much.',
+            'simple_advice': 'Eat healthy snacks when you feel weak or shaky.'
+        },
+        'normal': {
+            'health_implication': 'Your blood sugar is in a healthy range, which means your body is managing energy well.',
+            'simple_advice': 'Keep eating healthy foods and stay active.'
+        },
+        'high': {
+            'health_implication': 'High blood sugar can damage your blood vessels, nerves, and organs over time if not controlled.',
+            'simple_advice': 'Eat less candy and sweet things, play more outside.'
+        },
+        'critical_high': {
+            'health_implication': 'Very high blood sugar can lead to serious problems like diabetes, heart disease, and kidney damage.',
+            'simple_advice': 'This is important - eat very healthy foods and stay active.'
+        }
+    },
+    'cholesterol': CHOLESTEROL_INTERPRETATIONS,
+    'ldl_cholesterol': CHOLESTEROL_INTERPRETATIONS,
+    'vldl_cholesterol': CHOLESTEROL_INTERPRETATIONS,
+    'hdl_cholesterol': {
+        'low': {
+            'health_implication': 'Low good cholesterol (HDL) means less protection for your heart and blood vessels.',
+            'simple_advice': 'Exercise every day and eat nuts and fish to raise your good cholesterol.'
+        },
+        'normal': {
+            'health_implication': 'Good cholesterol (HDL) helps clear extra fat from your blood and protects your heart.',
+            'simple_advice': 'Your heart is happy! Keep eating good foods.'
+        }
+    },
+    'triglycerides': {
+        'normal': {
+            'health_implication': 'Healthy triglyceride levels mean your body is handling the fat in your food well.',
+            'simple_advice': 'Keep eating good foods and staying active.'
+        },
+        'high': {
+            'health_implication': 'High triglycerides add to your risk of heart disease and often come with too much sugar or fried food.',
+            'simple_advice': 'Eat less sugar, sweets, and fried food.'
+        },
+        'critical_high': {
+            'health_implication': 'Very high triglycerides can inflame your pancreas and greatly increase your risk of heart disease.',
+            'simple_advice': 'This is important - cut down sugar, sweets, and fried food.'
+        }
+    },
+    'blood_pressure': {
+        'normal': {
+            'health_implication': 'Normal blood pressure means your heart is working efficiently and your blood vessels are healthy.',
+            'simple_advice': 'Your heart is pumping just right!'
+        },
+        'high': {
+            'health_implication': 'Slightly high blood pressure puts extra strain on your heart and blood vessels, which can lead to heart problems over time.',
+            'simple_advice': 'Try to relax more and eat less salty food.'
+        },
+        'critical_high': {
+            'health_implication': 'High blood pressure greatly increases your risk of heart attacks, strokes, kidney disease, and other serious health problems.',
+            'simple_advice': 'Your heart is working too hard.'
+        }
+    },
+    'hemoglobin': {
+        'low': {
+            'health_implication': 'Low hemoglobin (anemia) can make you feel tired, weak, and short of breath because your body isn\'t getting enough oxygen.',
+            'simple_advice': 'Eat foods with iron like spinach and meat to make your blood stronger.'
+        },
+        'normal': {
+            'health_implication': 'Good hemoglobin levels mean your blood can carry enough oxygen to all parts of your body.',
+            'simple_advice': 'Your blood is carrying oxygen well!'
+        },
+        'high': {
+            'health_implication': 'High hemoglobin can make your blood thicker, which might affect blood flow.',
+            'simple_advice': 'Your blood has a lot of this protein.'
+        }
+    },
+    'hba1c': {
+        'normal': {
+            'health_implication': 'Your blood sugar has been well controlled over the past 2-3 months, which protects your organs from damage.',
+            'simple_advice': 'Your long-term blood sugar control is excellent!'
+        },
+        'high': {
+            'health_implication': 'Your blood sugar has been higher than normal for months, which increases your risk of developing diabetes and organ damage.',
+            'simple_advice': 'Your blood sugar has been a little high. Eat healthier foods and exercise more.'
+        },
+        'critical_high': {
+            'health_implication': 'Your blood sugar has been dangerously high for months, which can cause serious damage to your heart, kidneys, eyes, and nerves.',
+            'simple_advice': 'Your blood sugar has been too high for too long.'
+        }
+    },
+    'creatinine': {
+        'low': {
+            'health_implication': 'This test shows how well your kidneys are working to clean waste from your blood.',
+            'simple_advice': 'This shows how your kidneys work.'
+        },
+        'normal': {
+            'health_implication': 'Normal creatinine levels show that your kidneys are filtering waste from your blood properly.',
+            'simple_advice': 'Your kidneys are cleaning your blood well!'
+        },
+        'high': {
+            'health_implication': 'High creatinine suggests your kidneys may not be filtering waste properly, which can lead to kidney disease.',
+            'simple_advice': 'Your kidneys might need help. Drink more water.'
+        }
+    },
+    'tsh': {
+        'low': {
+            'health_implication': 'Low TSH suggests your thyroid is overactive, which can cause rapid heartbeat, weight loss, and anxiety.',
+            'simple_advice': 'Your thyroid might be working too fast.'
+        },
+        'normal': {
+            'health_implication': 'Normal thyroid levels mean your metabolism, energy, and body temperature are well regulated.',
+            'simple_advice': 'Your thyroid gland is working normally!'
+        },
+        'high': {
+            'health_implication': 'High TSH suggests your thyroid is underactive, which can make you feel tired, cold, and cause weight gain.',
+            'simple_advice': 'Your thyroid might be working slowly.'
+        }
+    },
+    'vitamin_d': {
+        'critical_low': {
+            'health_implication': 'Very low vitamin D can cause bone pain, muscle weakness, and increase your risk of fractures.',
+            'simple_advice': 'You need more vitamin D. Take supplements.'
+        },
+        'low': {
+            'health_implication': 'Low vitamin D can weaken your bones and make you more likely to get sick.',
+            'simple_advice': 'Spend more time in sunlight and eat foods with vitamin D.'
+        },
+        'normal': {
+            'health_implication': 'Good vitamin D levels help keep your bones strong and support your immune system.',
+            'simple_advice': 'You have enough vitamin D for strong bones!'
+        }
+    }
+}
+
+# Health risks worth calling out, per analyte and band
+BAND_RISK_FACTORS = {
+    'glucose': {
+        'critical_low': "Low blood sugar can cause dangerous episodes of weakness, confusion, and fainting",
+        'low': "Low blood sugar can cause dangerous episodes of weakness, confusion, and fainting",
+        'high': "High blood sugar increases your risk of developing diabetes and heart problems",
+        'critical_high': "Very high blood sugar increases your risk of diabetes, heart disease, kidney damage, and nerve problems"
+    },
+    'cholesterol': {
+        'high': "High cholesterol increases your risk of heart disease and stroke",
+        'critical_high': "Very high cholesterol significantly increases your risk of heart attacks, strokes, and blocked arteries"
+    },
+    'ldl_cholesterol': {
+        'high': "High cholesterol increases your risk of heart disease and stroke",
+        'critical_high': "Very high cholesterol significantly increases your risk of heart attacks, strokes, and blocked arteries"
+    },
+    'hdl_cholesterol': {
+        'low': "Low good cholesterol (HDL) increases your risk of heart disease"
+    },
+    'triglycerides': {
+        'critical_high': "Very high triglycerides increase your risk of pancreatitis and heart disease"
+    },
+    'blood_pressure': {
+        'critical_high': "High blood pressure increases your risk of heart disease, stroke, and kidney problems"
+    },
+    'hba1c': {
+        'high': "Elevated long-term blood sugar indicates diabetes risk and potential organ damage",
+        'critical_high': "Poor long-term blood sugar control increases your risk of diabetes complications including eye, kidney, and nerve damage"
+    },
+    'hemoglobin': {
+        'critical_low': "Severe anemia can cause heart problems, extreme fatigue, and difficulty with daily activities",
+        'low': "Low hemoglobin (anemia) can cause fatigue, weakness, and reduced quality of life"
+    },
+    'creatinine': {
+        'high': "Elevated creatinine suggests kidney function problems that need monitoring",
+        'critical_high': "High creatinine indicates significant kidney problems that can lead to kidney failure"
+    },
+    'tsh': {
+        'critical_low': "Overactive thyroid can cause heart rhythm problems, bone loss, and anxiety",
+        'critical_high': "Severely underactive thyroid can cause heart problems, depression, and memory issues"
+    }
+}
+
+class AnalysisContext:
+    """Per-request state of one analysis, passed down instead of stored on the shared agent
+
+    One MedicalAnalyzerAgent serves every request, so anything that differs between
+    requests (language, patient age and sex) lives here and the agent stays reentrant.
+    """
+    __slots__ = ('language', 'age', 'sex', 'verbose')
+
+    def __init__(self, language='en-IN', age=None, sex=None, verbose=True):
+        self.language = language
+        self.age = age
+        self.sex = sex
+        self.verbose = verbose
+
+    @property
+    def translates(self):
+        return self.language != 'en-IN'
+
+    def log(self, message):
+        """Progress output for this analysis; batch runs turn it off"""
+        if self.verbose:
+            print(message)
+
+
 class MedicalAnalyzerAgent:
+    """Turns OCR text into a plain-language analysis; holds only read-only tables, so threads can share one"""
+    
     def __init__(self):
         self.knowledge_base = MedicalKnowledgeBase()
+        self.unit_registry = UnitRegistry()
         self.sarvam_client = SarvamClient()
-        self.current_language = 'en-IN'  # Store current language
         
-    def analyze_report(self, ocr_result, user_language='en-IN', audio_language=None):
+    def analyze_report(self, ocr_result, user_language='en-IN', audio_language=None, verbose=True):
         """Enhanced analysis with simple language that anyone can understand"""
         
+        context = AnalysisContext(user_language, verbose=verbose)
+        
         # Handle input validation
         if isinstance(ocr_result, str):
             ocr_result = {
@@ -38,23 +317,132 @@ class MedicalAnalyzerAgent:
         if not isinstance(extracted_text, str):
             extracted_text = str(extracted_text)
         
-        print(f"🔍 MEDICAL ANALYZER: Processing simple analysis of {len(extracted_text)} characters")
+        context.log(f"🔍 MEDICAL ANALYZER: Processing simple analysis of {len(extracted_text)} characters")
         
         # Extract structured data FIRST
-        structured_data = self._extract_structured_data_comprehensive(extracted_text, user_language)
-        print(f"🔍 MEDICAL ANALYZER: Extracted {len(structured_data.get('test_results', []))} test results")
+        structured_data = self._extract_structured_data_comprehensive(
+            extracted_text, user_language, ocr_result.get('layout'), context
+        )
+        context.log(f"🔍 MEDICAL ANALYZER: Extracted {len(structured_data.get('test_results', []))} test results")
         
         # Create simple comprehensive analysis
-        final_analysis = self._create_simple_comprehensive_analysis(structured_data, extracted_text, user_language)
+        final_analysis = self._create_simple_comprehensive_analysis(structured_data, extracted_text, user_language, context)
         
         final_analysis['audio_language'] = audio_language or user_language
         
         return final_analysis
+
+    def analyze_many(self, reports, user_language='en-IN', audio_language=None, processes=None, chunksize=16, verbose=False):
+        """Analyze many OCR results or texts, yielding each analysis in input order
+        
+        Runs on this agent by default. With processes > 1, chunks of reports go to a
+        process pool whose workers each build one agent and reuse it; at most two
+        chunks per worker are in flight, so a long iterable is streamed, not read
+        into memory. A report that fails yields an error result instead of stopping the batch.
+        """
+        if not processes or processes <= 1:
+            for report in reports:
+                yield self._analyze_batch_item(report, user_language, audio_language, verbose)
+            return
+        
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker) as executor:
+            pending = deque()
+            try:
+                for chunk in _chunks(reports, chunksize):
+                    pending.append(executor.submit(_analyze_batch_chunk, chunk, user_language, audio_language, verbose))
+                    if len(pending) >= processes * 2:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                # The caller may stop iterating early; queued chunks are not worth finishing
+                for future in pending:
+                    future.cancel()
+    
+    def _analyze_batch_item(self, report, user_language, audio_language, verbose):
+        try:
+            return self.analyze_report(report, user_language, audio_language, verbose=verbose)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Analysis failed: {str(e)}',
+                'summary': self._get_error_message(user_language),
+                'audio_language': audio_language or user_language
+            }
     
-    def _extract_structured_data_comprehensive(self, text, language):
+    def analyze_pages(self, page_results, user_language='en-IN', audio_language=None, verbose=True):
+        """Analyze a multi-page report, extracting each page's tests as soon as its OCR completes"""
+        context = AnalysisContext(user_language, verbose=verbose)
+        page_data_by_index = {}
+        page_texts = {}
+        failed_pages = []
+        
+        # page_results yields (page_index, OCR result or text) in completion order
+        for page_index, ocr_result in page_results:
+            if isinstance(ocr_result, str):
+                page_text = ocr_result
+            elif isinstance(ocr_result, dict) and ocr_result.get('success', False):
+                page_text = str(ocr_result.get('cleaned_text', ''))
+            else:
+                context.log(f"⚠️ MEDICAL ANALYZER: Skipping page {page_index + 1}, OCR failed")
+                failed_pages.append(page_index + 1)
+                continue
+            
+            page_texts[page_index] = page_text
+            layout = ocr_result.get('layout') if isinstance(ocr_result, dict) else None
+            page_data = self._extract_structured_data_comprehensive(page_text, user_language, layout, context)
+            page_data_by_index[page_index] = page_data
+            context.log(f"🔍 MEDICAL ANALYZER: Page {page_index + 1} added {len(page_data['test_results'])} test results")
+        
+        # Merge in page order so a repeated test is always credited to its first page
+        merged_data = None
+        seen_tests = set()
+        for page_index in sorted(page_data_by_index):
+            page_data = page_data_by_index[page_index]
+            if merged_data is None:
+                merged_data = {key: ([] if isinstance(value, list) else {}) for key, value in page_data.items()}
+            
+            # The same test often repeats on later pages (summaries, continued tables)
+            for test in page_data['test_results']:
+                test_key = (test.name.lower(), test.value, test.unit.lower())
+                if test_key in seen_tests:
+                    continue
+                seen_tests.add(test_key)
+                test.page = page_index + 1
+                merged_data['test_results'].append(test)
+            
+            for key, value in page_data.items():
+                if key == 'test_results':
+                    continue
+                if isinstance(value, dict):
+                    for info_key, info_value in value.items():
+                        merged_data[key].setdefault(info_key, info_value)
+                else:
+                    merged_data[key].extend(value)
+        
+        if merged_data is None:
+            return {
+                'success': False,
+                'error': 'OCR extraction failed',
+                'summary': self._get_error_message(user_language),
+                'audio_language': audio_language or user_language
+            }
+        
+        combined_text = '\n\n'.join(page_texts[index] for index in sorted(page_texts))
+        final_analysis = self._create_simple_comprehensive_analysis(merged_data, combined_text, user_language, context)
+        
+        final_analysis['audio_language'] = audio_language or user_language
+        final_analysis['pages'] = len(page_texts) + len(failed_pages)
+        final_analysis['failed_pages'] = sorted(failed_pages)
+        
+        return final_analysis
+
+    def _extract_structured_data_comprehensive(self, text, language, layout=None, context=None):
         """Comprehensive structured data extraction with enhanced patterns"""
         if not isinstance(text, str):
             text = str(text)
+        if context is None:
+            context = AnalysisContext(language)
             
         structured_data = {
             'test_results': [],
@@ -65,70 +453,212 @@ class MedicalAnalyzerAgent:
             'reference_ranges': []
         }
         
-        print(f"🔍 EXTRACTING: Starting comprehensive data extraction...")
-        
-        # Enhanced test result patterns
-        test_patterns = [
-            # Standard medical test patterns
-            r'(blood\s+sugar|glucose|fasting\s+glucose|random\s+glucose)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
-            r'(cholesterol|total\s+cholesterol|ldl|hdl|triglycerides)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
-            r'(blood\s+pressure|bp|systolic|diastolic)\s*:?\s*([0-9]+/[0-9]+|[0-9]+)\s*(mmHg|mm\s+Hg)?',
-            r'(hemoglobin|hb|hgb)\s*:?\s*([0-9]+\.?[0-9]*)\s*(g/dL|g/dl|g%)?',
-            r'(creatinine|urea|bun)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
-            r'(hba1c|a1c|glycated\s+hemoglobin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(%)?',
-            r'(tsh|t3|t4|thyroid)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mIU/L|ng/dL|pmol/L)?',
-            r'(vitamin\s+d|vit\s+d|25\s+oh\s+d)\s*:?\s*([0-9]+\.?[0-9]*)\s*(ng/mL|nmol/L)?',
-            r'(vitamin\s+b12|b12|cobalamin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(pg/mL|pmol/L)?',
-            r'(iron|ferritin|transferrin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(ng/mL|μg/L|mg/L)?',
-            # Generic pattern for any test
-            r'([A-Za-z][A-Za-z\s]{2,20})\s*:?\s*([0-9]+\.?[0-9]*)\s*([a-zA-Z/%μ]+)?'
-        ]
-        
-        for pattern in test_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                test_name = match.group(1).strip()
-                value = match.group(2).strip()
-                unit = match.group(3).strip() if len(match.groups()) > 2 and match.group(3) else ""
-                
-                # Filter out obvious non-medical matches
-                if len(test_name) > 2 and not any(exclude in test_name.lower() for exclude in ['page', 'date', 'time', 'phone', 'address']):
-                    structured_data['test_results'].append({
-                        'name': test_name,
-                        'value': value,
-                        'unit': unit,
-                        'full_match': match.group(0)
-                    })
+        context.log(f"🔍 EXTRACTING: Starting comprehensive data extraction...")
+        
+        if layout and layout.get('lines'):
+            # OCR kept the table rows, so read each row once instead of regex-scanning the text
+            structured_data['test_results'], structured_data['reference_ranges'] = self._extract_tests_from_layout(layout)
+            
+            # Rows the word-level parser cannot split ("Glucose:95 mg/dL", "210mg/dL") go through the lexer
+            consumed_lines = {test.source['line'] for test in structured_data['test_results']}
+            leftover_text = '\n'.join(
+                line['text'] for index, line in enumerate(layout['lines']) if index not in consumed_lines
+            )
+            layout_count = len(structured_data['test_results'])
+            self._extract_tests_from_text(leftover_text, structured_data)
+            for test in structured_data['test_results'][layout_count:]:
+                test.span = None  # Offsets into the leftover lines, not into the page text
+        else:
+            self._extract_tests_from_text(text, structured_data)
+        
+        # Each test is resolved to its canonical analyte and unit once; every rule below keys off
+        # the id and the normalized value, while 'value' and 'unit' stay as printed for display
+        for test in structured_data['test_results']:
+            test.analyte_id = self.knowledge_base.resolve_analyte(test.name)
+            converted = self.unit_registry.to_canonical(test.analyte_id, self._numeric_value(test), test.unit)
+            test.normalized_value, test.normalized_unit = converted or (None, None)
         
         # Extract patient information
-        patient_patterns = [
-            r'(?:patient\s+)?name\s*:?\s*([A-Za-z\s]+)',
-            r'age\s*:?\s*([0-9]+)\s*(?:years?|yrs?)?',
-            r'(?:gender|sex)\s*:?\s*(male|female|m|f)',
-            r'date\s*:?\s*([0-9]{1,2}[/-][0-9]{1,2}[/-][0-9]{2,4})',
-        ]
-        
-        for pattern in patient_patterns:
+        for key, pattern in PATIENT_PATTERNS:
             match = re.search(pattern, text, re.IGNORECASE)
             if match:
-                key = pattern.split('\\')[0].replace('(?:', '').replace('patient\\s+)?', '').replace('s*', '').replace(':', '').replace('?', '')
                 structured_data['patient_info'][key] = match.group(1).strip()
         
-        print(f"🔍 EXTRACTED: {len(structured_data['test_results'])} test results")
+        context.log(f"🔍 EXTRACTED: {len(structured_data['test_results'])} test results")
         for test in structured_data['test_results'][:3]:
-            print(f"🔍 TEST: {test['name']} = {test['value']} {test['unit']}")
+            context.log(f"🔍 TEST: {test.name} = {test.value} {test.unit}")
         
         return structured_data
     
-    def _create_simple_comprehensive_analysis(self, structured_data, original_text, user_language):
-        """Create detailed but simple analysis understandable by anyone, including a 5-year-old"""
-        print(f"🔍 CREATING: Simple comprehensive analysis with {len(structured_data['test_results'])} test results")
+    def _patient_age_and_sex(self, patient_info):
+        """Age in years and 'male'/'female' from the extracted patient info, None where unknown"""
+        try:
+            age = int(patient_info.get('age'))
+        except (TypeError, ValueError):
+            age = None
         
-        # IMPORTANT: Store language for use in other methods
-        self.current_language = user_language
+        sex = (patient_info.get('sex') or '').lower()[:1]
+        return age, {'m': 'male', 'f': 'female'}.get(sex)
+    
+    def _numeric_value(self, test):
+        """Number a test is classified by: the systolic reading for a BP pair, else the value itself"""
+        if test.second_number is not None and test.analyte_id != 'blood_pressure':
+            return None
+        return test.number
+    
+    def _classify_test(self, test, context):
+        """Reference band for a test; a BP pair takes the worse of its systolic and diastolic bands"""
+        band = self.knowledge_base.classify(test.analyte_id, test.normalized_value, context.age, context.sex)
+        if test.analyte_id == 'blood_pressure' and test.second_number is not None:
+            diastolic_band = self.knowledge_base.classify('blood_pressure_diastolic', test.second_number, context.age, context.sex)
+            if BAND_SEVERITY.get(diastolic_band, 0) > BAND_SEVERITY.get(band, 0):
+                band = diastolic_band
+        
+        # Without a range of our own, the H/L flag the lab printed is the best judgement available
+        return band or FLAG_BANDS.get(test.flag)
+    
+    def _extract_tests_from_text(self, text, structured_data):
+        """Lex plain OCR text once into "name [:] value [unit] [range]" test results
+        
+        Every token is consumed exactly once, left to right, so a value belongs to a
+        single name and no analyte is reported twice for one printed row.
+        """
+        name_starts = []   # Offsets of the words since the last value, line break or stray symbol
+        line_test = None   # Last test on the current line, which a following range belongs to
+        unit_slot = False  # True right after a value, where a unit may follow
+        flag_slot = False  # True right after a value or its unit, where an H/L flag may follow
+        match_start = 0
+        
+        for token in TEXT_TOKEN_RE.finditer(text):
+            kind = token.lastgroup
+            if kind == 'space' or kind == 'joiner':
+                continue
+            
+            if kind == 'word':
+                word = token.group()
+                if flag_slot and RESULT_FLAG_RE.match(word):
+                    line_test.flag = word
+                    line_test.span = (match_start, token.end())
+                    flag_slot = False
+                    continue
+                if unit_slot and LAYOUT_UNIT_RE.match(word) and ('/' in word or word.lower() in LAYOUT_BARE_UNITS):
+                    line_test.unit = word
+                    line_test.span = (match_start, token.end())
+                else:
+                    name_starts.append(token.start())
+                    flag_slot = False
+                unit_slot = False
+            
+            elif kind == 'value':
+                unit_slot = flag_slot = False
+                if not name_starts:
+                    continue
+                
+                # Only the words closest to the value name it; earlier ones are headings or labels
+                match_start = name_starts[-TEXT_MAX_NAME_WORDS:][0]
+                name_starts = []
+                test_name = text[match_start:token.start()].strip(' \t:=-.(')
+                if len(test_name) <= 2 or any(exclude in test_name.lower() for exclude in LAYOUT_EXCLUDED_NAMES):
+                    line_test = None
+                    continue
+                
+                line_test = TestResult.parse(test_name, token.group(), span=(match_start, token.end()))
+                structured_data['test_results'].append(line_test)
+                unit_slot = flag_slot = True
+            
+            elif kind == 'range':
+                if line_test is not None and not line_test.reference_range:
+                    line_test.reference_range = token.group()
+                    structured_data['reference_ranges'].append({'name': line_test.name, 'range': token.group()})
+                name_starts = []
+                unit_slot = flag_slot = False
+            
+            else:
+                # Line breaks and symbols such as | or * end whatever name was being collected
+                name_starts = []
+                unit_slot = flag_slot = False
+                if kind == 'newline':
+                    line_test = None
+
+    def _extract_tests_from_layout(self, layout):
+        """Parse test rows from OCR layout lines in a single pass
+
+        Each line is read left to right as name words, a value, an optional unit and
+        an optional reference range. Lines without a numeric value are skipped.
+        """
+        test_results = []
+        reference_ranges = []
+        
+        for line_index, line in enumerate(layout['lines']):
+            words = [word['text'] for word in line['words']]
+            row = self._parse_layout_row(words)
+            if not row:
+                continue
+            
+            # Where the value was printed, so OCR can learn the lab's layout
+            value_index = next(index for index, word in enumerate(words) if LAYOUT_VALUE_RE.match(word))
+            row.source = {'line': line_index, 'word': value_index}
+            test_results.append(row)
+            if row.reference_range:
+                reference_ranges.append({'name': row.name, 'range': row.reference_range})
+        
+        return test_results, reference_ranges
+
+    def _parse_layout_row(self, words):
+        """Split one report row into name, value, unit and reference range"""
+        index = 0
+        while index < len(words) and not LAYOUT_VALUE_RE.match(words[index]):
+            index += 1
+        
+        if index == 0 or index == len(words):
+            return None
+        
+        test_name = ' '.join(words[:index]).strip(' :-.')
+        if len(test_name) <= 2 or not re.search(r'[A-Za-z]{2}', test_name):
+            return None
+        if any(exclude in test_name.lower() for exclude in LAYOUT_EXCLUDED_NAMES):
+            return None
+        
+        printed_value = words[index]
+        index += 1
+        
+        # The lab's H/L flag may sit between the value and the unit or after the unit
+        flag = ""
+        if index < len(words) and RESULT_FLAG_RE.match(words[index]):
+            flag = RESULT_FLAG_RE.match(words[index]).group('flag')
+            index += 1
+        
+        unit = ""
+        if index < len(words):
+            candidate = words[index]
+            if LAYOUT_UNIT_RE.match(candidate) and ('/' in candidate or candidate.lower() in LAYOUT_BARE_UNITS):
+                unit = candidate
+                index += 1
+        
+        if not flag and index < len(words) and RESULT_FLAG_RE.match(words[index]):
+            flag = RESULT_FLAG_RE.match(words[index]).group('flag')
+            index += 1
+        
+        range_match = LAYOUT_RANGE_RE.search(' '.join(words[index:]))
+        
+        return TestResult.parse(
+            test_name, printed_value, unit, range_match.group(0) if range_match else "", flag=flag
+        )
+
+    def _create_simple_comprehensive_analysis(self, structured_data, original_text, user_language, context=None):
+        """Create detailed but simple analysis understandable by anyone, including a 5-year-old"""
+        # Everything request-specific travels in the context, never on self
+        if context is None:
+            context = AnalysisContext(user_language)
+        context.log(f"🔍 CREATING: Simple comprehensive analysis with {len(structured_data['test_results'])} test results")
         
         test_results = structured_data.get('test_results', [])
         patient_info = structured_data.get('patient_info', {})
+        context.age, context.sex = self._patient_age_and_sex(patient_info)
+        
+        # Classify each test once, after all pages are merged so the patient's age and sex are known
+        for test in test_results:
+            test.band = self._classify_test(test, context)
         
         # Build comprehensive audio summary
         audio_summary_parts = []
@@ -149,15 +679,16 @@ class MedicalAnalyzerAgent:
             
             # Detailed explanation of each parameter for audio
             for i, test in enumerate(test_results):  # Analyze ALL tests
-                test_name = test['name']
-                test_value = test['value']
-                test_unit = test['unit']
+                test_name = test.name
+                test_value = test.value
+                test_unit = test.unit
+                analyte_id = test.analyte_id
                 
-                interpretation = self._get_simple_interpretation(test_name, test_value, test_unit)
+                interpretation = self._get_simple_interpretation(context, analyte_id, test.band)
                 
                 # Create detailed audio explanation for each parameter
                 audio_explanation = self._create_audio_parameter_explanation(
-                    test_name, test_value, test_unit, interpretation, i + 1
+                    analyte_id, test_name, test_value, test_unit, interpretation, i + 1
                 )
                 audio_summary_parts.append(audio_explanation)
                 
@@ -232,7 +763,7 @@ class MedicalAnalyzerAgent:
                 audio_summary_parts.append(audio_implications)
             
             # Simple personalized advice - NOW PROPERLY TRANSLATED
-            simple_advice = self._generate_simple_recommendations(test_results, patient_info, concerning_count)
+            simple_advice = self._generate_simple_recommendations(context, test_results, patient_info, concerning_count)
             recommendations.extend(simple_advice)
             
             if recommendations:
@@ -288,8 +819,8 @@ class MedicalAnalyzerAgent:
         
         recommendations = unique_recommendations[:5]  # Limit to 5 unique recommendations
         
-        print(f"🔍 CREATED: Simple summary length = {len(summary)}")
-        print(f"🔍 SUMMARY: {summary[:300]}...")
+        context.log(f"🔍 CREATED: Simple summary length = {len(summary)}")
+        context.log(f"🔍 SUMMARY: {summary[:300]}...")
         
         return {
             'success': True,
@@ -302,7 +833,7 @@ class MedicalAnalyzerAgent:
             'follow_up_actions': self._generate_simple_followup(concerning_count),
             'language': user_language,
             'data_driven': True,
-            'structured_data': structured_data,
+            'structured_data': dict(structured_data, test_results=[test.to_dict() for test in test_results]),
             'normal_count': normal_count,
             'concerning_count': concerning_count,
             'simple_language': True,
@@ -331,7 +862,7 @@ class MedicalAnalyzerAgent:
         except:
             return recommendation
 
-    def _generate_simple_recommendations(self, test_results, patient_info, concerning_count):
+    def _generate_simple_recommendations(self, context, test_results, patient_info, concerning_count):
         """Generate simple recommendations anyone can follow - NOW PROPERLY TRANSLATED"""
         
         simple_recs = []
@@ -354,9 +885,9 @@ class MedicalAnalyzerAgent:
         # Translate basic recommendations if needed
         translated_basic_recs = []
         for rec in basic_recs:
-            if hasattr(self, 'current_language') and self.current_language != 'en-IN':
+            if context.translates:
                 # Use the translation method
-                translated_rec = self._translate_recommendation(rec, self.current_language)
+                translated_rec = self._translate_recommendation(rec, context.language)
                 translated_basic_recs.append(translated_rec)
             else:
                 translated_basic_recs.append(rec)
@@ -366,275 +897,59 @@ class MedicalAnalyzerAgent:
         # Test-specific simple advice - ALSO TRANSLATE THESE
         test_specific_recs = []
         for test in test_results:
-            test_name = test['name'].lower()
-            try:
-                value = float(test['value'])
-                
-                if any(term in test_name for term in ['glucose', 'sugar']) and value > 140:
-                    test_specific_recs.append("Eat less candy, cookies, and sweet things")
-                elif 'cholesterol' in test_name and value > 200:
-                    test_specific_recs.append("Eat fish, nuts, and avoid fried foods")
-                elif 'hemoglobin' in test_name and value < 12:
-                    test_specific_recs.append("Eat spinach, meat, and foods with iron")
-                    
-            except:
-                continue
+            analyte_id = test.analyte_id
+            band = test.band
+            
+            if analyte_id == 'glucose' and band in HIGH_BANDS:
+                test_specific_recs.append("Eat less candy, cookies, and sweet things")
+            elif analyte_id in CHOLESTEROL_ANALYTES and band in LOW_BANDS | HIGH_BANDS:
+                test_specific_recs.append("Eat fish, nuts, and avoid fried foods")
+            elif analyte_id == 'hemoglobin' and band in LOW_BANDS:
+                test_specific_recs.append("Eat spinach, meat, and foods with iron")
         
         # Translate test-specific recommendations
         for rec in test_specific_recs:
-            if hasattr(self, 'current_language') and self.current_language != 'en-IN':
-                translated_rec = self._translate_recommendation(rec, self.current_language)
+            if context.translates:
+                translated_rec = self._translate_recommendation(rec, context.language)
                 simple_recs.append(translated_rec)
             else:
                 simple_recs.append(rec)
         
         return simple_recs[:6]  # Limit to 6 simple recommendations
 
-    def _get_simple_interpretation(self, test_name, test_value, test_unit):
-        """Get simple interpretation with specific health implications - FIXED DEFAULT CASE"""
-        
-        try:
-            value_float = float(test_value)
-        except:
-            return {
-                'status': 'unknown',
-                'health_implication': 'This test shows important information about your health.',
-                'simple_advice': 'This test provides valuable health information.'
-            }
+    def _get_simple_interpretation(self, context, analyte_id, band):
+        """Status and wording for a test from the reference band it was classified into"""
         
-        test_name_lower = test_name.lower()
-        
-        # Simple ranges for common tests with specific health implications
-        if any(term in test_name_lower for term in ['glucose', 'sugar', 'blood sugar']):
-            if value_float < 70:
-                return {
-                    'status': 'a little low',
-                    'health_implication': 'Low blood sugar can make you feel weak, dizzy, or shaky and can be dangerous if it drops too much.',
-                    'simple_advice': 'Eat healthy snacks when you feel weak or shaky.'
-                }
-            elif 70 <= value_float <= 140:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Your blood sugar is in a healthy range, which means your body is managing energy well.',
-                    'simple_advice': 'Keep eating healthy foods and stay active.'
-                }
-            elif 140 < value_float <= 200:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'High blood sugar can damage your blood vessels, nerves, and organs over time if not controlled.',
-                    'simple_advice': 'Eat less candy and sweet things, play more outside.'
-                }
-            else:
-                return {
-                    'status': 'needs attention',
-                    'health_implication': 'Very high blood sugar can lead to serious problems like diabetes, heart disease, and kidney damage.',
-                    'simple_advice': 'This is important - eat very healthy foods and stay active.'
-                }
-        
-        # Cholesterol
-        elif 'cholesterol' in test_name_lower:
-            if value_float < 200:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Good cholesterol levels help protect your heart and blood vessels from disease.',
-                    'simple_advice': 'Your heart is happy! Keep eating good foods.'
-                }
-            elif 200 <= value_float <= 240:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'High cholesterol can build up in your arteries and increase your risk of heart attacks and strokes.',
-                    'simple_advice': 'Eat more fruits and vegetables, less fried food.'
-                }
-            else:
-                return {
-                    'status': 'needs attention',
-                    'health_implication': 'Very high cholesterol significantly increases your risk of heart disease, heart attacks, and strokes.',
-                    'simple_advice': 'Your heart needs help - eat very healthy foods and exercise.'
-                }
-        
-        # Blood pressure
-        elif any(term in test_name_lower for term in ['pressure', 'bp']):
-            if '/' in test_value:
-                try:
-                    systolic = int(test_value.split('/')[0])
-                    if systolic < 120:
-                        return {
-                            'status': 'good',
-                            'health_implication': 'Normal blood pressure means your heart is working efficiently and your blood vessels are healthy.',
-                            'simple_advice': 'Your heart is pumping just right!'
-                        }
-                    elif 120 <= systolic <= 140:
-                        return {
-                            'status': 'a little high',
-                            'health_implication': 'Slightly high blood pressure puts extra strain on your heart and blood vessels, which can lead to heart problems over time.',
-                            'simple_advice': 'Try to relax more and eat less salty food.'
-                        }
-                    else:
-                        return {
-                            'status': 'needs attention',
-                            'health_implication': 'High blood pressure greatly increases your risk of heart attacks, strokes, kidney disease, and other serious health problems.',
-                            'simple_advice': 'Your heart is working too hard.'
-                        }
-                except:
-                    return {
-                        'status': 'unknown',
-                        'health_implication': 'Blood pressure shows how hard your heart is working to pump blood through your body.',
-                        'simple_advice': 'This measures how your heart pumps blood.'
-                    }
-            else:
-                if value_float < 120:
-                    return {
-                        'status': 'good',
-                        'health_implication': 'Your blood pressure is in a healthy range, which is good for your heart and blood vessels.',
-                        'simple_advice': 'Your heart pressure looks good!'
-                    }
-                else:
-                    return {
-                        'status': 'a little high',
-                        'health_implication': 'Higher blood pressure can strain your heart and blood vessels over time.',
-                        'simple_advice': 'Your heart pressure might be a little high.'
-                    }
-        
-        # Hemoglobin
-        elif any(term in test_name_lower for term in ['hemoglobin', 'hb']):
-            if 12.0 <= value_float <= 17.5:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Good hemoglobin levels mean your blood can carry enough oxygen to all parts of your body.',
-                    'simple_advice': 'Your blood is carrying oxygen well!'
-                }
-            elif value_float < 12.0:
-                return {
-                    'status': 'a little low',
-                    'health_implication': 'Low hemoglobin (anemia) can make you feel tired, weak, and short of breath because your body isn\'t getting enough oxygen.',
-                    'simple_advice': 'Eat foods with iron like spinach and meat to make your blood stronger.'
-                }
-            else:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'High hemoglobin can make your blood thicker, which might affect blood flow.',
-                    'simple_advice': 'Your blood has a lot of this protein.'
-                }
-        
-        # HbA1c
-        elif any(term in test_name_lower for term in ['hba1c', 'a1c']):
-            if value_float < 5.7:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Your blood sugar has been well controlled over the past 2-3 months, which protects your organs from damage.',
-                    'simple_advice': 'Your long-term blood sugar control is excellent!'
-                }
-            elif 5.7 <= value_float <= 6.4:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'Your blood sugar has been higher than normal for months, which increases your risk of developing diabetes and organ damage.',
-                    'simple_advice': 'Your blood sugar has been a little high. Eat healthier foods and exercise more.'
-                }
-            else:
-                return {
-                    'status': 'needs attention',
-                    'health_implication': 'Your blood sugar has been dangerously high for months, which can cause serious damage to your heart, kidneys, eyes, and nerves.',
-                    'simple_advice': 'Your blood sugar has been too high for too long.'
-                }
-        
-        # Creatinine
-        elif 'creatinine' in test_name_lower:
-            if 0.6 <= value_float <= 1.3:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Normal creatinine levels show that your kidneys are filtering waste from your blood properly.',
-                    'simple_advice': 'Your kidneys are cleaning your blood well!'
-                }
-            elif value_float > 1.3:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'High creatinine suggests your kidneys may not be filtering waste properly, which can lead to kidney disease.',
-                    'simple_advice': 'Your kidneys might need help. Drink more water.'
-                }
-            else:
-                return {
-                    'status': 'a little low',
-                    'health_implication': 'This test shows how well your kidneys are working to clean waste from your blood.',
-                    'simple_advice': 'This shows how your kidneys work.'
-                }
-        
-        # Thyroid tests
-        elif any(term in test_name_lower for term in ['tsh', 'thyroid']):
-            if 0.4 <= value_float <= 4.0:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Normal thyroid levels mean your metabolism, energy, and body temperature are well regulated.',
-                    'simple_advice': 'Your thyroid gland is working normally!'
-                }
-            elif value_float > 4.0:
-                return {
-                    'status': 'a little high',
-                    'health_implication': 'High TSH suggests your thyroid is underactive, which can make you feel tired, cold, and cause weight gain.',
-                    'simple_advice': 'Your thyroid might be working slowly.'
-                }
-            else:
-                return {
-                    'status': 'a little low',
-                    'health_implication': 'Low TSH suggests your thyroid is overactive, which can cause rapid heartbeat, weight loss, and anxiety.',
-                    'simple_advice': 'Your thyroid might be working too fast.'
-                }
-        
-        # Vitamin D
-        elif any(term in test_name_lower for term in ['vitamin d', 'vit d']):
-            if value_float >= 30:
-                return {
-                    'status': 'good',
-                    'health_implication': 'Good vitamin D levels help keep your bones strong and support your immune system.',
-                    'simple_advice': 'You have enough vitamin D for strong bones!'
-                }
-            elif 20 <= value_float < 30:
-                return {
-                    'status': 'a little low',
-                    'health_implication': 'Low vitamin D can weaken your bones and make you more likely to get sick.',
-                    'simple_advice': 'Spend more time in sunlight and eat foods with vitamin D.'
-                }
-            else:
-                return {
-                    'status': 'needs attention',
-                    'health_implication': 'Very low vitamin D can cause bone pain, muscle weakness, and increase your risk of fractures.',
-                    'simple_advice': 'You need more vitamin D. Take supplements.'
-                }
+        wording = BAND_INTERPRETATIONS.get(analyte_id, {})
+        interpretation = wording.get(band) or wording.get(BAND_FALLBACK.get(band))
+        if interpretation:
+            return dict(interpretation, status=BAND_STATUS[band])
         
-        # FIXED: Default for unknown tests - NOW TRANSLATES
-        default_advice = f'This test shows how your {self._get_body_part_explanation(test_name)} is working.'
+        # Default for tests without wording of their own - translated like the recommendations
+        body_part = self._get_body_part_explanation(analyte_id)
+        default_advice = f'This test shows how your {body_part} is working.'
         
         # Translate default advice if needed
-        if hasattr(self, 'current_language') and self.current_language != 'en-IN':
-            default_advice = self._translate_recommendation(default_advice, self.current_language)
+        if context.translates:
+            default_advice = self._translate_recommendation(default_advice, context.language)
+        
+        if band in BAND_STATUS and band != 'normal':
+            # Only the lab's H/L flag says this one is out of range
+            return {
+                'status': BAND_STATUS[band],
+                'health_implication': f'Your lab marked this result outside its normal range. This test measures important aspects of your {body_part}.',
+                'simple_advice': default_advice
+            }
         
         return {
             'status': 'unknown',
-            'health_implication': f'This test measures important aspects of your {self._get_body_part_explanation(test_name)} and helps doctors understand your health.',
+            'health_implication': f'This test measures important aspects of your {body_part} and helps doctors understand your health.',
             'simple_advice': default_advice
         }
 
-    def _get_body_part_explanation(self, test_name):
+    def _get_body_part_explanation(self, analyte_id):
         """Get simple explanation of what body part the test is checking"""
-        test_name_lower = test_name.lower()
-        
-        if any(term in test_name_lower for term in ['glucose', 'sugar']):
-            return "blood sugar and energy system"
-        elif 'cholesterol' in test_name_lower:
-            return "heart and blood vessels"
-        elif any(term in test_name_lower for term in ['pressure', 'bp']):
-            return "heart and blood flow"
-        elif any(term in test_name_lower for term in ['hemoglobin', 'hb']):
-            return "blood and oxygen carrying"
-        elif 'creatinine' in test_name_lower:
-            return "kidneys and waste cleaning"
-        elif any(term in test_name_lower for term in ['thyroid', 'tsh']):
-            return "thyroid gland and energy control"
-        elif 'vitamin' in test_name_lower:
-            return "vitamin levels and nutrition"
-        elif 'iron' in test_name_lower:
-            return "iron levels and blood strength"
-        else:
-            return "body"
+        return self.knowledge_base.get_body_system(analyte_id)
 
     def _analyze_comprehensive_risk_factors(self, test_results):
         """Analyze comprehensive risk factors based on test results"""
@@ -642,67 +957,9 @@ class MedicalAnalyzerAgent:
         risk_factors = []
         
         for test in test_results:
-            test_name = test['name'].lower()
-            try:
-                value = float(test['value'])
-                
-                # Blood sugar risks
-                if any(term in test_name for term in ['glucose', 'sugar']):
-                    if value > 200:
-                        risk_factors.append("Very high blood sugar increases your risk of diabetes, heart disease, kidney damage, and nerve problems")
-                    elif value > 140:
-                        risk_factors.append("High blood sugar increases your risk of developing diabetes and heart problems")
-                    elif value < 70:
-                        risk_factors.append("Low blood sugar can cause dangerous episodes of weakness, confusion, and fainting")
-                
-                # Cholesterol risks
-                elif 'cholesterol' in test_name:
-                    if value > 240:
-                        risk_factors.append("Very high cholesterol significantly increases your risk of heart attacks, strokes, and blocked arteries")
-                    elif value > 200:
-                        risk_factors.append("High cholesterol increases your risk of heart disease and stroke")
-                
-                # Blood pressure risks
-                elif 'pressure' in test_name and '/' in test['value']:
-                    try:
-                        systolic = int(test['value'].split('/')[0])
-                        if systolic > 180:
-                            risk_factors.append("Very high blood pressure greatly increases your risk of heart attacks, strokes, kidney disease, and heart failure")
-                        elif systolic > 140:
-                            risk_factors.append("High blood pressure increases your risk of heart disease, stroke, and kidney problems")
-                    except:
-                        pass
-                
-                # HbA1c risks
-                elif any(term in test_name for term in ['hba1c', 'a1c']):
-                    if value > 7.0:
-                        risk_factors.append("Poor long-term blood sugar control increases your risk of diabetes complications including eye, kidney, and nerve damage")
-                    elif value > 6.4:
-                        risk_factors.append("Elevated long-term blood sugar indicates diabetes risk and potential organ damage")
-                
-                # Hemoglobin risks
-                elif any(term in test_name for term in ['hemoglobin', 'hb']):
-                    if value < 10.0:
-                        risk_factors.append("Severe anemia can cause heart problems, extreme fatigue, and difficulty with daily activities")
-                    elif value < 12.0:
-                        risk_factors.append("Low hemoglobin (anemia) can cause fatigue, weakness, and reduced quality of life")
-                
-                # Creatinine risks
-                elif 'creatinine' in test_name:
-                    if value > 2.0:
-                        risk_factors.append("High creatinine indicates significant kidney problems that can lead to kidney failure")
-                    elif value > 1.3:
-                        risk_factors.append("Elevated creatinine suggests kidney function problems that need monitoring")
-                
-                # Thyroid risks
-                elif any(term in test_name for term in ['tsh', 'thyroid']):
-                    if value > 10.0:
-                        risk_factors.append("Severely underactive thyroid can cause heart problems, depression, and memory issues")
-                    elif value < 0.1:
-                        risk_factors.append("Overactive thyroid can cause heart rhythm problems, bone loss, and anxiety")
-                
-            except:
-                continue
+            risk = BAND_RISK_FACTORS.get(test.analyte_id, {}).get(test.band)
+            if risk:
+                risk_factors.append(risk)
         
         return risk_factors
 
@@ -749,7 +1006,7 @@ class MedicalAnalyzerAgent:
             # Majority of results concerning
             return "Your health report shows several areas that need attention, but don't worry - with the right care and lifestyle changes, these can be improved. It's important to work closely with your doctor and have regular checkups every month until things improve. Remember, taking small steps every day towards better health will make a big difference."
 
-    def _create_audio_parameter_explanation(self, test_name, test_value, test_unit, interpretation, position):
+    def _create_audio_parameter_explanation(self, analyte_id, test_name, test_value, test_unit, interpretation, position):
         """Create detailed audio explanation for each parameter"""
         
         # Start with parameter number and name
@@ -762,7 +1019,7 @@ class MedicalAnalyzerAgent:
             audio_text += f"Your result is {test_value}. "
         
         # Add what this test measures
-        body_part = self._get_body_part_explanation(test_name)
+        body_part = self._get_body_part_explanation(analyte_id)
         audio_text += f"This test measures your {body_part}. "
         
         # Add interpretation with health implications
@@ -799,23 +1056,17 @@ class MedicalAnalyzerAgent:
         simple_risks = []
         
         for test in test_results:
-            test_name = test['name'].lower()
-            try:
-                value = float(test['value'])
-                
-                if any(term in test_name for term in ['glucose', 'sugar']) and value > 140:
-                    simple_risks.append("too much sugar in blood")
-                elif 'cholesterol' in test_name and value > 200:
-                    simple_risks.append("heart needs better food")
-                elif 'pressure' in test_name and '/' in test['value']:
-                    systolic = int(test['value'].split('/')[0])
-                    if systolic > 130:
-                        simple_risks.append("heart working too hard")
-                elif 'hemoglobin' in test_name and value < 12:
-                    simple_risks.append("blood needs more iron")
-                    
-            except:
-                continue
+            analyte_id = test.analyte_id
+            band = test.band
+            
+            if analyte_id == 'glucose' and band in HIGH_BANDS:
+                simple_risks.append("too much sugar in blood")
+            elif analyte_id in CHOLESTEROL_ANALYTES and band in LOW_BANDS | HIGH_BANDS:
+                simple_risks.append("heart needs better food")
+            elif analyte_id == 'blood_pressure' and band in HIGH_BANDS:
+                simple_risks.append("heart working too hard")
+            elif analyte_id == 'hemoglobin' and band in LOW_BANDS:
+                simple_risks.append("blood needs more iron")
         
         return simple_risks
 
@@ -883,3 +1134,26 @@ class MedicalAnalyzerAgent:
             'hi-IN': "मेडिकल रिपोर्ट को प्रोसेस करने में असमर्थ। कृपया पुनः प्रयास करें या अपने डॉक्टर से सलाह लें।"
         }
         return error_messages.get(language, error_messages['en-IN'])
+
+
+# One agent per batch worker process, built once by the pool initializer and reused for every chunk
+_batch_agent = None
+
+
+def _init_batch_worker():
+    global _batch_agent
+    _batch_agent = MedicalAnalyzerAgent()
+
+
+def _analyze_batch_chunk(reports, user_language, audio_language, verbose):
+    return [_batch_agent._analyze_batch_item(report, user_language, audio_language, verbose) for report in reports]
+
+
+def _chunks(iterable, size):
+    """Lists of up to size items, read lazily from iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
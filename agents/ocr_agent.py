@@ -1,12 +1,364 @@
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps, ImageDraw
 import os
 import logging
 import re
+import json
+import hashlib
+import functools
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from config import Config
+from utils.ocr_stats import OCRConfigStats
+from utils.image_preprocessing import ImagePreprocessor
+from utils.image_triage import ImageTriage
+from utils.ocr_cache import OCRResultCache, file_content_hash
+from utils.perceptual_hash import dhash
+from utils.medical_text_scorer import MedicalTextScorer
+from utils.ocr_text_corrector import OCRTextCorrector
+from utils.ocr_vocabulary import write_tesseract_vocabulary
+from utils.lab_templates import LabTemplateRegistry, absolute_box, union_box
+from utils.lab_results import RESULT_NUMBER
+from utils.medical_knowledge import normalize_analyte_name
+from utils.ocr_worker_pool import OCRWorkerPool
+
+# Enhanced OCR configurations for medical documents
+OCR_CONFIGS = [
+    '--oem 3 --psm 6',  # Default - uniform block of text
+    '--oem 3 --psm 4',  # Single column of text
+    '--oem 3 --psm 3',  # Fully automatic page segmentation
+    '--oem 3 --psm 11', # Sparse text - good for forms
+    '--oem 3 --psm 12', # Sparse text with OSD
+    '--oem 3 --psm 1',  # Automatic page segmentation with OSD
+]
+
+
+# Single-line, digits-only config for re-reading low-confidence numbers
+REFINE_CONFIG = '--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789.,/<>%-'
+
+# Words worth re-reading: digits mixed with characters Tesseract confuses them with
+REFINE_CANDIDATE_RE = re.compile(r'^[0-9OoIlSBZ.,/<>%-]+$')
+REFINED_VALUE_RE = re.compile(r'^[<>]?[0-9]+(?:[.,][0-9]+)*(?:/[0-9]+)?%?$')
+
+# Lab template lines re-read on every report because they carry patient details
+TEMPLATE_CONTEXT_CONFIG = '--oem 3 --psm 7'
+TEMPLATE_CONTEXT_RE = re.compile(r'\b(?:name|age|sex|gender)\b', re.IGNORECASE)
+
+# "name [:] value [unit]" on one line, to compare a near-duplicate's results row by row;
+# only unit-like words (with / or %) count, so a following test name is never taken as a unit
+# A whole number followed by digits on the same line is one number split by OCR ("7 500"),
+# unless it already has a decimal part or the digits open a reference range ("12 13-17")
+SPLIT_NUMBER_RE = re.compile(r'(?<![\d.,])(\d+)[ \t]+(?=\d+(?:\.\d+)?(?![\d.]*[ \t]*-))')
+
+NEAR_DUPLICATE_ROW_RE = re.compile(
+    r'(?P<name>[A-Za-z][^\s:=]*(?:[ \t]+[A-Za-z][^\s:=]*)*)[ \t:=-]+'
+    r'(?P<value>(?:[<>]=?)?' + RESULT_NUMBER + r'(?:/[0-9]+)?)'
+    r'(?:[ \t]*(?P<unit>[A-Za-zμµ]*[/%][A-Za-z0-9μµ%/]*))?'
+)
+
+# Tesseract OSD scripts and the language packs that read them. English stays in every
+# combination because Indian lab reports print test names and units in English.
+SCRIPT_LANGUAGES = {
+    'Latin': ['eng'],
+    'Devanagari': ['eng', 'hin'],
+    'Bengali': ['eng', 'ben'],
+    'Tamil': ['eng', 'tam'],
+    'Telugu': ['eng', 'tel'],
+    'Kannada': ['eng', 'kan'],
+    'Malayalam': ['eng', 'mal'],
+    'Gujarati': ['eng', 'guj'],
+    'Gurmukhi': ['eng', 'pan'],
+    'Oriya': ['eng', 'ori'],
+    'Arabic': ['eng', 'urd'],
+}
+
+DEFAULT_LANGUAGE = 'eng'
+
+# Bump whenever OCR output can change for the same settings, so cached results are not reused
+OCR_PIPELINE_VERSION = 5
+
+
+def _text_from_tesseract_data(data):
+    """Rebuild plain text from image_to_data output, keeping line and paragraph breaks"""
+    lines = []
+    current_key = None
+    current_words = []
+    last_paragraph = None
+    
+    for i, word in enumerate(data['text']):
+        word = (word or '').strip()
+        if not word:
+            continue
+        
+        paragraph = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+        key = paragraph + (data['line_num'][i],)
+        if key != current_key:
+            if current_words:
+                lines.append(' '.join(current_words))
+            if last_paragraph is not None and paragraph != last_paragraph:
+                lines.append('')  # Blank line between paragraphs, like image_to_string
+            current_key = key
+            current_words = []
+            last_paragraph = paragraph
+        current_words.append(word)
+    
+    if current_words:
+        lines.append(' '.join(current_words))
+    
+    return '\n'.join(lines).strip()
+
+
+def _lines_from_tesseract_data(data, y_offset=0):
+    """Group image_to_data words into lines with word boxes, in Tesseract's reading order"""
+    lines = []
+    current_key = None
+    
+    for i, word in enumerate(data['text']):
+        word = (word or '').strip()
+        if not word:
+            continue
+        
+        key = (data['page_num'][i], data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if key != current_key:
+            lines.append({'text': '', 'bbox': None, 'words': []})
+            current_key = key
+        
+        lines[-1]['words'].append({
+            'text': word,
+            'left': data['left'][i],
+            'top': data['top'][i] + y_offset,
+            'width': data['width'][i],
+            'height': data['height'][i],
+            'conf': round(float(data['conf'][i]), 1)
+        })
+    
+    for line in lines:
+        words = line['words']
+        line['text'] = ' '.join(word['text'] for word in words)
+        line['bbox'] = [
+            min(word['left'] for word in words),
+            min(word['top'] for word in words),
+            max(word['left'] + word['width'] for word in words),
+            max(word['top'] + word['height'] for word in words)
+        ]
+    
+    return lines
+
+
+def _build_layout(lines, size, bin_fraction=0.02, min_line_share=0.2):
+    """Page layout: lines with word boxes plus the x positions where table columns start
+
+    Word left edges are binned across the page; bins where enough lines start a
+    word mark a column. Each word is tagged with the column it falls in.
+    """
+    width, height = size
+    bin_width = max(1, int(width * bin_fraction))
+    
+    bin_counts = {}
+    for line in lines:
+        # Count each bin once per line so long lines do not dominate
+        for bin_index in {word['left'] // bin_width for word in line['words']}:
+            bin_counts[bin_index] = bin_counts.get(bin_index, 0) + 1
+    
+    min_lines = max(3, int(len(lines) * min_line_share))
+    columns = []
+    for bin_index in sorted(bin_counts):
+        if bin_counts[bin_index] >= min_lines:
+            # Neighbouring busy bins belong to the same column
+            if columns and bin_index * bin_width - columns[-1] <= bin_width:
+                continue
+            columns.append(bin_index * bin_width)
+    
+    for line in lines:
+        for word in line['words']:
+            if not columns:
+                word['column'] = None
+                continue
+            # Words left of the first column start (ragged margins) belong to it
+            word['column'] = max(0, sum(1 for column in columns if column <= word['left'] + bin_width // 2) - 1)
+    
+    return {'width': width, 'height': height, 'columns': columns, 'lines': lines}
+
+
+def _filter_lines_in_band(data, band_top, band_bottom):
+    """Keep only words whose line is vertically centred inside [band_top, band_bottom)"""
+    line_extents = {}
+    for i, word in enumerate(data['text']):
+        if not (word or '').strip():
+            continue
+        key = (data['page_num'][i], data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        top = data['top'][i]
+        bottom = top + data['height'][i]
+        if key in line_extents:
+            line_top, line_bottom = line_extents[key]
+            line_extents[key] = (min(line_top, top), max(line_bottom, bottom))
+        else:
+            line_extents[key] = (top, bottom)
+    
+    keep = []
+    for i in range(len(data['text'])):
+        key = (data['page_num'][i], data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if key in line_extents:
+            line_top, line_bottom = line_extents[key]
+            if band_top <= (line_top + line_bottom) / 2.0 < band_bottom:
+                keep.append(i)
+    
+    return {column: [values[i] for i in keep] for column, values in data.items()}
+
+
+def _run_tesseract_pass(image, language, config, timeout, tesseract_cmd=None, box=None, keep_band=None,
+                        vocabulary=None):
+    """Run one Tesseract config and return its text with per-word confidence stats
+
+    For tiles, image is a file path, box the tile to crop from it and keep_band the
+    vertical range (in tile coordinates) this tile owns, so overlapping lines are
+    only reported by one tile. vocabulary holds the --user-words/--user-patterns
+    arguments; it is not part of the config the pass is reported under.
+    """
+    # Spawned pool workers do not inherit the path resolved by setup_tesseract
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    
+    if box:
+        with Image.open(image) as source:
+            image = source.crop(box)
+    
+    data = pytesseract.image_to_data(
+        image,
+        lang=language,
+        config=f"{config} {vocabulary}" if vocabulary else config,
+        timeout=timeout,
+        output_type=pytesseract.Output.DICT
+    )
+    
+    if keep_band:
+        data = _filter_lines_in_band(data, *keep_band)
+    
+    # Tile word boxes are shifted back into page coordinates
+    y_offset = box[1] if box else 0
+    
+    # Tesseract reports conf -1 for layout rows that carry no word
+    confidences = [
+        float(conf) for conf, word in zip(data['conf'], data['text'])
+        if (word or '').strip() and float(conf) >= 0
+    ]
+    
+    return {
+        'config': config,
+        'text': _text_from_tesseract_data(data),
+        'lines': _lines_from_tesseract_data(data, y_offset),
+        'mean_confidence': round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+        'word_count': len(confidences)
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _installed_languages(tesseract_cmd=None):
+    """Language packs Tesseract has installed, listed once per worker process"""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    return frozenset(pytesseract.get_languages(config=''))
+
+
+def _detect_ocr_language(image, timeout, tesseract_cmd=None, min_confidence=2.0):
+    """Run one OSD pass to find the page's script and return the smallest installed lang set for it"""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    
+    try:
+        osd = pytesseract.image_to_osd(
+            image,
+            config='--psm 0',
+            timeout=timeout,
+            output_type=pytesseract.Output.DICT
+        )
+    except pytesseract.TesseractError as e:
+        # OSD needs osd.traineddata and enough characters to vote on
+        return {'language': DEFAULT_LANGUAGE, 'script': None, 'script_confidence': 0.0, 'error': str(e).strip()}
+    
+    script = osd.get('script')
+    confidence = float(osd.get('script_conf', 0.0))
+    packs = SCRIPT_LANGUAGES.get(script, [DEFAULT_LANGUAGE]) if confidence >= min_confidence else [DEFAULT_LANGUAGE]
+    
+    installed = _installed_languages(tesseract_cmd)
+    packs = [pack for pack in packs if pack in installed] or [DEFAULT_LANGUAGE]
+    
+    return {'language': '+'.join(packs), 'script': script, 'script_confidence': confidence, 'error': None}
+
 
 class OCRAgent:
-    def __init__(self, language='eng'):
-        self.language = language
+    # Shared across agent instances so every orchestrator uses one bounded pool
+    _pool = None
+    _pool_lock = threading.Lock()
+    
+    def __init__(self, language=None, parallel=None, pool_size=None, config_timeout=None,
+                 early_exit_confidence=None, early_exit_min_keywords=None):
+        # 'auto' picks the Tesseract languages per image from the detected script
+        self.language = Config.OCR_LANGUAGE if language is None else language
+        self.parallel = Config.OCR_PARALLEL if parallel is None else parallel
+        self.pool_size = pool_size or Config.OCR_POOL_SIZE
+        self.config_timeout = config_timeout or Config.OCR_CONFIG_TIMEOUT
+        self.early_exit_confidence = (
+            Config.OCR_EARLY_EXIT_CONFIDENCE if early_exit_confidence is None else early_exit_confidence
+        )
+        self.early_exit_min_keywords = (
+            Config.OCR_EARLY_EXIT_MIN_KEYWORDS if early_exit_min_keywords is None else early_exit_min_keywords
+        )
+        self.preprocessor = ImagePreprocessor(
+            stages=Config.OCR_PREPROCESS_STAGES,
+            target_dpi=Config.OCR_TARGET_DPI
+        )
+        # Progressive mode reads a low-resolution copy first for a quick preliminary result
+        self.preview_preprocessor = ImagePreprocessor(
+            stages=set(Config.OCR_PREPROCESS_STAGES) | {'downscale'},
+            target_dpi=Config.OCR_PREVIEW_DPI
+        )
+        self.text_scorer = MedicalTextScorer()
+        self.text_corrector = OCRTextCorrector()
+        self.triage = None
+        if Config.OCR_TRIAGE_ENABLED:
+            self.triage = ImageTriage(
+                min_brightness=Config.OCR_TRIAGE_MIN_BRIGHTNESS,
+                min_contrast=Config.OCR_TRIAGE_MIN_CONTRAST,
+                min_sharpness=Config.OCR_TRIAGE_MIN_SHARPNESS,
+                min_edge_density=Config.OCR_TRIAGE_MIN_EDGE_DENSITY
+            )
+        # Analyte names, units and value shapes steer Tesseract's first read
+        self.vocabulary_args = None
+        self.vocabulary_digest = None
+        if Config.OCR_USER_VOCABULARY_ENABLED:
+            try:
+                vocabulary = write_tesseract_vocabulary(Config.OCR_STATE_DIR)
+                self.vocabulary_args = vocabulary['args']
+                self.vocabulary_digest = vocabulary['digest']
+                print(f"🔍 OCR: User vocabulary with {vocabulary['words']} words and {vocabulary['patterns']} patterns")
+            except OSError as e:
+                print(f"⚠️ OCR: Could not write the Tesseract user vocabulary: {e}")
+        self.settings_version = self._settings_version()
+        self.result_cache = None
+        if Config.OCR_CACHE_ENABLED:
+            self.result_cache = OCRResultCache(
+                os.path.join(Config.OCR_STATE_DIR, 'ocr_cache.sqlite3'),
+                memory_entries=Config.OCR_CACHE_MEMORY_ENTRIES,
+                disk_max_bytes=Config.OCR_CACHE_DISK_MAX_MB * 1024 * 1024
+            )
+        self.templates = None
+        if Config.OCR_TEMPLATES_ENABLED:
+            self.templates = LabTemplateRegistry(
+                os.path.join(Config.OCR_STATE_DIR, 'lab_templates.db'),
+                max_distance=Config.OCR_TEMPLATE_MAX_DISTANCE,
+                min_observations=Config.OCR_TEMPLATE_MIN_OBSERVATIONS,
+                min_label_similarity=Config.OCR_TEMPLATE_MIN_LABEL_SIMILARITY
+            )
+        self.config_stats = None
+        if Config.OCR_LEARN_CONFIG_ORDER:
+            self.config_stats = OCRConfigStats(
+                os.path.join(Config.OCR_STATE_DIR, 'config_stats.db'),
+                min_observations=Config.OCR_ORDER_MIN_OBSERVATIONS,
+                explore_rate=Config.OCR_ORDER_EXPLORE_RATE
+            )
         self.setup_tesseract()
     
     def setup_tesseract(self):
@@ -29,10 +381,10 @@ class OCRAgent:
             else:
                 raise Exception("Tesseract not found. Please install with: brew install tesseract")
     
-    def extract_text_from_image(self, image_path):
+    def extract_text_from_image(self, image_path, frame=0):
         """Extract text from image with comprehensive error handling - FIXED DATA STRUCTURE"""
         try:
-            print(f"🔍 OCR: Processing image: {image_path}")
+            print(f"🔍 OCR: Processing image: {image_path}" + (f" (page {frame + 1})" if frame else ""))
             
             # Validate image path
             if not os.path.exists(image_path):
@@ -43,75 +395,127 @@ class OCRAgent:
                     'cleaned_text': ''  # Added for compatibility
                 }
             
-            # Open and process image
-            image = Image.open(image_path)
-            print(f"🔍 OCR: Image size: {image.size}, mode: {image.mode}")
-            
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Enhanced OCR configurations for medical documents
-            configs = [
-                '--oem 3 --psm 6',  # Default - uniform block of text
-                '--oem 3 --psm 4',  # Single column of text
-                '--oem 3 --psm 3',  # Fully automatic page segmentation
-                '--oem 3 --psm 11', # Sparse text - good for forms
-                '--oem 3 --psm 12', # Sparse text with OSD
-                '--oem 3 --psm 1',  # Automatic page segmentation with OSD
-            ]
+            # Repeated uploads of the same bytes skip Tesseract entirely
+            cache_key = None
+            if self.result_cache:
+                content_hash = file_content_hash(image_path)
+                if frame:
+                    content_hash += f"#page{frame}"
+                cache_key = self.result_cache.make_key(content_hash, self.settings_version)
+                cached_result, cache_tier = self.result_cache.get(cache_key)
+                if cached_result:
+                    print(f"✅ OCR: Cache hit ({cache_tier}) for {cache_key[:16]}...")
+                    cached_result['cache'] = cache_tier
+                    return cached_result
             
-            extracted_text = ""
-            best_config = ""
+            # Dark, washed-out, blurry or text-free photos are turned away from a thumbnail
+            triage = None
+            if self.triage:
+                triage = self.triage.assess(image_path, frame)
+                print(f"🔍 OCR: Triage in {triage['elapsed_ms']}ms: {triage['metrics']}")
+                if not triage['passed']:
+                    print(f"⚠️ OCR: Rejected before OCR: {triage['reason']}")
+                    return {
+                        'success': False,
+                        'error': triage['message'],
+                        'rejection_reason': triage['reason'],
+                        'triage': triage['metrics'],
+                        'text': '',
+                        'cleaned_text': ''
+                    }
             
-            for config in configs:
-                try:
-                    text = pytesseract.image_to_string(
-                        image, 
-                        lang=self.language,
-                        config=config
-                    ).strip()
-                    
-                    # Prioritize text with medical keywords or numbers
-                    if text and self._is_better_medical_text(text, extracted_text):
-                        extracted_text = text
-                        best_config = config
-                        print(f"🔍 OCR: Better result with config: {config}")
-                        
-                except Exception as e:
-                    print(f"🔍 OCR: Config {config} failed: {e}")
-                    continue
+            # Open and preprocess image (reduced-size decode, grayscale, deskew, binarize)
+            image, preprocessing = self.preprocessor.load(image_path, frame)
+            print(f"🔍 OCR: Image size: {preprocessing['original_size']} -> {image.size}, mode: {image.mode}")
+            print(f"🔍 OCR: Preprocessing timings (ms): {preprocessing['timings_ms']}")
+            
+            # Re-photographed copies of a cached report reuse its text after a cheap check
+            phash = None
+            if self.result_cache:
+                phash = dhash(image)
+                near_result = self._reuse_near_duplicate(image, phash)
+                if near_result:
+                    self.result_cache.put(cache_key, near_result, phash=phash)
+                    near_result['cache'] = 'near_duplicate'
+                    return near_result
+            
+            # Reports in a known lab layout read their value regions plus one pass over the other rows
+            template_fingerprint = None
+            best_pass = None
+            if self.templates:
+                template_fingerprint = self.templates.fingerprint(image)
+                best_pass, cascade = self._run_template_fields(image, template_fingerprint)
+            
+            if best_pass:
+                language, script = DEFAULT_LANGUAGE, None
+            else:
+                language, script = self._select_language(image)
+                best_pass, cascade = self._run_config_cascade(image, language)
+            
+            extracted_text = best_pass['text'] if best_pass else ""
+            best_config = best_pass['config'] if best_pass else ""
             
             if not extracted_text:
                 return {
                     'success': False,
                     'error': 'No text could be extracted from the image. The image may be too blurry, have poor contrast, or contain no readable text.',
                     'text': '',
-                    'cleaned_text': ''
+                    'cleaned_text': '',
+                    'configs_run': cascade['configs_run'],
+                    'stop_reason': cascade['stop_reason'],
+                    'preprocessing': preprocessing
                 }
             
+            # Garbled numbers in an otherwise good pass are re-read word by word, not page by page
+            refined_words = []
+            if Config.OCR_REFINE_ENABLED and not cascade.get('template_id'):
+                refined_words = self._refine_low_confidence_words(image, best_pass, language)
+            
+            # Confusions are fixed in the words themselves, so the text and the layout the analyzer reads agree
+            self._correct_pass_words(best_pass)
+            extracted_text = best_pass['text']
+            
             # Clean the extracted text for better medical analysis
             cleaned_text = self._clean_medical_text(extracted_text)
             
             print(f"🔍 OCR: Extracted text length: {len(extracted_text)}")
             print(f"🔍 OCR: Cleaned text length: {len(cleaned_text)}")
             print(f"🔍 OCR: Best config used: {best_config}")
+            print(f"🔍 OCR: Ran {len(cascade['configs_run'])}/{len(OCR_CONFIGS)} configs, stopped on: {cascade['stop_reason']}")
             print(f"🔍 OCR: Text preview: {cleaned_text[:200]}...")
             
             # Check if we got meaningful medical content
-            if self._contains_medical_content(cleaned_text):
+            if self._contains_medical_content(self._pass_score(best_pass)):
                 print(f"✅ OCR: Medical content detected in extracted text")
             else:
                 print(f"⚠️ OCR: No clear medical content detected")
             
-            return {
+            result = {
                 'success': True,
-                'text': extracted_text,           # Original text
+                'text': extracted_text,           # Pass text with misread characters corrected
                 'cleaned_text': cleaned_text,     # Cleaned text for medical analysis
                 'error': None,
-                'config_used': best_config
+                'config_used': best_config,
+                'confidence': best_pass['mean_confidence'],
+                'configs_run': cascade['configs_run'],
+                'stop_reason': cascade['stop_reason'],
+                'tiles': cascade.get('tiles', 1),
+                'refined_words': refined_words,
+                'layout': _build_layout(best_pass['lines'], image.size),  # Row/column structure for the analyzer
+                'language': language,
+                'script': script,
+                'template_id': cascade.get('template_id'),
+                'template_fingerprint': template_fingerprint,
+                'preprocessing': preprocessing,
+                'triage': triage['metrics'] if triage else None
             }
             
+            if self.result_cache:
+                self.result_cache.put(cache_key, result, phash=phash)
+            
+            result['cache'] = 'miss'
+            return result
+            
         except pytesseract.TesseractNotFoundError:
             return {
                 'success': False,
@@ -128,35 +532,825 @@ class OCRAgent:
                 'cleaned_text': ''
             }
 
-    def _is_better_medical_text(self, new_text, current_text):
-        """Determine if new text is better for medical analysis"""
-        if not current_text:
-            return True
+    def extract_text_preview(self, image_path):
+        """Fast single-pass OCR of a low-resolution copy, for a preliminary result while the full pass runs
         
-        if len(new_text) < 10:  # Too short
-            return False
+        Returns a cached full-resolution result instead when there is one, marked with
+        resolution='full', so callers know no background pass is needed.
+        """
+        try:
+            print(f"🔍 OCR: Preview pass for: {image_path}")
+            
+            if not os.path.exists(image_path):
+                return {
+                    'success': False,
+                    'error': f'Image file not found: {image_path}',
+                    'text': '',
+                    'cleaned_text': ''
+                }
+            
+            if self.result_cache:
+                cache_key = self.result_cache.make_key(file_content_hash(image_path), self.settings_version)
+                cached_result, cache_tier = self.result_cache.get(cache_key)
+                if cached_result:
+                    print(f"✅ OCR: Preview served from cache ({cache_tier})")
+                    cached_result['cache'] = cache_tier
+                    cached_result['resolution'] = 'full'
+                    return cached_result
+            
+            # The full pass repeats triage, but a rejected photo should not get a preliminary result either
+            if self.triage:
+                triage = self.triage.assess(image_path)
+                if not triage['passed']:
+                    print(f"⚠️ OCR: Preview rejected before OCR: {triage['reason']}")
+                    return {
+                        'success': False,
+                        'error': triage['message'],
+                        'rejection_reason': triage['reason'],
+                        'triage': triage['metrics'],
+                        'text': '',
+                        'cleaned_text': ''
+                    }
+            
+            image, preprocessing = self.preview_preprocessor.load(image_path)
+            print(f"🔍 OCR: Preview size: {preprocessing['original_size']} -> {image.size}")
+            
+            # Script detection would cost a second pass; the full pass picks the language properly
+            language = DEFAULT_LANGUAGE if self.language == 'auto' else self.language
+            preview_pass = self._get_pool().submit(
+                _run_tesseract_pass, image, language, OCR_CONFIGS[0],
+                self.config_timeout, pytesseract.pytesseract.tesseract_cmd, vocabulary=self.vocabulary_args
+            ).result()
+            
+            if not preview_pass['text']:
+                return {
+                    'success': False,
+                    'error': 'No text could be extracted from the preview pass.',
+                    'text': '',
+                    'cleaned_text': '',
+                    'resolution': 'preview'
+                }
+            
+            self._correct_pass_words(preview_pass)
+            print(f"🔍 OCR: Preview text length: {len(preview_pass['text'])}, confidence {preview_pass['mean_confidence']}")
+            return {
+                'success': True,
+                'text': preview_pass['text'],
+                'cleaned_text': self._clean_medical_text(preview_pass['text']),
+                'error': None,
+                'config_used': preview_pass['config'],
+                'confidence': preview_pass['mean_confidence'],
+                'layout': _build_layout(preview_pass['lines'], image.size),
+                'language': language,
+                'resolution': 'preview',
+                'preprocessing': preprocessing
+            }
+            
+        except pytesseract.TesseractNotFoundError:
+            return {
+                'success': False,
+                'error': 'Tesseract OCR engine not found. Please install with: brew install tesseract',
+                'text': '',
+                'cleaned_text': ''
+            }
+        except Exception as e:
+            logging.error(f"OCR preview failed: {str(e)}")
+            return {
+                'success': False,
+                'error': f'OCR preview failed: {str(e)}',
+                'text': '',
+                'cleaned_text': ''
+            }
+
+    def count_pages(self, image_path):
+        """Number of pages in an upload (frames of a multi-page TIFF, otherwise 1)"""
+        try:
+            with Image.open(image_path) as image:
+                return getattr(image, 'n_frames', 1)
+        except Exception:
+            return 1
+
+    def iter_page_results(self, image_paths):
+        """OCR every page of one or more uploads concurrently, yielding (page_index, result) as pages finish
+
+        At most OCR_MAX_PAGES_IN_FLIGHT pages are decoded at once, and each worker
+        only loads its own frame, so memory stays bounded whatever the page count.
+        """
+        pages = [
+            (image_path, frame)
+            for image_path in image_paths
+            for frame in range(self.count_pages(image_path))
+        ]
+        print(f"🔍 OCR: Streaming {len(pages)} pages from {len(image_paths)} uploads")
+        
+        page_queue = iter(enumerate(pages))
+        executor = ThreadPoolExecutor(max_workers=Config.OCR_MAX_PAGES_IN_FLIGHT)
+        pending = {}
+        
+        def submit_next():
+            next_page = next(page_queue, None)
+            if next_page is not None:
+                page_index, (image_path, frame) = next_page
+                pending[executor.submit(self.extract_text_from_image, image_path, frame)] = page_index
+        
+        try:
+            for _ in range(Config.OCR_MAX_PAGES_IN_FLIGHT):
+                submit_next()
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_index = pending.pop(future)
+                    page_result = future.result()
+                    page_result['page'] = page_index + 1
+                    submit_next()
+                    yield page_index, page_result
+        finally:
+            # A consumer that stops early should not leave queued pages running
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _reuse_near_duplicate(self, image, phash):
+        """Return a cached result for a perceptually similar upload if a fast OCR pass agrees with it"""
+        cached_key, cached_result, distance = self.result_cache.find_near_duplicate(
+            phash, self.settings_version, Config.OCR_NEAR_DUPLICATE_MAX_DISTANCE
+        )
+        if not cached_result:
+            return None
+        
+        print(f"🔍 OCR: Near-duplicate candidate {cached_key[:16]}... at distance {distance}, verifying")
         
-        # Count medical indicators
-        medical_keywords = [
-            'blood', 'sugar', 'glucose', 'cholesterol', 'pressure', 'hemoglobin',
-            'test', 'result', 'level', 'mg/dL', 'mmHg', 'patient', 'name', 'age',
-            'report', 'analysis', 'normal', 'high', 'low', 'date', 'value'
+        # One pass on a small copy is enough to tell whether it is the same report
+        preview = image.copy()
+        preview.thumbnail((1200, 1200))
+        try:
+            check_pass = self._get_pool().submit(
+                _run_tesseract_pass, preview, cached_result.get('language', DEFAULT_LANGUAGE), OCR_CONFIGS[0],
+                self.config_timeout, pytesseract.pytesseract.tesseract_cmd, vocabulary=self.vocabulary_args
+            ).result()
+        except pytesseract.TesseractNotFoundError:
+            raise
+        except Exception as e:
+            print(f"🔍 OCR: Near-duplicate verification failed: {e}")
+            return None
+        
+        overlap = self._token_overlap(check_pass['text'], cached_result.get('text', ''))
+        if overlap < Config.OCR_NEAR_DUPLICATE_MIN_OVERLAP:
+            print(f"🔍 OCR: Near-duplicate rejected, token overlap {overlap:.2f}")
+            return None
+        
+        # A follow-up report from the same lab shares nearly every word and most numbers,
+        # so every result row must carry the same value before the old text is served
+        check_rows = self._result_rows(check_pass['text'])
+        cached_rows = self._result_rows(cached_result.get('text', ''))
+        if not check_rows or check_rows != cached_rows:
+            changed = sorted(set(check_rows.items()) ^ set(cached_rows.items()))[:5]
+            print(f"🔍 OCR: Near-duplicate rejected, result rows differ: {changed}")
+            return None
+        
+        print(f"✅ OCR: Reusing near-duplicate result, token overlap {overlap:.2f}")
+        self.result_cache.record_near_duplicate_hit()
+        cached_result['near_duplicate_of'] = cached_key.split(':')[0]
+        cached_result['near_duplicate_distance'] = distance
+        # Word boxes belong to the other photo's framing, so the analyzer reads the text instead
+        cached_result['layout'] = None
+        cached_result['template_fingerprint'] = None
+        return cached_result
+
+    def _select_language(self, image):
+        """Tesseract language string for this image and the script it was chosen from"""
+        if self.language != 'auto':
+            return self.language, None
+        
+        # Script detection only needs a screen-sized copy of the page
+        preview = image.copy()
+        preview.thumbnail((Config.OCR_OSD_MAX_EDGE, Config.OCR_OSD_MAX_EDGE))
+        try:
+            detection = self._get_pool().submit(
+                _detect_ocr_language, preview, self.config_timeout,
+                pytesseract.pytesseract.tesseract_cmd, Config.OCR_SCRIPT_MIN_CONFIDENCE
+            ).result()
+        except Exception as e:
+            print(f"⚠️ OCR: Script detection failed, using {DEFAULT_LANGUAGE}: {e}")
+            return DEFAULT_LANGUAGE, None
+        
+        if detection['error']:
+            print(f"⚠️ OCR: Script detection unavailable, using {DEFAULT_LANGUAGE}: {detection['error']}")
+        else:
+            print(f"🔍 OCR: Script {detection['script']} ({detection['script_confidence']}) -> lang {detection['language']}")
+        return detection['language'], detection['script']
+
+    def _token_overlap(self, check_text, cached_text):
+        """Share of words and numbers from a verification pass that also appear in cached text"""
+        token_pattern = r'[a-z]{3,}|\d+(?:\.\d+)?'
+        check_tokens = set(re.findall(token_pattern, check_text.lower()))
+        if len(check_tokens) < 5:  # Too little text to vouch for a match
+            return 0.0
+        
+        cached_tokens = set(re.findall(token_pattern, cached_text.lower()))
+        return len(check_tokens & cached_tokens) / float(len(check_tokens))
+
+    def _result_rows(self, text):
+        """Test name -> tuple of (value, unit) printed against it, read line by line from OCR text"""
+        rows = {}
+        for line in self.text_corrector.correct(text).splitlines():
+            for match in NEAR_DUPLICATE_ROW_RE.finditer(line):
+                # The words closest to the value name it, as in the analyzer's lexer
+                name = ' '.join(normalize_analyte_name(match.group('name')).split()[-4:])
+                if name:
+                    unit = (match.group('unit') or '').lower()
+                    rows[name] = rows.get(name, ()) + ((match.group('value').replace(',', ''), unit),)
+        return rows
+
+    def _settings_version(self):
+        """Short fingerprint of every setting that changes OCR output, used in cache keys"""
+        settings = {
+            'pipeline': OCR_PIPELINE_VERSION,
+            'language': self.language,
+            'script_min_confidence': Config.OCR_SCRIPT_MIN_CONFIDENCE if self.language == 'auto' else None,
+            'templates': Config.OCR_TEMPLATES_ENABLED,
+            'vocabulary': self.vocabulary_digest,
+            'refine': [
+                Config.OCR_REFINE_ENABLED, Config.OCR_REFINE_WORD_CONFIDENCE,
+                Config.OCR_REFINE_MIN_PAGE_CONFIDENCE, Config.OCR_REFINE_MAX_WORDS, Config.OCR_REFINE_SCALE
+            ],
+            'configs': OCR_CONFIGS,
+            'preprocess_stages': list(self.preprocessor.stages),
+            'target_dpi': Config.OCR_TARGET_DPI,
+            'early_exit': [self.early_exit_confidence, self.early_exit_min_keywords]
+        }
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def _run_config_cascade(self, image, language):
+        """Run the full-page Tesseract configs, tiled, parallel or serial, and learn which one won"""
+        # Try the configs that historically win for images like this one first
+        configs = OCR_CONFIGS
+        feature_key = None
+        if self.config_stats:
+            feature_key = self.config_stats.image_features(image)
+            configs = self.config_stats.ordered_configs(feature_key, OCR_CONFIGS)
+            print(f"🔍 OCR: Config order for {feature_key}: {configs}")
+        
+        if self.parallel and self.pool_size > 1 and image.width * image.height >= Config.OCR_TILE_MIN_PIXELS:
+            best_pass, cascade = self._run_configs_tiled(image, configs, language)
+        elif self.parallel and self.pool_size > 1:
+            best_pass, cascade = self._run_configs_parallel(image, configs, language)
+        else:
+            best_pass, cascade = self._run_configs_serial(image, configs, language)
+        
+        if self.config_stats and best_pass and best_pass['text']:
+            self.config_stats.record_win(feature_key, best_pass['config'])
+        
+        return best_pass, cascade
+
+    def _run_template_fields(self, image, fingerprint):
+        """Read the value regions of a matched lab template and the rest of the page, or return (None, None) to fall back to full OCR"""
+        template_id, template = self.templates.match(fingerprint, image.size)
+        if not template_id:
+            return None, None
+        
+        fields = template['fields']
+        print(f"🔍 OCR: Matched lab template {template_id}, reading {len(fields)} value regions")
+        
+        pool = self._get_pool()
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        
+        def submit(region, config):
+            crop = self._line_crop(image, absolute_box(region, image.size), pad=0)
+            return pool.submit(
+                _run_tesseract_pass, crop, DEFAULT_LANGUAGE, config, self.config_timeout, tesseract_cmd,
+                vocabulary=self.vocabulary_args
+            )
+        
+        value_jobs = [
+            (field, submit(field['label_region'], TEMPLATE_CONTEXT_CONFIG), submit(field['region'], REFINE_CONFIG))
+            for field in fields
+        ]
+        context_jobs = [(region, submit(region['region'], TEMPLATE_CONTEXT_CONFIG)) for region in template['context']]
+        
+        # Rows the template has not confirmed (an extra test, a note) are still on the page, so
+        # everything outside the known rows is read in one pass and merged in below
+        rest_of_page = image.copy()
+        draw = ImageDraw.Draw(rest_of_page)
+        known_boxes = [union_box(field['boxes']) for field in fields] + [region['region'] for region in template['context']]
+        for box in known_boxes:
+            _, top, _, bottom = absolute_box(box, image.size)
+            draw.rectangle((0, top, image.width, bottom), fill='white')
+        rest_job = pool.submit(
+            _run_tesseract_pass, rest_of_page, DEFAULT_LANGUAGE, OCR_CONFIGS[0], self.config_timeout, tesseract_cmd,
+            vocabulary=self.vocabulary_args
+        )
+        
+        lines = []
+        confidences = []
+        for field, label_future, value_future in value_jobs:
+            try:
+                label_pass = label_future.result()
+                value_pass = value_future.result()
+            except Exception as e:
+                print(f"🔍 OCR: Template field {field['name']} failed: {e}")
+                continue
+            
+            # A matching header does not mean the same rows: another panel or a shifted table
+            # would put other tests in these regions, so every row must still carry its label
+            if not self.templates.label_matches(field, label_pass['text']):
+                print(f"⚠️ OCR: Template {template_id} row reads {label_pass['text'].strip()!r}, "
+                      f"expected {field['name']!r}, running full OCR")
+                for _, *futures in value_jobs + context_jobs + [(None, rest_job)]:
+                    for future in futures:
+                        future.cancel()
+                self.templates.record_result(template_id, False)
+                return None, None
+            
+            value = value_pass['text'].replace(' ', '')
+            if not REFINED_VALUE_RE.match(value) or value_pass['mean_confidence'] < Config.OCR_TEMPLATE_MIN_FIELD_CONFIDENCE:
+                continue
+            
+            confidences.append(value_pass['mean_confidence'])
+            words = []
+            for index, (text, box) in enumerate(zip(field['words'], field['boxes'])):
+                if index == field['value_index']:
+                    text, box, confidence = value, field['region'], value_pass['mean_confidence']
+                else:
+                    # Label, unit and range as learned; H/L flags were dropped by the registry
+                    confidence = -1.0
+                left, top, right, bottom = absolute_box(box, image.size)
+                words.append({'text': text, 'left': left, 'top': top, 'width': right - left,
+                              'height': bottom - top, 'conf': confidence})
+            lines.append(words)
+        
+        if len(lines) < len(fields) * Config.OCR_TEMPLATE_MIN_FIELD_SHARE:
+            print(f"⚠️ OCR: Template {template_id} read only {len(lines)}/{len(fields)} values, running full OCR")
+            self.templates.record_result(template_id, False)
+            return None, None
+        self.templates.record_result(template_id, True)
+        
+        for region, future in context_jobs:
+            try:
+                context_text = future.result()['text'].strip()
+            except Exception:
+                continue
+            if context_text:
+                left, top, right, bottom = absolute_box(region['region'], image.size)
+                lines.append([
+                    {'text': text, 'left': left, 'top': top, 'width': right - left,
+                     'height': bottom - top, 'conf': -1.0}
+                    for text in context_text.split()
+                ])
+        
+        try:
+            rest_pass = rest_job.result()
+        except Exception as e:
+            print(f"⚠️ OCR: Template {template_id} could not read the rest of the page, running full OCR: {e}")
+            return None, None
+        lines.extend(line['words'] for line in rest_pass['lines'])
+        if rest_pass['lines']:
+            print(f"🔍 OCR: Template {template_id} merged {len(rest_pass['lines'])} lines from outside its rows")
+        
+        lines.sort(key=lambda words: words[0]['top'])
+        layout_lines = [
+            {
+                'text': ' '.join(word['text'] for word in words),
+                'bbox': [
+                    min(word['left'] for word in words),
+                    min(word['top'] for word in words),
+                    max(word['left'] + word['width'] for word in words),
+                    max(word['top'] + word['height'] for word in words)
+                ],
+                'words': words
+            }
+            for words in lines
+        ]
+        
+        template_pass = {
+            'config': REFINE_CONFIG,
+            'text': '\n'.join(line['text'] for line in layout_lines),
+            'lines': layout_lines,
+            'mean_confidence': round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+            'word_count': len(confidences)
+        }
+        cascade = {
+            'configs_run': [REFINE_CONFIG, OCR_CONFIGS[0]],
+            'stop_reason': 'template',
+            'template_id': template_id
+        }
+        return template_pass, cascade
+
+    def learn_template(self, ocr_result, test_results):
+        """Teach the lab template registry where a fully OCR'd report printed each parsed test value"""
+        if not self.templates or not ocr_result.get('success') or ocr_result.get('template_id'):
+            return None
+        
+        fingerprint = ocr_result.get('template_fingerprint')
+        layout = ocr_result.get('layout')
+        if not fingerprint or not layout:
+            return None
+        
+        lines = layout['lines']
+        fields = []
+        for test in test_results:
+            source = test.get('source')
+            if not source or source['line'] >= len(lines):
+                continue
+            
+            words = lines[source['line']]['words']
+            value_index = source['word']
+            value = words[value_index]
+            # The value may print wider on another report, so its region runs to the neighbouring words
+            left = words[value_index - 1]['left'] + words[value_index - 1]['width'] + 2 if value_index else 0
+            right = words[value_index + 1]['left'] - 2 if value_index + 1 < len(words) else layout['width']
+            pad = max(4, value['height'] // 3)
+            fields.append({
+                'name': test['name'],
+                'words': [word['text'] for word in words],
+                'boxes': [
+                    [word['left'], word['top'], word['left'] + word['width'], word['top'] + word['height']]
+                    for word in words
+                ],
+                'value_index': value_index,
+                'region': [left, max(0, value['top'] - pad), right, min(layout['height'], value['top'] + value['height'] + pad)]
+            })
+        
+        # Patient details change on every report, so their lines are re-read, not stored
+        context = [
+            {'label': line['text'], 'region': line['bbox']}
+            for line in lines if TEMPLATE_CONTEXT_RE.search(line['text'])
+        ]
+        
+        template_id = self.templates.learn(fingerprint, (layout['width'], layout['height']), fields, context)
+        if template_id:
+            print(f"🔍 OCR: Learned {len(fields)} value regions for lab template {template_id}")
+        return template_id
+
+    def _run_configs_serial(self, image, configs, language):
+        """Run the Tesseract configs one after another, stopping early on a confident pass"""
+        best_pass = None
+        configs_run = []
+        pool = self._get_pool()
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        
+        for config in configs:
+            try:
+                ocr_pass = pool.submit(
+                    _run_tesseract_pass, image, language, config, self.config_timeout, tesseract_cmd,
+                    vocabulary=self.vocabulary_args
+                ).result()
+            except pytesseract.TesseractNotFoundError:
+                raise
+            except Exception as e:
+                print(f"🔍 OCR: Config {config} failed: {e}")
+                continue
+            
+            configs_run.append(config)
+            best_pass = self._pick_better_pass(ocr_pass, best_pass)
+            
+            if self._meets_early_exit(ocr_pass):
+                print(f"🔍 OCR: Early exit after config: {config}")
+                return best_pass, {'configs_run': configs_run, 'stop_reason': 'confidence_threshold'}
+        
+        return best_pass, {'configs_run': configs_run, 'stop_reason': 'all_configs_run'}
+
+    def _run_configs_parallel(self, image, configs, language):
+        """Spread the Tesseract configs over the worker pool, stopping early on a confident pass"""
+        # Save the prepared image once so workers read a file instead of unpickling pixels
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
+        temp_file.close()
+        
+        try:
+            image.save(temp_file.name, format='PNG')
+            
+            pool = self._get_pool()
+            tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+            futures = {
+                pool.submit(
+                    _run_tesseract_pass, temp_file.name, language,
+                    config, self.config_timeout, tesseract_cmd, vocabulary=self.vocabulary_args
+                ): config
+                for config in configs
+            }
+            
+            completed = {}
+            configs_run = []
+            stop_reason = 'all_configs_run'
+            
+            try:
+                # Queued configs may wait behind the others, so allow for a full backlog
+                for future in as_completed(futures, timeout=self.config_timeout * len(configs)):
+                    config = futures[future]
+                    try:
+                        ocr_pass = future.result()
+                    except pytesseract.TesseractNotFoundError:
+                        raise
+                    except Exception as e:
+                        print(f"🔍 OCR: Config {config} failed: {e}")
+                        continue
+                    
+                    completed[config] = ocr_pass
+                    configs_run.append(config)
+                    
+                    if self._meets_early_exit(ocr_pass):
+                        print(f"🔍 OCR: Early exit after config: {config}")
+                        stop_reason = 'confidence_threshold'
+                        break
+            except FuturesTimeoutError:
+                print("🔍 OCR: Timed out waiting for remaining configs")
+                stop_reason = 'timeout'
+            
+            # Drop configs that have not started yet; running ones finish in the background
+            for future in futures:
+                future.cancel()
+            
+            # Compare in config order so the winner matches the serial cascade
+            best_pass = None
+            for config in configs:
+                if config in completed:
+                    best_pass = self._pick_better_pass(completed[config], best_pass)
+            
+            return best_pass, {'configs_run': configs_run, 'stop_reason': stop_reason}
+            
+        finally:
+            os.unlink(temp_file.name)
+
+    def _run_configs_tiled(self, image, configs, language):
+        """OCR a large page as overlapping tiles spread over the worker pool, one config at a time"""
+        tiles = self._plan_tiles(image)
+        print(f"🔍 OCR: Large page {image.size} split into {len(tiles)} tiles")
+        
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
+        temp_file.close()
+        
+        try:
+            image.save(temp_file.name, format='PNG')
+            
+            pool = self._get_pool()
+            tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+            best_pass = None
+            configs_run = []
+            
+            for config in configs:
+                futures = [
+                    pool.submit(
+                        _run_tesseract_pass, temp_file.name, language, config,
+                        self.config_timeout, tesseract_cmd, box, keep_band, self.vocabulary_args
+                    )
+                    for box, keep_band in tiles
+                ]
+                
+                try:
+                    # Tiles may queue behind each other when there are more tiles than workers
+                    tile_passes = [future.result(timeout=self.config_timeout * len(tiles)) for future in futures]
+                except pytesseract.TesseractNotFoundError:
+                    raise
+                except Exception as e:
+                    print(f"🔍 OCR: Config {config} failed on a tile: {e}")
+                    for future in futures:
+                        future.cancel()
+                    continue
+                
+                ocr_pass = self._stitch_tile_passes(config, tile_passes)
+                configs_run.append(config)
+                best_pass = self._pick_better_pass(ocr_pass, best_pass)
+                
+                if self._meets_early_exit(ocr_pass):
+                    print(f"🔍 OCR: Early exit after config: {config}")
+                    return best_pass, {'configs_run': configs_run, 'stop_reason': 'confidence_threshold', 'tiles': len(tiles)}
+            
+            return best_pass, {'configs_run': configs_run, 'stop_reason': 'all_configs_run', 'tiles': len(tiles)}
+            
+        finally:
+            os.unlink(temp_file.name)
+
+    def _refine_low_confidence_words(self, image, ocr_pass, language):
+        """Re-OCR low-confidence numeric words from upscaled crops and splice better readings into the pass
+
+        Values next to a test name are re-read first. A reading replaces the word only
+        if it parses as a number and Tesseract is more confident in it.
+        """
+        if ocr_pass['mean_confidence'] < Config.OCR_REFINE_MIN_PAGE_CONFIDENCE:
+            return []
+        
+        candidates = []
+        for line in ocr_pass['lines']:
+            for index, word in enumerate(line['words']):
+                if not 0 <= word['conf'] < Config.OCR_REFINE_WORD_CONFIDENCE:
+                    continue
+                if not REFINE_CANDIDATE_RE.match(word['text']) or not re.search(r'\d', word['text']):
+                    continue
+                beside_name = any(re.search(r'[A-Za-z]{2}', previous['text']) for previous in line['words'][:index])
+                candidates.append((not beside_name, word['conf'], line, word))
+        
+        if not candidates:
+            return []
+        
+        candidates.sort(key=lambda candidate: candidate[:2])
+        candidates = candidates[:Config.OCR_REFINE_MAX_WORDS]
+        print(f"🔍 OCR: Re-reading {len(candidates)} low-confidence numeric words")
+        
+        pool = self._get_pool()
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        jobs = [
+            (word, pool.submit(
+                _run_tesseract_pass,
+                self._line_crop(
+                    image,
+                    (word['left'], word['top'], word['left'] + word['width'], word['top'] + word['height']),
+                    pad=max(4, word['height'] // 3)
+                ),
+                language,
+                REFINE_CONFIG, self.config_timeout, tesseract_cmd, vocabulary=self.vocabulary_args
+            ))
+            for _, _, _, word in candidates
         ]
         
-        new_score = sum(1 for keyword in medical_keywords if keyword.lower() in new_text.lower())
-        current_score = sum(1 for keyword in medical_keywords if keyword.lower() in current_text.lower())
+        corrections = []
+        for word, future in jobs:
+            try:
+                refined = future.result()
+            except Exception as e:
+                print(f"🔍 OCR: Word refinement failed for {word['text']!r}: {e}")
+                continue
+            
+            refined_text = refined['text'].replace(' ', '')
+            if refined_text == word['text'] or not REFINED_VALUE_RE.match(refined_text):
+                continue
+            if refined['mean_confidence'] <= word['conf']:
+                continue
+            
+            corrections.append({
+                'original': word['text'],
+                'corrected': refined_text,
+                'confidence_before': word['conf'],
+                'confidence_after': refined['mean_confidence']
+            })
+            word['text'] = refined_text
+            word['conf'] = refined['mean_confidence']
         
-        # Also consider text length and number presence
-        new_has_numbers = bool(re.search(r'\d+', new_text))
-        current_has_numbers = bool(re.search(r'\d+', current_text))
+        if corrections:
+            self._splice_corrected_lines(ocr_pass)
+            print(f"✅ OCR: Corrected {len(corrections)} words: {[(c['original'], c['corrected']) for c in corrections]}")
+        
+        return corrections
+
+    def _line_crop(self, image, box, pad):
+        """Padded, upscaled crop of a single text line, with the white margin Tesseract needs around it"""
+        box = (
+            max(0, box[0] - pad),
+            max(0, box[1] - pad),
+            min(image.width, box[2] + pad),
+            min(image.height, box[3] + pad)
+        )
+        crop = image.crop(box).convert('L')
+        scale = Config.OCR_REFINE_SCALE
+        crop = crop.resize((crop.width * scale, crop.height * scale), Image.LANCZOS)
+        return ImageOps.expand(crop, border=10, fill=255)
+
+    def _correct_pass_words(self, ocr_pass):
+        """Fix misread digits and letters word by word (never inside HbA1c, B12, ...) and splice them into the text"""
+        corrected_any = False
+        for line in ocr_pass['lines']:
+            for word in line['words']:
+                corrected = self.text_corrector.correct(word['text'])
+                if corrected != word['text']:
+                    word['text'] = corrected
+                    corrected_any = True
+        
+        if corrected_any:
+            self._splice_corrected_lines(ocr_pass)
+
+    def _splice_corrected_lines(self, ocr_pass):
+        """Rewrite changed lines in the pass text, walking lines and text together once"""
+        text = ocr_pass['text']
+        pieces = []
+        cursor = 0
+        
+        for line in ocr_pass['lines']:
+            new_line_text = ' '.join(word['text'] for word in line['words'])
+            if new_line_text == line['text']:
+                continue
+            position = text.find(line['text'], cursor)
+            if position < 0:
+                continue
+            pieces.append(text[cursor:position])
+            pieces.append(new_line_text)
+            cursor = position + len(line['text'])
+            line['text'] = new_line_text
+        
+        pieces.append(text[cursor:])
+        ocr_pass['text'] = ''.join(pieces)
+        # The cached medical score was computed on the old text
+        ocr_pass.pop('score', None)
+
+    def _plan_tiles(self, image):
+        """Split a page into full-width horizontal tiles cut at the emptiest rows near each boundary
+
+        Tiles span the whole width so table rows (test, value, unit, range) stay together.
+        Each tile is padded by an overlap and owns the band between its cuts.
+        """
+        width, height = image.size
+        tile_height = Config.OCR_TILE_HEIGHT
+        overlap = Config.OCR_TILE_OVERLAP
+        if height <= tile_height:
+            return [((0, 0, width, height), (0, height))]
+        
+        # Mean brightness of every row; the brightest row near a nominal cut is the safest place to cut
+        row_brightness = list(image.convert('L').convert('F').resize((1, height), Image.BOX).getdata())
+        search = tile_height // 4
+        
+        cuts = [0]
+        nominal = tile_height
+        while nominal < height - tile_height // 2:
+            window_start = max(cuts[-1] + 1, nominal - search)
+            window_end = min(height - 1, nominal + search)
+            # Among equally blank rows, prefer the one closest to the nominal cut
+            cut = max(
+                range(window_start, window_end),
+                key=lambda row: (row_brightness[row], -abs(row - nominal))
+            )
+            cuts.append(cut)
+            nominal = cut + tile_height
+        cuts.append(height)
+        
+        tiles = []
+        for band_top, band_bottom in zip(cuts, cuts[1:]):
+            top = max(0, band_top - overlap)
+            bottom = min(height, band_bottom + overlap)
+            tiles.append(((0, top, width, bottom), (band_top - top, band_bottom - top)))
+        return tiles
+
+    def _stitch_tile_passes(self, config, tile_passes):
+        """Join tile texts in reading order and combine their confidence stats"""
+        word_count = sum(tile_pass['word_count'] for tile_pass in tile_passes)
+        confidence_total = sum(tile_pass['mean_confidence'] * tile_pass['word_count'] for tile_pass in tile_passes)
+        
+        return {
+            'config': config,
+            'text': '\n'.join(tile_pass['text'] for tile_pass in tile_passes if tile_pass['text']),
+            'lines': [line for tile_pass in tile_passes for line in tile_pass['lines']],
+            'mean_confidence': round(confidence_total / word_count, 2) if word_count else 0.0,
+            'word_count': word_count
+        }
+
+    def _pass_score(self, ocr_pass):
+        """Medical text score of a pass, computed on first use and kept with the pass"""
+        if 'score' not in ocr_pass:
+            ocr_pass['score'] = self.text_scorer.score(ocr_pass['text'])
+        return ocr_pass['score']
+
+    def _pick_better_pass(self, new_pass, current_pass):
+        """Return whichever OCR pass has the better medical text"""
+        if not new_pass['text']:
+            return current_pass
+        
+        current_score = self._pass_score(current_pass) if current_pass and current_pass['text'] else None
+        if self._is_better_medical_text(self._pass_score(new_pass), current_score):
+            print(f"🔍 OCR: Better result with config: {new_pass['config']}")
+            return new_pass
+        
+        return current_pass
+
+    def _meets_early_exit(self, ocr_pass):
+        """Check whether a pass is confident and medical enough to skip the remaining configs"""
+        if not ocr_pass['text'] or ocr_pass['mean_confidence'] < self.early_exit_confidence:
+            return False
+        
+        return self._pass_score(ocr_pass)['keyword_score'] >= self.early_exit_min_keywords
+
+    def _get_pool(self):
+        """Get or create the shared OCR worker pool"""
+        with OCRAgent._pool_lock:
+            if OCRAgent._pool is None:
+                # Workers are separate processes, so a runaway page is killed at its deadline
+                # instead of pinning the web worker, and its memory is capped
+                OCRAgent._pool = OCRWorkerPool(
+                    workers=self.pool_size,
+                    memory_limit_mb=Config.OCR_WORKER_MEMORY_MB,
+                    job_timeout=self.config_timeout + Config.OCR_WORKER_DEADLINE_GRACE,
+                    max_jobs_per_worker=Config.OCR_WORKER_MAX_JOBS
+                )
+                print(f"🔍 OCR: Started worker pool with {self.pool_size} workers")
+            return OCRAgent._pool
+
+    def worker_stats(self):
+        """Counters of the shared OCR worker pool, or None before it has started"""
+        pool = OCRAgent._pool
+        return pool.stats() if pool else None
+
+    def _is_better_medical_text(self, new_score, current_score):
+        """Determine if new text is better for medical analysis, given both texts' scores"""
+        if not current_score:
+            return True
+        
+        if new_score['length'] < 10:  # Too short
+            return False
         
         # Prefer text with more medical keywords, numbers, and reasonable length
-        if new_score > current_score:
+        if new_score['keyword_score'] > current_score['keyword_score']:
             return True
-        elif new_score == current_score:
-            if new_has_numbers and not current_has_numbers:
+        elif new_score['keyword_score'] == current_score['keyword_score']:
+            if new_score['has_numbers'] and not current_score['has_numbers']:
                 return True
-            elif len(new_text) > len(current_text) * 1.2:  # Significantly longer
+            elif new_score['length'] > current_score['length'] * 1.2:  # Significantly longer
                 return True
         
         return False
@@ -166,17 +1360,13 @@ class OCRAgent:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Fix common OCR errors in medical context
-        text = re.sub(r'(\d)\s+(\d)', r'\1\2', text)  # Fix split numbers
-        text = re.sub(r'(\d)\s*\.\s*(\d)', r'\1.\2', text)  # Fix decimal points
-        text = re.sub(r'(\d)\s*/\s*(\d)', r'\1/\2', text)  # Fix ratios like blood pressure
+        # Remove excessive whitespace; line breaks stay, they separate one test's row from the next
+        text = re.sub(r'[ \t]+', ' ', text)
         
-        # Clean up common OCR mistakes
-        text = text.replace('|', 'I')  # Common mistake
-        text = text.replace('0', 'O')  # In some contexts
+        # Fix common OCR errors in medical context, within a line
+        text = SPLIT_NUMBER_RE.sub(r'\1', text)  # Fix split numbers
+        text = re.sub(r'(\d)[ \t]*\.[ \t]*(\d)', r'\1.\2', text)  # Fix decimal points
+        text = re.sub(r'(\d)[ \t]*/[ \t]*(\d)', r'\1/\2', text)  # Fix ratios like blood pressure
         
         # Remove extra line breaks but preserve structure
         text = re.sub(r'\n\s*\n', '\n\n', text)  # Multiple line breaks to double
@@ -184,30 +1374,10 @@ class OCRAgent:
         
         return text.strip()
 
-    def _contains_medical_content(self, text):
-        """Check if text contains medical content"""
-        if not text:
+    def _contains_medical_content(self, score):
+        """Check if scored text contains medical content"""
+        if not score['length']:
             return False
         
-        text_lower = text.lower()
-        
-        # Medical indicators
-        medical_indicators = [
-            'blood', 'sugar', 'glucose', 'cholesterol', 'pressure', 'hemoglobin',
-            'test', 'result', 'level', 'patient', 'report', 'analysis',
-            'mg/dl', 'mmhg', 'normal', 'high', 'low', 'date', 'value',
-            'creatinine', 'urea', 'triglycerides', 'hdl', 'ldl'
-        ]
-        
-        # Check for medical terms
-        medical_term_count = sum(1 for term in medical_indicators if term in text_lower)
-        
-        # Check for numbers (important in medical reports)
-        has_numbers = bool(re.search(r'\d+', text))
-        
-        # Check for medical units
-        medical_units = ['mg/dl', 'mmhg', 'mg', 'ml', 'units', '%', 'g/dl']
-        has_medical_units = any(unit in text_lower for unit in medical_units)
-        
         # Consider it medical content if it has medical terms + numbers or medical units
-        return (medical_term_count >= 2 and has_numbers) or has_medical_units
+        return (score['content_terms'] >= 2 and score['has_numbers']) or score['has_units']
@@ -1,10 +1,13 @@
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
 from agents.ocr_agent import OCRAgent
 from agents.medicalanalyser_agent import MedicalAnalyzerAgent
 from agents.translation_agent import TranslationAgent
 from agents.voice_agent import VoiceAgent
 from utils.language_detector import LanguageDetector
+from utils.report_jobs import ReportJobStore
 
 class OrchestratorAgent:
     def __init__(self):
@@ -13,6 +16,13 @@ class OrchestratorAgent:
         self.translation_agent = TranslationAgent()
         self.voice_agent = VoiceAgent()
         self.language_detector = LanguageDetector()
+        # Progressive reports finish their full-resolution pass here after the preliminary result is returned
+        self.report_jobs = ReportJobStore(
+            os.path.join(Config.OCR_STATE_DIR, 'report_jobs.db'), ttl_seconds=Config.REPORT_JOB_TTL
+        )
+        self.background_executor = ThreadPoolExecutor(
+            max_workers=Config.REPORT_JOB_WORKERS, thread_name_prefix='report-job'
+        )
     
     def process_medical_report(self, image_path, user_language='en-IN', audio_language='hi-IN'):
         """Process medical report with improved content flow for voice synthesis"""
@@ -22,23 +32,39 @@ class OrchestratorAgent:
             print(f"User language: {user_language}")
             print(f"Audio language: {audio_language}")
             
-            # Step 1: Extract text from image
-            print("Extracting text from image...")
-            ocr_result = self.ocr_agent.extract_text_from_image(image_path)
-            print(f"OCR result: {ocr_result.get('success', False)}")
+            # Step 1: Extract text from image (multi-page uploads stream pages into the analyzer)
+            image_paths = list(image_path) if isinstance(image_path, (list, tuple)) else [image_path]
+            analysis_result = None
+            ocr_result = None
+            layout = None
             
-            if not ocr_result.get('success'):
-                return {
-                    'success': False,
-                    'error': 'Failed to extract text from image'
-                }
-            
-            extracted_text = ocr_result.get('text', '')
-            if not extracted_text.strip():
-                return {
-                    'success': False,
-                    'error': 'No text found in the image'
-                }
+            if len(image_paths) > 1 or self.ocr_agent.count_pages(image_paths[0]) > 1:
+                print("Extracting text page by page...")
+                extracted_text, analysis_result = self._process_pages(image_paths)
+                if not extracted_text.strip():
+                    return {
+                        'success': False,
+                        'error': 'Failed to extract text from image'
+                    }
+            else:
+                print("Extracting text from image...")
+                ocr_result = self.ocr_agent.extract_text_from_image(image_paths[0])
+                print(f"OCR result: {ocr_result.get('success', False)}")
+                
+                if not ocr_result.get('success'):
+                    return {
+                        'success': False,
+                        # Triage rejections carry a message telling the user how to retake the photo
+                        'error': ocr_result['error'] if ocr_result.get('rejection_reason') else 'Failed to extract text from image'
+                    }
+                
+                extracted_text = ocr_result.get('text', '')
+                if not extracted_text.strip():
+                    return {
+                        'success': False,
+                        'error': 'No text found in the image'
+                    }
+                layout = ocr_result.get('layout')
             
             # Step 2: Detect language using instance method
             detected_language = self.language_detector.detect_language(extracted_text)
@@ -48,10 +74,12 @@ class OrchestratorAgent:
             print(f"Final languages - User: {user_language}, Audio: {audio_language}")
             
             # Step 3: Analyze medical data (ALWAYS in English first)
-            print("Analyzing medical data...")
-            analysis_result = self.medical_agent.analyze_report(
-                extracted_text, 'en-IN'  # CHANGED: Always analyze in English first
-            )
+            if analysis_result is None:
+                print("Analyzing medical data...")
+                analysis_result = self.medical_agent.analyze_report(
+                    {'success': True, 'cleaned_text': extracted_text, 'layout': layout},
+                    'en-IN'  # CHANGED: Always analyze in English first
+                )
             print(f"Analysis result: {analysis_result.get('success', False)}")
             
             if not analysis_result.get('success'):
@@ -60,6 +88,15 @@ class OrchestratorAgent:
                     'error': 'Failed to analyze medical report'
                 }
             
+            # Freshly parsed rows teach the OCR agent this lab's layout (cached reads would count twice)
+            if ocr_result and ocr_result.get('cache') == 'miss':
+                try:
+                    self.ocr_agent.learn_template(
+                        ocr_result, analysis_result.get('structured_data', {}).get('test_results', [])
+                    )
+                except Exception as e:
+                    print(f"Lab template learning failed: {e}")
+            
             # Step 4: Generate audio response (VoiceAgent handles translation internally)
             print(f"Generating voice response in {audio_language}...")
             audio_file = None
@@ -81,35 +118,7 @@ class OrchestratorAgent:
                 audio_file = None
             
             # Step 5: Generate text response - FIXED TRANSLATION LOGIC
-            print(f"Generating text response in {user_language}...")
-            if user_language == 'en-IN':
-                # Use English analysis directly for text
-                text_response = self._generate_text_response(analysis_result, user_language)
-                final_analysis = analysis_result
-            else:
-                # FIXED: Properly translate the analysis data
-                print(f"🔍 Translating analysis for UI display using VoiceAgent...")
-                translated_analysis = self.voice_agent.translate_analysis_for_display(
-                    analysis_result, user_language
-                )
-                
-                # ADDITIONAL FIX: Translate recommendations separately if they're still in English
-                if 'recommendations' in translated_analysis:
-                    translated_recommendations = []
-                    for rec in translated_analysis['recommendations']:
-                        if self._is_english_text(rec):
-                            translated_rec = self._translate_text_with_voice_agent(rec, user_language)
-                            translated_recommendations.append(translated_rec)
-                        else:
-                            translated_recommendations.append(rec)
-                    translated_analysis['recommendations'] = translated_recommendations
-                
-                text_response = self._generate_text_response(translated_analysis, user_language)
-                final_analysis = translated_analysis
-                
-                # FIXED: Debug with only the language parameter
-                print(f"🔍 Running translation debug for language: {user_language}")
-                self.voice_agent.debug_translation_status(user_language)
+            final_analysis, text_response = self._localize_analysis(analysis_result, user_language)
             
             return {
                 'success': True,
@@ -130,6 +139,193 @@ class OrchestratorAgent:
                 'error': f'Processing failed: {str(e)}'
             }
 
+    def start_progressive_report(self, image_path, user_language='en-IN', audio_language='hi-IN', on_complete=None):
+        """Return a preliminary result from a fast low-resolution OCR pass and finish the full pass in the background
+        
+        The returned job id looks up both results with get_report_job. on_complete is
+        called once the image is no longer needed, e.g. to delete an uploaded temp file.
+        """
+        image_paths = list(image_path) if isinstance(image_path, (list, tuple)) else [image_path]
+        preview_ocr = None
+        if len(image_paths) == 1 and self.ocr_agent.count_pages(image_paths[0]) == 1:
+            preview_ocr = self.ocr_agent.extract_text_preview(image_paths[0])
+            
+            if preview_ocr.get('rejection_reason'):
+                self._run_callback(on_complete)
+                return {'success': False, 'error': preview_ocr['error']}
+        
+        if preview_ocr is None or preview_ocr.get('resolution') == 'full':
+            # Multi-page uploads and already-cached reports have no cheaper first pass to offer
+            print("Progressive mode: running the full pass directly")
+            try:
+                result = self.process_medical_report(image_path, user_language, audio_language)
+            finally:
+                self._run_callback(on_complete)
+            if not result['success']:
+                return result
+            job_id = self.report_jobs.create(None)
+            self.report_jobs.finish(job_id, result, superseded=True)
+            return dict(self.report_jobs.get(job_id), success=True)
+        
+        preliminary = self._preliminary_report(preview_ocr, user_language, audio_language)
+        job_id = self.report_jobs.create(preliminary)
+        job = self.report_jobs.get(job_id)
+        print(f"Progressive mode: preliminary result ready, full pass queued as job {job_id}")
+        self.background_executor.submit(
+            self._finish_progressive_report, job_id, image_path, user_language, audio_language, on_complete
+        )
+        return dict(job, success=True)
+
+    def get_report_job(self, job_id):
+        """Preliminary and final results of a progressive report, or None for an unknown job"""
+        return self.report_jobs.get(job_id)
+
+    def _preliminary_report(self, preview_ocr, user_language, audio_language):
+        """Analyze preview OCR text without audio, or None if the preview could not be analyzed"""
+        try:
+            if not preview_ocr.get('success') or not preview_ocr.get('text', '').strip():
+                print(f"Preview OCR gave no text: {preview_ocr.get('error')}")
+                return None
+            
+            extracted_text = preview_ocr['text']
+            detected_language = self.language_detector.detect_language(extracted_text)
+            analysis_result = self.medical_agent.analyze_report(
+                {'success': True, 'cleaned_text': extracted_text, 'layout': preview_ocr.get('layout')},
+                'en-IN'
+            )
+            if not analysis_result.get('success'):
+                return None
+            
+            final_analysis, text_response = self._localize_analysis(analysis_result, user_language)
+            return {
+                'success': True,
+                'detected_language': detected_language,
+                'language_name': self.language_detector.get_language_name(detected_language),
+                'analysis': final_analysis,
+                'audio_file': None,  # Speech is only generated for the full-resolution result
+                'audio_language': audio_language,
+                'text_response': text_response,
+                'resolution': 'preview'
+            }
+            
+        except Exception as e:
+            print(f"❌ Error building preliminary result: {e}")
+            return None
+
+    def _finish_progressive_report(self, job_id, image_path, user_language, audio_language, on_complete):
+        """Background half of a progressive report: full pipeline, then compare with the preliminary result"""
+        try:
+            result = self.process_medical_report(image_path, user_language, audio_language)
+            if not result['success']:
+                self.report_jobs.fail(job_id, result.get('error', 'Report processing failed'))
+                return
+            
+            job = self.report_jobs.get(job_id)
+            superseded = self._differs_materially(job and job['preliminary'], result)
+            print(f"Progressive job {job_id} finished, supersedes preliminary result: {superseded}")
+            self.report_jobs.finish(job_id, result, superseded)
+        except Exception as e:
+            print(f"❌ Error in progressive job {job_id}: {e}")
+            self.report_jobs.fail(job_id, f'Processing failed: {str(e)}')
+        finally:
+            self._run_callback(on_complete)
+
+    def _differs_materially(self, preliminary, final):
+        """Whether the full-resolution result reports different tests or values than the preliminary one"""
+        if not preliminary:
+            return True
+        
+        preliminary_tests = self._test_values(preliminary)
+        final_tests = self._test_values(final)
+        if preliminary_tests.keys() != final_tests.keys():
+            return True
+        
+        for name, final_value in final_tests.items():
+            preliminary_value = preliminary_tests[name]
+            if isinstance(final_value, float) and isinstance(preliminary_value, float):
+                tolerance = Config.OCR_PROGRESSIVE_VALUE_TOLERANCE * max(abs(final_value), abs(preliminary_value))
+                if abs(final_value - preliminary_value) > tolerance:
+                    return True
+            elif final_value != preliminary_value:
+                return True
+        return False
+
+    def _test_values(self, result):
+        """Test name -> value of a report result, as floats where the value parses"""
+        tests = result.get('analysis', {}).get('structured_data', {}).get('test_results', [])
+        values = {}
+        for test in tests:
+            # Values were parsed once at extraction; BP pairs and unparsed values compare as printed
+            if test.get('number') is not None and test.get('second_number') is None:
+                values[test['name'].lower()] = test['number']
+            else:
+                values[test['name'].lower()] = str(test.get('value', '')).strip()
+        return values
+
+    def _run_callback(self, callback):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            print(f"Progressive report cleanup failed: {e}")
+
+    def _localize_analysis(self, analysis_result, user_language):
+        """Analysis translated for UI display and its text response, in the user's language"""
+        print(f"Generating text response in {user_language}...")
+        if user_language == 'en-IN':
+            # Use English analysis directly for text
+            text_response = self._generate_text_response(analysis_result, user_language)
+            final_analysis = analysis_result
+        else:
+            # FIXED: Properly translate the analysis data
+            print(f"🔍 Translating analysis for UI display using VoiceAgent...")
+            translated_analysis = self.voice_agent.translate_analysis_for_display(
+                analysis_result, user_language
+            )
+            
+            # ADDITIONAL FIX: Translate recommendations separately if they're still in English
+            if 'recommendations' in translated_analysis:
+                translated_recommendations = []
+                for rec in translated_analysis['recommendations']:
+                    if self._is_english_text(rec):
+                        translated_rec = self._translate_text_with_voice_agent(rec, user_language)
+                        translated_recommendations.append(translated_rec)
+                    else:
+                        translated_recommendations.append(rec)
+                translated_analysis['recommendations'] = translated_recommendations
+            
+            text_response = self._generate_text_response(translated_analysis, user_language)
+            final_analysis = translated_analysis
+            
+            # FIXED: Debug with only the language parameter
+            print(f"🔍 Running translation debug for language: {user_language}")
+            self.voice_agent.debug_translation_status(user_language)
+        
+        return final_analysis, text_response
+
+    def _process_pages(self, image_paths):
+        """OCR all pages concurrently, feeding each page's text to the analyzer as soon as it completes"""
+        page_texts = {}
+        
+        def completed_pages():
+            for page_index, page_result in self.ocr_agent.iter_page_results(image_paths):
+                print(f"Page {page_index + 1} OCR result: {page_result.get('success', False)}")
+                if page_result.get('success') and page_result.get('text', '').strip():
+                    page_texts[page_index] = page_result['text']
+                    yield page_index, {
+                        'success': True,
+                        'cleaned_text': page_result['text'],
+                        'layout': page_result.get('layout')
+                    }
+                else:
+                    yield page_index, page_result
+        
+        # Analyze in English first, same as single-page reports
+        analysis_result = self.medical_agent.analyze_pages(completed_pages(), 'en-IN')
+        extracted_text = '\n\n'.join(page_texts[index] for index in sorted(page_texts))
+        return extracted_text, analysis_result
+
     def process_medical_report_with_email(self, image_path, user_language='en-IN', audio_language='hi-IN', 
                                          generate_email=True, patient_info=None):
         """Process medical report and optionally generate doctor consultation email"""
@@ -15,7 +15,10 @@ app = Flask(__name__)
 Config.init_app(app)  # Initialize directories and settings
 app.config.from_object(Config)
 
-orchestrator = OrchestratorAgent()
+# OCR worker processes are spawned, so they re-import this file as __mp_main__ when the
+# app is started with `python app.py`; only the web process builds the agents
+if __name__ != '__mp_main__':
+    orchestrator = OrchestratorAgent()
 
 # Add processing files tracking to prevent duplicates
 processing_files = set()
@@ -29,6 +32,72 @@ def get_ui_text(key):
     selected_lang = get_selected_language()
     return UI_TRANSLATIONS.get(selected_lang, UI_TRANSLATIONS['hi-IN']).get(key, key)
 
+def build_audio_url(result):
+    """Browser URL of a result's audio file, copying it into static/audio if needed"""
+    audio_url = None
+    
+    # Enhanced audio file handling with proper URL generation
+    if result.get('audio_file'):
+        print(f"Audio file path from orchestrator: {result['audio_file']}")
+        print(f"Audio file exists: {os.path.exists(result['audio_file'])}")
+        
+        if os.path.exists(result['audio_file']):
+            file_size = os.path.getsize(result['audio_file'])
+            print(f"Audio file size: {file_size} bytes")
+            
+            if file_size > 0:
+                # Extract just the filename from the full path
+                audio_filename = os.path.basename(result['audio_file'])
+                print(f"Audio filename: {audio_filename}")
+                
+                # Create the URL that the browser can access
+                audio_url = f'/static/audio/{audio_filename}'
+                print(f"Audio URL created: {audio_url}")
+                
+                # Verify the file is actually in the static directory
+                static_audio_path = os.path.join(app.root_path, 'static', 'audio', audio_filename)
+                print(f"Expected static path: {static_audio_path}")
+                print(f"Static file exists: {os.path.exists(static_audio_path)}")
+                
+                # If the file is not in static directory, copy it there
+                if not os.path.exists(static_audio_path):
+                    print("Copying audio file to static directory...")
+                    os.makedirs(os.path.dirname(static_audio_path), exist_ok=True)
+                    shutil.copy2(result['audio_file'], static_audio_path)
+                    print(f"Audio file copied to: {static_audio_path}")
+            else:
+                print("Audio file is empty")
+        else:
+            print(f"Audio file does not exist: {result['audio_file']}")
+    else:
+        print("No audio_file in result")
+    
+    return audio_url
+
+def build_report_response(result):
+    """JSON fields the frontend shows for one successful report result"""
+    return {
+        'success': True,
+        'detected_language': result.get('detected_language'),
+        'language_name': result.get('language_name'),
+        'text_response': result.get('text_response', ''),
+        'audio_url': build_audio_url(result),
+        'language': result.get('audio_language'),  # UI and audio share one language
+        'resolution': result.get('resolution', 'full')
+    }
+
+def build_job_response(job):
+    """Both results of a progressive report job; 'superseded' tells the client to replace the preliminary one"""
+    return {
+        'success': True,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'preliminary': build_report_response(job['preliminary']) if job['preliminary'] else None,
+        'final': build_report_response(job['final']) if job['final'] else None,
+        'superseded': job['superseded'],
+        'error': job['error']
+    }
+
 # Enhanced web interface with email functionality
 WEB_INTERFACE = """
 <!DOCTYPE html>
@@ -771,35 +840,41 @@ def analyze_report():
             error_msg = UI_TRANSLATIONS[selected_lang].get('no_file_error', 'No image uploaded')
             return jsonify({'success': False, 'error': error_msg})
         
-        file = request.files['image']
-        print(f"File object: {file}")
-        print(f"Filename: {file.filename}")
+        # Several images in one upload are pages of the same report
+        files = request.files.getlist('image')
+        print(f"File objects: {files}")
+        print(f"Filenames: {[f.filename for f in files]}")
         
-        if file.filename == '':
+        if any(f.filename == '' for f in files):
             print("ERROR: Empty filename")
             selected_lang = get_selected_language()
             error_msg = UI_TRANSLATIONS[selected_lang].get('no_file_error', 'No file selected')
             return jsonify({'success': False, 'error': error_msg})
         
         # Read file content
-        file_content = file.read()
-        file.seek(0)  # Reset file pointer
+        file_contents = []
+        for f in files:
+            file_contents.append(f.read())
+            f.seek(0)  # Reset file pointer
         
-        print(f"File content length: {len(file_content)} bytes")
+        print(f"File content lengths: {[len(content) for content in file_contents]} bytes")
         
-        if len(file_content) == 0:
+        if any(len(content) == 0 for content in file_contents):
             selected_lang = get_selected_language()
             error_msg = UI_TRANSLATIONS[selected_lang].get('empty_file', 'Empty file uploaded')
             return jsonify({'success': False, 'error': error_msg})
         
         # Check file size
-        if len(file_content) > app.config['MAX_CONTENT_LENGTH']:
+        if sum(len(content) for content in file_contents) > app.config['MAX_CONTENT_LENGTH']:
             selected_lang = get_selected_language()
             error_msg = UI_TRANSLATIONS[selected_lang].get('file_too_large', 'File too large')
             return jsonify({'success': False, 'error': error_msg})
         
         # Create file hash for duplicate prevention
-        file_hash = hashlib.md5(file_content).hexdigest()
+        upload_hash = hashlib.md5()
+        for content in file_contents:
+            upload_hash.update(content)
+        file_hash = upload_hash.hexdigest()
         
         if file_hash in processing_files:
             selected_lang = get_selected_language()
@@ -817,70 +892,58 @@ def analyze_report():
             
             # Validate file type
             allowed_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
-            file_ext = os.path.splitext(file.filename)[1].lower()
-            if file_ext not in allowed_extensions:
+            file_exts = [os.path.splitext(f.filename)[1].lower() for f in files]
+            if any(file_ext not in allowed_extensions for file_ext in file_exts):
                 selected_lang = get_selected_language()
                 error_msg = UI_TRANSLATIONS[selected_lang].get('invalid_file', 'Please upload only image files')
                 return jsonify({'success': False, 'error': error_msg})
             
-            # Save file temporarily
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
-            temp_file.write(file_content)
-            temp_file.close()
+            # Save files temporarily
+            temp_paths = []
+            for content, file_ext in zip(file_contents, file_exts):
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
+                temp_file.write(content)
+                temp_file.close()
+                temp_paths.append(temp_file.name)
+            
+            print(f"Temporary files saved: {temp_paths}")
             
-            print(f"Temporary file saved: {temp_file.name}")
+            # Progressive mode answers from a fast low-resolution pass; the full result is polled for
+            if request.form.get('progressive', 'false').lower() == 'true':
+                def remove_temp_files():
+                    for temp_path in temp_paths:
+                        os.unlink(temp_path)
+                    print("Temporary files cleaned up")
+                
+                job = orchestrator.start_progressive_report(
+                    temp_paths if len(temp_paths) > 1 else temp_paths[0],
+                    user_language=selected_language,
+                    audio_language=selected_language,
+                    on_complete=remove_temp_files
+                )
+                if not job['success']:
+                    return jsonify({
+                        'success': False,
+                        'error': job.get('error', 'Report processing failed')
+                    })
+                return jsonify(build_job_response(job))
             
             # Process with the same language for both text and audio
             result = orchestrator.process_medical_report(
-                temp_file.name, 
+                temp_paths if len(temp_paths) > 1 else temp_paths[0], 
                 user_language=selected_language,    # Same language for UI text
                 audio_language=selected_language    # Same language for audio
             )
             
             # Clean up
-            os.unlink(temp_file.name)
-            print("Temporary file cleaned up")
+            for temp_path in temp_paths:
+                os.unlink(temp_path)
+            print("Temporary files cleaned up")
             
             print(f"Processing result: {result}")
             
             if result['success']:
-                audio_url = None
-                
-                # Enhanced audio file handling with proper URL generation
-                if result.get('audio_file'):
-                    print(f"Audio file path from orchestrator: {result['audio_file']}")
-                    print(f"Audio file exists: {os.path.exists(result['audio_file'])}")
-                    
-                    if os.path.exists(result['audio_file']):
-                        file_size = os.path.getsize(result['audio_file'])
-                        print(f"Audio file size: {file_size} bytes")
-                        
-                        if file_size > 0:
-                            # Extract just the filename from the full path
-                            audio_filename = os.path.basename(result['audio_file'])
-                            print(f"Audio filename: {audio_filename}")
-                            
-                            # Create the URL that the browser can access
-                            audio_url = f'/static/audio/{audio_filename}'
-                            print(f"Audio URL created: {audio_url}")
-                            
-                            # Verify the file is actually in the static directory
-                            static_audio_path = os.path.join(app.root_path, 'static', 'audio', audio_filename)
-                            print(f"Expected static path: {static_audio_path}")
-                            print(f"Static file exists: {os.path.exists(static_audio_path)}")
-                            
-                            # If the file is not in static directory, copy it there
-                            if not os.path.exists(static_audio_path):
-                                print("Copying audio file to static directory...")
-                                os.makedirs(os.path.dirname(static_audio_path), exist_ok=True)
-                                shutil.copy2(result['audio_file'], static_audio_path)
-                                print(f"Audio file copied to: {static_audio_path}")
-                        else:
-                            print("Audio file is empty")
-                    else:
-                        print(f"Audio file does not exist: {result['audio_file']}")
-                else:
-                    print("No audio_file in result")
+                audio_url = build_audio_url(result)
                 
                 print(f"Final audio_url being sent to frontend: {audio_url}")
                 
@@ -910,6 +973,14 @@ def analyze_report():
             'error': f'System error: {str(e)}'
         })
 
+@app.route('/analyze/result/<job_id>')
+def analyze_result(job_id):
+    """Preliminary and full-resolution results of a progressive analysis"""
+    job = orchestrator.get_report_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+    return jsonify(build_job_response(job))
+
 @app.route('/analyze_with_email', methods=['POST'])
 def analyze_report_with_email():
     """Analyze medical report and generate doctor consultation email"""
@@ -1050,10 +1121,14 @@ def debug_audio():
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
+    ocr_cache = orchestrator.ocr_agent.result_cache
     return jsonify({
         'status': 'healthy',
         'service': 'Swasthya Saathi Lite',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'ocr_cache': ocr_cache.stats() if ocr_cache else None,
+        'ocr_workers': orchestrator.ocr_agent.worker_stats(),
+        'report_jobs': orchestrator.report_jobs.stats()
     })
 
 if __name__ == '__main__':
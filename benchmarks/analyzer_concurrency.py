@@ -0,0 +1,125 @@
+"""Stress one shared MedicalAnalyzerAgent with concurrent analyses in mixed languages
+
+Every request gets a report with its own values and its own target language. A
+stand-in translator tags each translated sentence with the language it was asked
+for and sleeps a little so threads interleave mid-analysis. Afterwards every
+result is checked for another request's language tag or test values, and must
+equal the result of analyzing the same report alone on one thread.
+
+    python benchmarks/analyzer_concurrency.py --requests 400 --threads 32
+"""
+import io
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.medicalanalyser_agent import MedicalAnalyzerAgent
+
+LANGUAGES = ['en-IN', 'hi-IN', 'ta-IN', 'bn-IN', 'te-IN', 'mr-IN']
+TAG_RE = re.compile(r'\[([a-z]{2}-IN)\]')
+
+
+class TaggingTranslator:
+    """Stands in for the Sarvam client: tags text with the target language and yields so threads interleave"""
+
+    def __init__(self, max_delay):
+        self.max_delay = max_delay
+
+    def translate(self, text, source_language_code='en-IN', target_language_code='hi-IN'):
+        time.sleep(random.uniform(0, self.max_delay))
+        return {'success': True, 'translated_text': f"[{target_language_code}] {text}"}
+
+
+def build_report(index):
+    """A report whose values are unique to this request, so a crossed-over result is recognisable"""
+    hemoglobin = f"{9 + (index % 700) / 100:.2f}"
+    glucose = str(150 + index)
+    sex = 'Female' if index % 2 else 'Male'
+    text = (
+        f"Patient Name: Request {index}\nSex: {sex}\n"
+        f"Hemoglobin {hemoglobin} g/dL\n"
+        f"Fasting Blood Sugar {glucose} mg/dL\n"
+        f"Total Cholesterol {210 + index % 50} mg/dL\n"
+        f"Vitamin K {index} ng/mL\n"
+    )
+    return text, {'Hemoglobin': hemoglobin, 'Fasting Blood Sugar': glucose}
+
+
+def check(index, language, expected_values, result):
+    """Problems found in one result; empty when it only holds its own language and values"""
+    problems = []
+    if not result.get('success'):
+        return [f"request {index}: analysis failed"]
+    if result.get('language') != language:
+        problems.append(f"request {index}: language {result.get('language')} instead of {language}")
+
+    output = ' '.join([result['comprehensive_analysis'], result['audio_summary']] + result['recommendations'])
+    tags = set(TAG_RE.findall(output))
+    if language == 'en-IN' and tags:
+        problems.append(f"request {index}: English result holds translations for {sorted(tags)}")
+    if language != 'en-IN' and tags != {language}:
+        problems.append(f"request {index}: {language} result holds translations for {sorted(tags)}")
+
+    values = {test['name']: test['value'] for test in result['structured_data']['test_results']}
+    for name, value in expected_values.items():
+        if values.get(name) != value:
+            problems.append(f"request {index}: {name} is {values.get(name)} instead of {value}")
+        if f"Your {name} is {value} " not in result['comprehensive_analysis']:
+            problems.append(f"request {index}: summary does not describe its own {name} {value}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--max-delay', type=float, default=0.002, help='Longest stand-in translation delay, seconds')
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--verbose', action='store_true', help="Keep the analyzer's progress output")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    agent = MedicalAnalyzerAgent()
+    agent.sarvam_client = TaggingTranslator(args.max_delay)
+
+    jobs = []
+    for index in range(args.requests):
+        text, expected_values = build_report(index)
+        jobs.append((index, random.choice(LANGUAGES), text, expected_values))
+
+    def run(job):
+        index, language, text, _ = job
+        return agent.analyze_report(text, language)
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with output, ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(run, jobs))
+    elapsed = time.perf_counter() - start
+
+    # The translator is deterministic, so a serial run is the reference every threaded result must match
+    with output:
+        serial_results = [run(job) for job in jobs]
+
+    problems = []
+    for (index, language, _, expected_values), result, serial_result in zip(jobs, results, serial_results):
+        problems.extend(check(index, language, expected_values, result))
+        if result != serial_result:
+            problems.append(f"request {index}: threaded result differs from the serial one")
+
+    print(f"{args.requests} analyses on {args.threads} threads in {elapsed:.2f}s "
+          f"({args.requests / elapsed:.0f}/s), {len(problems)} crossed-over or wrong results")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Time MedicalAnalyzerAgent.analyze_many against analyzing archived report texts one call at a time
+
+Builds a synthetic archive of English report texts and analyzes it three ways: one
+analyze_report call per text with its progress output, analyze_many in this
+process, and analyze_many across a process pool. It also checks that every mode
+yields the same analyses in input order.
+
+    python benchmarks/batch_analysis.py --reports 5000 --processes 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.medicalanalyser_agent import MedicalAnalyzerAgent
+
+ROWS = [
+    ('Hemoglobin', 'g/dL', 8.0, 18.0), ('Fasting Blood Sugar', 'mg/dL', 60, 260), ('HbA1c', '%', 4.5, 10.0),
+    ('Total Cholesterol', 'mg/dL', 120, 300), ('HDL Cholesterol', 'mg/dL', 25, 80), ('Triglycerides', 'mg/dL', 60, 600),
+    ('Serum Creatinine', 'mg/dL', 0.4, 3.0), ('TSH', 'uIU/mL', 0.05, 15.0), ('Vitamin D', 'ng/mL', 8, 60),
+    ('Platelet Count', '/cumm', 100000, 450000), ('ESR', 'mm/hr', 2, 60)
+]
+
+
+def build_archive(reports, seed):
+    rng = random.Random(seed)
+    archive = []
+    for index in range(reports):
+        lines = [f"Patient Name: Archive {index}", f"Age: {rng.randint(5, 85)} Years  Sex: {rng.choice(['Male', 'Female'])}"]
+        for name, unit, low, high in rng.sample(ROWS, rng.randint(4, len(ROWS))):
+            value = rng.uniform(low, high)
+            printed = f"{value:,.0f}" if value >= 1000 else f"{value:.1f}"
+            lines.append(f"{name} {printed} {unit}")
+        if rng.random() < 0.3:
+            lines.append(f"Blood Pressure {rng.randint(100, 170)}/{rng.randint(60, 105)} mmHg")
+        archive.append('\n'.join(lines))
+    return archive
+
+
+def timed(label, fn, reports):
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s {reports / elapsed:9.0f} reports/s")
+    return results
+
+
+def fingerprint(result):
+    return result['summary'], [(test['name'], test['value'], test['band']) for test in result['structured_data']['test_results']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=5000)
+    parser.add_argument('--processes', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--chunksize', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    archive = build_archive(args.reports, args.seed)
+    agent = MedicalAnalyzerAgent()
+
+    def one_at_a_time():
+        # The progress lines still cost formatting and writes even when nobody reads them
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return [agent.analyze_report(text, 'en-IN') for text in archive]
+
+    baseline = timed('analyze_report loop', one_at_a_time, args.reports)
+    serial = timed('analyze_many', lambda: list(agent.analyze_many(archive)), args.reports)
+    pooled = timed(f'analyze_many x{args.processes} processes',
+                   lambda: list(agent.analyze_many(iter(archive), processes=args.processes, chunksize=args.chunksize)),
+                   args.reports)
+
+    expected = [fingerprint(result) for result in baseline]
+    for label, results in (('analyze_many', serial), ('process pool', pooled)):
+        same = len(results) == len(expected) and all(fingerprint(result) == want for result, want in zip(results, expected))
+        print(f"{label} matches the one-at-a-time results in order: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark the OCR post-correction pass on a synthetic corpus of misread lab reports
+
+Each synthetic report is a list of analyte rows. Values get letters swapped in for
+digits (O/0, l/1, S/5) and names get digits swapped in for letters, the way
+Tesseract misreads them. The script times the corrector against the old blanket
+replace() cleanup and counts how many values and names each one gets right.
+A value whose first or last digit was misread as S stays wrong on purpose: it
+cannot be told apart from a seconds suffix ("13.5s") or a name such as S1.
+Fixed rows with known misreads (REGRESSION_CASES) are checked before timing.
+
+    python benchmarks/ocr_postcorrection.py --reports 20000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr_text_corrector import OCRTextCorrector
+
+ANALYTES = [
+    ('Hemoglobin', 'g/dL'), ('Fasting Blood Glucose', 'mg/dL'), ('HbA1c', '%'), ('Total Cholesterol', 'mg/dL'),
+    ('Triglycerides', 'mg/dL'), ('HDL Cholesterol', 'mg/dL'), ('LDL Cholesterol', 'mg/dL'), ('Creatinine', 'mg/dL'),
+    ('Blood Urea', 'mg/dL'), ('T3', 'ng/mL'), ('T4', 'ug/dL'), ('TSH', 'uIU/mL'), ('Vitamin B12', 'pg/mL'),
+    ('Vitamin D3', 'ng/mL'), ('Platelet Count', 'lakh/cumm'), ('Blood Pressure', 'mmHg')
+]
+
+# Rows the corrector once got wrong, with the text it must produce
+REGRESSION_CASES = [
+    # Table rules against a cell are borders, not a leading or trailing 1
+    ('Hemoglobin |12.5 |g/dL', 'Hemoglobin 12.5 g/dL'),
+    ('Hb 12.5| 13-17', 'Hb 12.5 13-17'),
+]
+
+DIGIT_MISREADS = {'0': 'O', '1': 'l', '5': 'S'}
+LETTER_MISREADS = {'o': '0', 'l': '1', 's': '5', 'O': '0', 'I': '1', 'S': '5'}
+
+
+def random_value(rng, analyte):
+    if analyte == 'Blood Pressure':
+        return f"{rng.randint(100, 160)}/{rng.randint(60, 100)}"
+    if rng.random() < 0.5:
+        return str(rng.randint(1, 500))
+    return f"{rng.uniform(0.1, 50):.1f}"
+
+
+def misread(text, table, rate, rng):
+    return ''.join(table[char] if char in table and rng.random() < rate else char for char in text)
+
+
+def build_corpus(reports, rows_per_report, rate, seed):
+    """Reports as (clean_rows, misread_text) pairs"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(reports):
+        clean_rows = []
+        lines = []
+        for name, unit in rng.sample(ANALYTES, rows_per_report):
+            value = random_value(rng, name)
+            clean_rows.append((name, value))
+            # Protected names such as HbA1c or T3 are printed as-is; their digits are real
+            shown_name = name if any(char.isdigit() for char in name) else misread(name, LETTER_MISREADS, rate / 4, rng)
+            lines.append(f"{shown_name}: {misread(value, DIGIT_MISREADS, rate, rng)} {unit}")
+        corpus.append((clean_rows, '\n'.join(lines)))
+    return corpus
+
+
+def legacy_cleanup(text):
+    """The cleanup the corrector replaced"""
+    return text.replace('|', 'I').replace('0', 'O')
+
+
+def score(corpus, outputs):
+    """Share of rows whose value and whose name came out exactly as printed"""
+    values_right = names_right = rows = 0
+    for (clean_rows, _), output in zip(corpus, outputs):
+        for (name, value), line in zip(clean_rows, output.split('\n')):
+            rows += 1
+            shown_name, _, rest = line.partition(': ')
+            names_right += shown_name == name
+            values_right += rest.split(' ')[0] == value
+    return values_right / float(rows), names_right / float(rows)
+
+
+def check_regressions(corrector):
+    """Regression rows the corrector gets wrong, as (input, expected, output)"""
+    failures = []
+    for text, expected in REGRESSION_CASES:
+        output = corrector.correct(text)
+        if output != expected:
+            failures.append((text, expected, output))
+    return failures
+
+
+def run(label, fn, corpus, repeat):
+    texts = [text for _, text in corpus]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [fn(text) for text in texts]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    megabytes = sum(len(text) for text in texts) / 1e6
+    value_accuracy, name_accuracy = score(corpus, outputs)
+    print(f"{label:<12} {best * 1000:9.1f} ms {megabytes / best:8.1f} MB/s "
+          f"values {value_accuracy:7.2%}  names {name_accuracy:7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=10)
+    parser.add_argument('--misread-rate', type=float, default=0.3, help='Chance each confusable digit is misread')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    corrector = OCRTextCorrector()
+    failures = check_regressions(corrector)
+    print(f"{len(REGRESSION_CASES)} regression rows, {len(failures)} corrected wrongly")
+    for text, expected, output in failures:
+        print(f"  {text!r} -> {output!r}, expected {expected!r}")
+    if failures:
+        return 1
+
+    corpus = build_corpus(args.reports, args.rows, args.misread_rate, args.seed)
+    print(f"{args.reports} reports, {args.reports * args.rows} rows, "
+          f"{sum(len(text) for _, text in corpus) / 1e6:.1f} MB of text")
+
+    run('none', lambda text: text, corpus, args.repeat)
+    run('legacy', legacy_cleanup, corpus, args.repeat)
+    run('corrector', corrector.correct, corpus, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Benchmark plain-text test extraction: the single-pass lexer against the old 11 regex passes
+
+The synthetic report repeats realistic rows (name, value, unit, reference range,
+headers and patient lines) until it reaches the requested size, then both
+extractors run over it. Besides time, the script reports how many results each
+returns, since the old passes reported most analytes two or three times.
+
+    python benchmarks/text_extraction.py --kilobytes 50 100 200 400
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.medicalanalyser_agent import MedicalAnalyzerAgent
+
+ROWS = [
+    'Blood Sugar (Fasting): {v} mg/dL 70-110',
+    'Hemoglobin (Hb) {v} g/dL (12.0 - 15.0)',
+    'HbA1c {v} %',
+    'Blood Pressure: {v}/80 mmHg',
+    'Total Cholesterol {v} mg/dl',
+    'HDL Cholesterol {v} mg/dL 40-60',
+    'Triglycerides {v} mg/dL',
+    'Serum Creatinine {v} mg/dL 0.6-1.2',
+    'TSH {v} uIU/mL',
+    'Vitamin B12 {v} pg/mL',
+    'Vitamin D {v} ng/mL',
+    'Ferritin {v} ng/mL',
+    'Platelet Count 1,{v},000 /cumm'
+]
+NOISE = [
+    'CITY DIAGNOSTICS LAB - DEPARTMENT OF BIOCHEMISTRY',
+    'Patient Name: Ram Kumar   Age: 45 Yrs   Sex: Male',
+    'Date: 12/05/2024   Page 1 of 2',
+    'Test Name Result Unit Reference Range',
+    'Method: Enzymatic | Sample: Serum'
+]
+
+# The extraction this benchmark was written against, kept verbatim for comparison
+LEGACY_PATTERNS = [
+    r'(blood\s+sugar|glucose|fasting\s+glucose|random\s+glucose)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
+    r'(cholesterol|total\s+cholesterol|ldl|hdl|triglycerides)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
+    r'(blood\s+pressure|bp|systolic|diastolic)\s*:?\s*([0-9]+/[0-9]+|[0-9]+)\s*(mmHg|mm\s+Hg)?',
+    r'(hemoglobin|hb|hgb)\s*:?\s*([0-9]+\.?[0-9]*)\s*(g/dL|g/dl|g%)?',
+    r'(creatinine|urea|bun)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mg/dL|mg/dl|mmol/L)?',
+    r'(hba1c|a1c|glycated\s+hemoglobin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(%)?',
+    r'(tsh|t3|t4|thyroid)\s*:?\s*([0-9]+\.?[0-9]*)\s*(mIU/L|ng/dL|pmol/L)?',
+    r'(vitamin\s+d|vit\s+d|25\s+oh\s+d)\s*:?\s*([0-9]+\.?[0-9]*)\s*(ng/mL|nmol/L)?',
+    r'(vitamin\s+b12|b12|cobalamin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(pg/mL|pmol/L)?',
+    r'(iron|ferritin|transferrin)\s*:?\s*([0-9]+\.?[0-9]*)\s*(ng/mL|μg/L|mg/L)?',
+    r'([A-Za-z][A-Za-z\s]{2,20})\s*:?\s*([0-9]+\.?[0-9]*)\s*([a-zA-Z/%μ]+)?'
+]
+
+
+def legacy_extract(text):
+    results = []
+    for pattern in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            test_name = match.group(1).strip()
+            unit = match.group(3).strip() if len(match.groups()) > 2 and match.group(3) else ""
+            if len(test_name) > 2 and not any(exclude in test_name.lower() for exclude in ['page', 'date', 'time', 'phone', 'address']):
+                results.append({'name': test_name, 'value': match.group(2).strip(), 'unit': unit, 'full_match': match.group(0)})
+    return results
+
+
+def build_text(kilobytes, seed):
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < kilobytes * 1024:
+        if rng.random() < 0.2:
+            line = rng.choice(NOISE)
+        else:
+            line = rng.choice(ROWS).format(v=rng.randint(10, 300))
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines), sum(1 for line in lines if line not in NOISE)
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kilobytes', type=int, nargs='+', default=[50, 100, 200, 400])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    agent = MedicalAnalyzerAgent()
+
+    def lexer_extract(text):
+        structured_data = {'test_results': [], 'reference_ranges': []}
+        agent._extract_tests_from_text(text, structured_data)
+        return structured_data['test_results']
+
+    print(f"{'size':>8} {'rows':>7} {'legacy ms':>10} {'results':>8} {'lexer ms':>9} {'results':>8} {'speedup':>8}")
+    for kilobytes in args.kilobytes:
+        text, rows = build_text(kilobytes, args.seed)
+        legacy_time, legacy_results = best_time(lambda: legacy_extract(text), args.repeat)
+        lexer_time, lexer_results = best_time(lambda: lexer_extract(text), args.repeat)
+        print(f"{kilobytes:>6}KB {rows:>7} {legacy_time * 1000:>10.1f} {len(legacy_results):>8} "
+              f"{lexer_time * 1000:>9.1f} {len(lexer_results):>8} {legacy_time / lexer_time:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
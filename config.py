@@ -10,6 +10,58 @@ class Config:
     TEMP_FOLDER = 'temp'
     STATIC_AUDIO_FOLDER = '/Users/nikhilnedungadi/Desktop/NIKHIL/projects/warpspeed/swasthbharat/static/audio'
     
+    # OCR engine settings
+    OCR_PARALLEL = os.environ.get('OCR_PARALLEL', 'true').lower() == 'true'
+    OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE', min(6, os.cpu_count() or 1)))
+    OCR_CONFIG_TIMEOUT = int(os.environ.get('OCR_CONFIG_TIMEOUT', 30))  # Seconds per Tesseract pass
+    OCR_WORKER_MEMORY_MB = int(os.environ.get('OCR_WORKER_MEMORY_MB', 1024))  # Address-space cap per OCR worker process (0 disables)
+    OCR_WORKER_DEADLINE_GRACE = int(os.environ.get('OCR_WORKER_DEADLINE_GRACE', 10))  # Seconds past the Tesseract timeout before a worker is killed
+    OCR_WORKER_MAX_JOBS = int(os.environ.get('OCR_WORKER_MAX_JOBS', 200))  # Jobs before a worker process is recycled (0 disables)
+    OCR_TILE_MIN_PIXELS = int(os.environ.get('OCR_TILE_MIN_PIXELS', 6000000))  # Pages this large are OCR'd as parallel tiles
+    OCR_TILE_HEIGHT = int(os.environ.get('OCR_TILE_HEIGHT', 1000))  # Pixels per tile before overlap
+    OCR_TILE_OVERLAP = int(os.environ.get('OCR_TILE_OVERLAP', 80))  # Pixels shared with each neighbouring tile
+    OCR_MAX_PAGES_IN_FLIGHT = int(os.environ.get('OCR_MAX_PAGES_IN_FLIGHT', 2))  # Pages decoded and OCR'd at the same time
+    OCR_EARLY_EXIT_CONFIDENCE = float(os.environ.get('OCR_EARLY_EXIT_CONFIDENCE', 85))  # Mean word confidence (0-100)
+    OCR_EARLY_EXIT_MIN_KEYWORDS = int(os.environ.get('OCR_EARLY_EXIT_MIN_KEYWORDS', 3))
+    OCR_PREPROCESS_STAGES = [
+        stage.strip() for stage in os.environ.get('OCR_PREPROCESS_STAGES', 'downscale,grayscale,deskew,binarize').split(',')
+        if stage.strip()
+    ]
+    OCR_LANGUAGE = os.environ.get('OCR_LANGUAGE', 'auto')  # Tesseract lang string, or 'auto' to pick it from the detected script
+    OCR_OSD_MAX_EDGE = int(os.environ.get('OCR_OSD_MAX_EDGE', 1600))  # Long edge of the copy used for script detection
+    OCR_SCRIPT_MIN_CONFIDENCE = float(os.environ.get('OCR_SCRIPT_MIN_CONFIDENCE', 2.0))  # Below this OSD script confidence, stay with eng
+    OCR_USER_VOCABULARY_ENABLED = os.environ.get('OCR_USER_VOCABULARY_ENABLED', 'true').lower() == 'true'  # Pass analyte words and value patterns to Tesseract
+    OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', 300))  # Resolution the page is normalised to before OCR
+    OCR_PREVIEW_DPI = int(os.environ.get('OCR_PREVIEW_DPI', 150))  # Resolution of the fast pass behind preliminary results
+    OCR_PROGRESSIVE_VALUE_TOLERANCE = float(os.environ.get('OCR_PROGRESSIVE_VALUE_TOLERANCE', 0.01))  # Relative value change that supersedes a preliminary result
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 1800))  # Seconds a progressive job's results stay available
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))  # Full-resolution passes running in the background at once
+    OCR_REFINE_ENABLED = os.environ.get('OCR_REFINE_ENABLED', 'true').lower() == 'true'
+    OCR_REFINE_WORD_CONFIDENCE = float(os.environ.get('OCR_REFINE_WORD_CONFIDENCE', 75))  # Numeric words below this are re-read
+    OCR_REFINE_MIN_PAGE_CONFIDENCE = float(os.environ.get('OCR_REFINE_MIN_PAGE_CONFIDENCE', 50))  # Pages below this are too poor to patch
+    OCR_REFINE_MAX_WORDS = int(os.environ.get('OCR_REFINE_MAX_WORDS', 12))  # Word crops re-read per page
+    OCR_REFINE_SCALE = int(os.environ.get('OCR_REFINE_SCALE', 3))  # Upscale factor for word crops
+    OCR_TEMPLATES_ENABLED = os.environ.get('OCR_TEMPLATES_ENABLED', 'true').lower() == 'true'
+    OCR_TEMPLATE_MAX_DISTANCE = int(os.environ.get('OCR_TEMPLATE_MAX_DISTANCE', 24))  # Header hash bits (of 256) that may differ
+    OCR_TEMPLATE_MIN_OBSERVATIONS = int(os.environ.get('OCR_TEMPLATE_MIN_OBSERVATIONS', 2))  # Reports seen before a layout is trusted
+    OCR_TEMPLATE_MIN_FIELD_CONFIDENCE = float(os.environ.get('OCR_TEMPLATE_MIN_FIELD_CONFIDENCE', 70))  # Per-value read confidence
+    OCR_TEMPLATE_MIN_FIELD_SHARE = float(os.environ.get('OCR_TEMPLATE_MIN_FIELD_SHARE', 0.8))  # Values that must read before skipping full OCR
+    OCR_TEMPLATE_MIN_LABEL_SIMILARITY = float(os.environ.get('OCR_TEMPLATE_MIN_LABEL_SIMILARITY', 0.8))  # Re-read row label vs learned test name
+    OCR_TRIAGE_ENABLED = os.environ.get('OCR_TRIAGE_ENABLED', 'true').lower() == 'true'
+    OCR_TRIAGE_MIN_BRIGHTNESS = float(os.environ.get('OCR_TRIAGE_MIN_BRIGHTNESS', 40))  # Mean gray level of the thumbnail (0-255)
+    OCR_TRIAGE_MIN_CONTRAST = float(os.environ.get('OCR_TRIAGE_MIN_CONTRAST', 40))  # Gray levels between darkest ink and the paper
+    OCR_TRIAGE_MIN_SHARPNESS = float(os.environ.get('OCR_TRIAGE_MIN_SHARPNESS', 80))  # Laplacian variance on a 1024px thumbnail
+    OCR_TRIAGE_MIN_EDGE_DENSITY = float(os.environ.get('OCR_TRIAGE_MIN_EDGE_DENSITY', 0.005))  # Share of strong-edge pixels
+    OCR_STATE_DIR = os.environ.get('OCR_STATE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_state')
+    OCR_CACHE_ENABLED = os.environ.get('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+    OCR_CACHE_MEMORY_ENTRIES = int(os.environ.get('OCR_CACHE_MEMORY_ENTRIES', 128))
+    OCR_CACHE_DISK_MAX_MB = int(os.environ.get('OCR_CACHE_DISK_MAX_MB', 200))
+    OCR_NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get('OCR_NEAR_DUPLICATE_MAX_DISTANCE', 6))  # dHash bits, must stay below 8
+    OCR_NEAR_DUPLICATE_MIN_OVERLAP = float(os.environ.get('OCR_NEAR_DUPLICATE_MIN_OVERLAP', 0.6))  # Share of verification tokens found in cached text
+    OCR_LEARN_CONFIG_ORDER = os.environ.get('OCR_LEARN_CONFIG_ORDER', 'true').lower() == 'true'
+    OCR_ORDER_MIN_OBSERVATIONS = int(os.environ.get('OCR_ORDER_MIN_OBSERVATIONS', 5))  # Wins before a bucket's own order is trusted
+    OCR_ORDER_EXPLORE_RATE = float(os.environ.get('OCR_ORDER_EXPLORE_RATE', 0.1))  # Share of pages that try a lower-ranked config first
+    
     @staticmethod
     def init_app(app):
         """Initialize application directories and settings"""
@@ -0,0 +1,138 @@
+import time
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+# Long edge of an A4 page in inches, used to turn a target DPI into pixels
+A4_LONG_EDGE_INCHES = 11.69
+
+PREPROCESS_STAGES = ('downscale', 'grayscale', 'deskew', 'binarize')
+
+
+class ImagePreprocessor:
+    """Pillow pipeline that prepares report photos for Tesseract, timing each stage"""
+
+    def __init__(self, stages=PREPROCESS_STAGES, target_dpi=300, max_skew_angle=5.0,
+                 skew_step=0.5, threshold_offset=10):
+        unknown = set(stages) - set(PREPROCESS_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stages: {', '.join(sorted(unknown))}")
+
+        self.stages = tuple(stage for stage in PREPROCESS_STAGES if stage in stages)
+        self.target_long_edge = int(target_dpi * A4_LONG_EDGE_INCHES)
+        self.max_skew_angle = max_skew_angle
+        self.skew_step = skew_step
+        self.threshold_offset = threshold_offset
+
+    def load(self, image_path, frame=0):
+        """Open, decode and preprocess one frame of an image, returning it with per-stage timings in ms"""
+        timings = {}
+
+        start = time.perf_counter()
+        image = Image.open(image_path)
+        if frame:
+            # Multi-page TIFFs decode only the requested page
+            image.seek(frame)
+        original_size = image.size
+
+        if 'downscale' in self.stages:
+            # JPEG can decode straight to a reduced size (and grayscale) via draft mode
+            target_size = self._target_size(image.size)
+            if target_size != image.size:
+                image.draft('L' if 'grayscale' in self.stages else 'RGB', target_size)
+        image.load()
+        timings['decode'] = self._elapsed_ms(start)
+
+        if 'downscale' in self.stages:
+            start = time.perf_counter()
+            image = self.downscale(image)
+            timings['downscale'] = self._elapsed_ms(start)
+
+        start = time.perf_counter()
+        if 'grayscale' in self.stages:
+            image = self.grayscale(image)
+            timings['grayscale'] = self._elapsed_ms(start)
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        skew_angle = 0.0
+        if 'deskew' in self.stages:
+            start = time.perf_counter()
+            image, skew_angle = self.deskew(image)
+            timings['deskew'] = self._elapsed_ms(start)
+
+        if 'binarize' in self.stages:
+            start = time.perf_counter()
+            image = self.binarize(image)
+            timings['binarize'] = self._elapsed_ms(start)
+
+        return image, {
+            'stages': list(self.stages),
+            'original_size': original_size,
+            'processed_size': image.size,
+            'skew_angle': skew_angle,
+            'timings_ms': timings
+        }
+
+    def _target_size(self, size):
+        """Size that puts the long edge at the target DPI for an A4 page"""
+        width, height = size
+        long_edge = max(width, height)
+        if long_edge <= self.target_long_edge:
+            return size
+
+        scale = self.target_long_edge / float(long_edge)
+        return (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    def downscale(self, image):
+        """Resize anything still above the target resolution after draft decoding"""
+        target_size = self._target_size(image.size)
+        if target_size == image.size:
+            return image
+        return image.resize(target_size, Image.LANCZOS)
+
+    def grayscale(self, image):
+        """Convert to 8-bit grayscale, which is all Tesseract needs"""
+        return image if image.mode == 'L' else image.convert('L')
+
+    def deskew(self, image):
+        """Estimate skew from row projection profiles on a thumbnail and rotate to correct it"""
+        thumbnail = image.convert('L')
+        thumbnail.thumbnail((1000, 1000))
+        # Ink as white on black so rotation padding adds no ink; thin strokes fade on a
+        # thumbnail, so anything clearly darker than the page average counts as ink
+        page_mean = ImageStat.Stat(thumbnail).mean[0]
+        ink = thumbnail.point(lambda value: 255 if value < page_mean - 15 else 0)
+
+        best_angle = 0.0
+        best_score = -1.0
+        steps = int(round(self.max_skew_angle / self.skew_step))
+        for step in range(-steps, steps + 1):
+            angle = step * self.skew_step
+            rotated = ink.rotate(angle, resample=Image.NEAREST) if angle else ink
+            # Squeezing to one float column averages every row, giving the projection profile
+            profile = list(rotated.convert('F').resize((1, rotated.height), Image.BOX).getdata())
+            # Aligned text lines give the sharpest row-to-row jumps in the profile
+            score = sum((profile[i + 1] - profile[i]) ** 2 for i in range(len(profile) - 1))
+            if score > best_score:
+                best_score = score
+                best_angle = angle
+
+        if abs(best_angle) < self.skew_step / 2:
+            return image, 0.0
+
+        fill = 255 if image.mode == 'L' else (255, 255, 255)
+        rotated = image.rotate(best_angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+        return rotated, best_angle
+
+    def binarize(self, image):
+        """Adaptive threshold: ink is anything darker than its local mean by the offset"""
+        gray = image.convert('L')
+        radius = max(8, min(gray.size) // 60)
+        local_mean = gray.filter(ImageFilter.BoxBlur(radius))
+        # subtract clips at zero, so only pixels darker than their neighbourhood remain
+        darkness = ImageChops.subtract(local_mean, gray)
+        offset = self.threshold_offset
+        return darkness.point(lambda value: 0 if value > offset else 255)
+
+    @staticmethod
+    def _elapsed_ms(start):
+        return round((time.perf_counter() - start) * 1000, 2)
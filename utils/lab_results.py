@@ -0,0 +1,96 @@
+import re
+
+# A printed number, with Indian (1,50,000) or Western (150,000) digit grouping
+RESULT_NUMBER = r'(?:[0-9]{1,3}(?:,[0-9]{2,3})+|[0-9]+)(?:\.[0-9]+)?'
+
+# A printed result: an optional qualifier, the number, an optional second reading
+# (blood pressure 120/80) and an optional H/L flag printed against it ("10.5L", "160 (H)")
+RESULT_VALUE_RE = re.compile(
+    r'^(?P<qualifier><=|>=|<|>)?\s*(?P<number>' + RESULT_NUMBER + r')'
+    r'(?:\s*/\s*(?P<second>[0-9]+(?:\.[0-9]+)?))?'
+    r'(?:\s*\(?\*?(?P<flag>[HL])\*?\)?)?$'
+)
+
+# A flag the lab printed as its own word next to the value
+RESULT_FLAG_RE = re.compile(r'^\(?\*?(?P<flag>[HL])\*?\)?$')
+
+
+class TestResult:
+    """One test read from a report, with its value parsed once
+
+    value is what the report printed (grouping commas dropped, flag split off) and
+    is what gets shown; number and second_number are the parsed readings, so a
+    blood pressure of "120/80" is number 120.0 and second_number 80.0. span is the
+    (start, end) offset of the row in the page text, and source its (line, word)
+    position when the row came from the OCR layout instead.
+    """
+
+    __slots__ = (
+        'name', 'value', 'unit', 'reference_range', 'number', 'second_number', 'qualifier', 'flag',
+        'analyte_id', 'normalized_value', 'normalized_unit', 'band', 'span', 'source', 'page'
+    )
+
+    def __init__(self, name, value, unit='', reference_range='', number=None, second_number=None,
+                 qualifier='', flag='', span=None, source=None):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.reference_range = reference_range
+        self.number = number
+        self.second_number = second_number
+        self.qualifier = qualifier
+        self.flag = flag
+        self.analyte_id = None
+        self.normalized_value = None
+        self.normalized_unit = None
+        self.band = None
+        self.span = span
+        self.source = source
+        self.page = None
+
+    @classmethod
+    def parse(cls, name, printed_value, unit='', reference_range='', flag='', span=None, source=None):
+        """Build a result from the value as printed, reading grouping, qualifier, pair and flag in one match"""
+        printed_value = printed_value.strip()
+        match = RESULT_VALUE_RE.match(printed_value)
+        if not match:
+            return cls(name, printed_value, unit, reference_range, flag=flag, span=span, source=source)
+
+        number = match.group('number').replace(',', '')
+        second = match.group('second')
+        qualifier = match.group('qualifier') or ''
+        return cls(
+            name,
+            qualifier + number + (f"/{second}" if second else ''),
+            unit,
+            reference_range,
+            number=float(number),
+            second_number=float(second) if second else None,
+            qualifier=qualifier,
+            flag=match.group('flag') or flag,
+            span=span,
+            source=source
+        )
+
+    def to_dict(self):
+        """Plain dict for JSON responses and for callers that read results by key"""
+        return {
+            'name': self.name,
+            'value': self.value,
+            'unit': self.unit,
+            'reference_range': self.reference_range,
+            'number': self.number,
+            'second_number': self.second_number,
+            'qualifier': self.qualifier,
+            'flag': self.flag,
+            'analyte_id': self.analyte_id,
+            'normalized_value': self.normalized_value,
+            'normalized_unit': self.normalized_unit,
+            'band': self.band,
+            'span': list(self.span) if self.span else None,
+            'source': self.source,
+            'page': self.page
+        }
+
+    def __repr__(self):
+        return f"TestResult({self.name!r}, {self.value!r}, {self.unit!r})"
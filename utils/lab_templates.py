@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import difflib
+from utils.perceptual_hash import dhash, hamming_distance
+from utils.lab_results import RESULT_FLAG_RE
+from utils.medical_knowledge import normalize_analyte_name
+
+
+def _relative_box(box, size):
+    """Pixel box as fractions of the page, so templates survive a change of scan resolution"""
+    width, height = size
+    return [round(box[0] / width, 5), round(box[1] / height, 5), round(box[2] / width, 5), round(box[3] / height, 5)]
+
+
+def absolute_box(box, size):
+    """Template box in pixels for a page of the given size"""
+    width, height = size
+    return (int(box[0] * width), int(box[1] * height), int(box[2] * width), int(box[3] * height))
+
+
+def _overlap_ratio(first, second):
+    """Intersection over union of two boxes"""
+    left, top = max(first[0], second[0]), max(first[1], second[1])
+    right, bottom = min(first[2], second[2]), min(first[3], second[3])
+    if right <= left or bottom <= top:
+        return 0.0
+    intersection = (right - left) * (bottom - top)
+    union = ((first[2] - first[0]) * (first[3] - first[1]) + (second[2] - second[0]) * (second[3] - second[1])
+             - intersection)
+    return intersection / union if union else 0.0
+
+
+def union_box(boxes):
+    """Smallest box holding all the given boxes"""
+    return [min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes)]
+
+
+class LabTemplateRegistry:
+    """Locally learned report layouts of known labs, matched by a perceptual hash of the page header
+
+    A template records, for each analyte row the lab prints, the static words of the
+    row (name, unit, reference range) and the region its value is printed in. Fields
+    only count once they were seen in the same place on min_observations reports.
+    A header match says nothing about the rows, so a matched page re-reads each
+    row's label and the caller checks it against the field name (label_matches).
+    Templates live in SQLite and every sighting or failure is an in-place update,
+    so all gunicorn workers add to the same counts.
+    """
+
+    def __init__(self, db_path, max_distance=24, min_observations=2, max_failures=3,
+                 header_fraction=0.12, max_aspect_difference=0.05, min_label_similarity=0.8):
+        self.db_path = db_path
+        self.max_distance = max_distance
+        self.min_observations = min_observations
+        self.max_failures = max_failures
+        self.header_fraction = header_fraction
+        self.max_aspect_difference = max_aspect_difference
+        self.min_label_similarity = min_label_similarity
+        self._init_db()
+
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and gunicorn workers
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS lab_templates ('
+                'template_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, aspect REAL NOT NULL, '
+                'observations INTEGER NOT NULL, failures INTEGER NOT NULL, last_seen REAL, context TEXT NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS lab_template_fields ('
+                'template_id TEXT NOT NULL, name_key TEXT NOT NULL, field TEXT NOT NULL, seen INTEGER NOT NULL, '
+                'PRIMARY KEY (template_id, name_key))'
+            )
+
+    def fingerprint(self, image):
+        """256-bit difference hash of the header band, where lab name and logo sit"""
+        header = image.crop((0, 0, image.width, max(1, int(image.height * self.header_fraction))))
+        return format(dhash(header, hash_size=16), '064x')
+
+    def _find(self, conn, fingerprint, size):
+        """Closest template by header hash with a compatible page shape"""
+        value = int(fingerprint, 16)
+        aspect = size[1] / float(size[0] or 1)
+
+        best_id = None
+        best_distance = None
+        for template_id, template_fingerprint, template_aspect in conn.execute(
+            'SELECT template_id, fingerprint, aspect FROM lab_templates'
+        ):
+            if abs(template_aspect - aspect) > self.max_aspect_difference * template_aspect:
+                continue
+            distance = hamming_distance(value, int(template_fingerprint, 16))
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best_id = template_id
+                best_distance = distance
+        return best_id
+
+    def match(self, fingerprint, size):
+        """Template id and its confirmed fields for a page, or (None, None) if no ready template fits"""
+        try:
+            with self._connect() as conn:
+                template_id = self._find(conn, fingerprint, size)
+                if template_id is None:
+                    return None, None
+
+                observations, context = conn.execute(
+                    'SELECT observations, context FROM lab_templates WHERE template_id = ?', (template_id,)
+                ).fetchone()
+                rows = conn.execute(
+                    'SELECT field FROM lab_template_fields WHERE template_id = ? AND seen >= ? ORDER BY rowid',
+                    (template_id, self.min_observations)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ LAB TEMPLATES: Lookup failed: {e}")
+            return None, None
+
+        fields = [json.loads(row[0]) for row in rows]
+        if observations < self.min_observations or not fields:
+            return None, None
+
+        return template_id, {
+            'fields': [self._readable_field(field) for field in fields if field['value_index'] > 0],
+            'context': json.loads(context)
+        }
+
+    @staticmethod
+    def _readable_field(field):
+        """Copy of a field with the region of its label and without the H/L flag of the learned report"""
+        value_index = field['value_index']
+        kept = [
+            index for index, word in enumerate(field['words'])
+            if index <= value_index or not RESULT_FLAG_RE.match(word)
+        ]
+        return dict(
+            field,
+            words=[field['words'][index] for index in kept],
+            boxes=[field['boxes'][index] for index in kept],
+            label_region=union_box(field['boxes'][:value_index])
+        )
+
+    def label_matches(self, field, label_text):
+        """Whether a label read from a new page names the same test as the template field
+
+        Words are compared one by one, so OCR noise ("Hemog1obin") passes while a
+        neighbouring row that differs in a single short word ("HDL"/"LDL") does not.
+        """
+        read = normalize_analyte_name(label_text).split()
+        expected = normalize_analyte_name(field['name']).split()
+        if not expected or len(read) != len(expected):
+            return False
+        return all(
+            difflib.SequenceMatcher(None, read_word, expected_word).ratio() >= self.min_label_similarity
+            for read_word, expected_word in zip(read, expected)
+        )
+
+    def learn(self, fingerprint, size, fields, context):
+        """Merge the rows of a fully OCR'd and parsed report into its lab's template
+
+        fields are {'name', 'words', 'boxes', 'value_index', 'region'} with pixel boxes;
+        context are {'label', 'region'} lines such as patient name, age and sex.
+        """
+        if not fields:
+            return None
+
+        fields = [dict(field, boxes=[_relative_box(box, size) for box in field['boxes']],
+                       region=_relative_box(field['region'], size)) for field in fields]
+        context = [dict(region, region=_relative_box(region['region'], size)) for region in context]
+        now = time.time()
+
+        try:
+            with self._connect() as conn:
+                # Taken before the lookup so two workers cannot both create the same lab's template
+                conn.execute('BEGIN IMMEDIATE')
+                template_id = self._find(conn, fingerprint, size)
+                if template_id is None:
+                    template_id = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+                    conn.execute(
+                        'INSERT OR IGNORE INTO lab_templates '
+                        '(template_id, fingerprint, aspect, observations, failures, last_seen, context) '
+                        'VALUES (?, ?, ?, 0, 0, ?, ?)',
+                        (template_id, fingerprint, round(size[1] / float(size[0] or 1), 4), now, json.dumps(context))
+                    )
+
+                conn.execute(
+                    'UPDATE lab_templates SET observations = observations + 1, last_seen = ? WHERE template_id = ?',
+                    (now, template_id)
+                )
+                if context:
+                    conn.execute(
+                        'UPDATE lab_templates SET context = ? WHERE template_id = ?', (json.dumps(context), template_id)
+                    )
+
+                for field in fields:
+                    name_key = field['name'].lower()
+                    row = conn.execute(
+                        'SELECT field, seen FROM lab_template_fields WHERE template_id = ? AND name_key = ?',
+                        (template_id, name_key)
+                    ).fetchone()
+                    if row and _overlap_ratio(json.loads(row[0])['region'], field['region']) >= 0.5:
+                        # Same row in the same place again: refresh it and count the sighting
+                        seen = row[1] + 1
+                    else:
+                        # A new row, or one that moved and is not part of a fixed layout (yet)
+                        seen = 1
+                    conn.execute(
+                        'INSERT OR REPLACE INTO lab_template_fields (template_id, name_key, field, seen) '
+                        'VALUES (?, ?, ?, ?)',
+                        (template_id, name_key, json.dumps(field), seen)
+                    )
+        except sqlite3.Error as e:
+            print(f"⚠️ LAB TEMPLATES: Could not save template: {e}")
+            return None
+        return template_id
+
+    def record_result(self, template_id, succeeded):
+        """Track template reads; a template that keeps failing is dropped so it can be relearned"""
+        try:
+            with self._connect() as conn:
+                if succeeded:
+                    conn.execute('UPDATE lab_templates SET failures = 0 WHERE template_id = ?', (template_id,))
+                    return
+
+                conn.execute(
+                    'UPDATE lab_templates SET failures = failures + 1 WHERE template_id = ?', (template_id,)
+                )
+                row = conn.execute(
+                    'SELECT failures FROM lab_templates WHERE template_id = ?', (template_id,)
+                ).fetchone()
+                if row and row[0] >= self.max_failures:
+                    print(f"⚠️ LAB TEMPLATES: Dropping template {template_id} after {row[0]} failed reads")
+                    conn.execute('DELETE FROM lab_template_fields WHERE template_id = ?', (template_id,))
+                    conn.execute('DELETE FROM lab_templates WHERE template_id = ?', (template_id,))
+        except sqlite3.Error as e:
+            print(f"⚠️ LAB TEMPLATES: Could not record template result: {e}")
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                total = conn.execute('SELECT COUNT(*) FROM lab_templates').fetchone()[0]
+                ready = conn.execute(
+                    'SELECT COUNT(*) FROM lab_templates t WHERE t.observations >= ? AND EXISTS ('
+                    'SELECT 1 FROM lab_template_fields f WHERE f.template_id = t.template_id AND f.seen >= ?)',
+                    (self.min_observations, self.min_observations)
+                ).fetchone()[0]
+        except sqlite3.Error:
+            return {'templates': None, 'ready': None}
+        return {'templates': total, 'ready': ready}
@@ -1,3 +1,82 @@
+import os
+import re
+import json
+import bisect
+import functools
+
+ANALYTE_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'analytes.json')
+REFERENCE_RANGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'reference_ranges.json')
+
+# Bands a reference range can name, from lowest to highest
+BAND_LEVELS = ('critical_low', 'low', 'normal', 'high', 'critical_high')
+
+# Longest run of name words tried as an alias when the whole name is not one
+MAX_ALIAS_WORDS = 4
+
+# Aliases this short (Hb, K, Na) only count when they are the whole test name
+MIN_PARTIAL_ALIAS_LENGTH = 3
+
+# Words that turn a test into a different one than the alias they sit next to ("Urine
+# Creatinine", "LDL/HDL Ratio", "Mean Platelet Volume"); a partial alias match is rejected
+# when one of them is left over, so only a lexicon entry naming the whole test can match
+PARTIAL_ALIAS_STOP_WORDS = frozenset([
+    'urine', 'urinary', 'ratio', 'mean', 'corpuscular', 'non', 'index', 'clearance', 'saturation',
+    'distribution', 'width', 'ionized', 'ionised', 'antibody', 'antibodies', 'free'
+])
+
+
+def normalize_analyte_name(name):
+    """Lowercase a test name and reduce punctuation to single spaces ("S. Creatinine" -> "s creatinine")"""
+    return ' '.join(re.sub(r'[^a-z0-9%+]+', ' ', name.lower()).split())
+
+
+@functools.lru_cache(maxsize=None)
+def _load_analyte_lexicon(path):
+    """Analytes by id, alias index and body-system labels from the lexicon file, read once per process"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    analytes = {}
+    aliases = {}
+    for analyte in data['analytes']:
+        analytes[analyte['id']] = analyte
+        for alias in [analyte['name']] + analyte['aliases']:
+            aliases.setdefault(normalize_analyte_name(alias), analyte['id'])
+    return analytes, aliases, data.get('body_systems', {})
+
+
+@functools.lru_cache(maxsize=None)
+def _load_reference_ranges(path):
+    """Reference ranges by analyte id with each variant's band boundaries compiled for bisect
+    
+    A variant's bands are [level, lower_bound] pairs; each band includes its lower
+    bound and the first band is open below, so "normal" from 70 with "high" from
+    140 puts 70 in normal and 140 in high.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    ranges = {}
+    for analyte_id, entry in data['ranges'].items():
+        variants = []
+        for variant in entry['variants']:
+            levels = tuple(level for level, _ in variant['bands'])
+            bounds = tuple(float(bound) for _, bound in variant['bands'][1:])
+            if any(level not in BAND_LEVELS for level in levels):
+                raise ValueError(f"Unknown band level in reference range for {analyte_id}: {levels}")
+            if list(bounds) != sorted(set(bounds)):
+                raise ValueError(f"Band boundaries for {analyte_id} must be strictly increasing: {bounds}")
+            variants.append({
+                'sex': variant.get('sex'),
+                'min_age': variant.get('min_age'),
+                'max_age': variant.get('max_age'),
+                'levels': levels,
+                'bounds': bounds
+            })
+        ranges[analyte_id] = {'unit': entry.get('unit', ''), 'variants': variants}
+    return ranges
+
+
 class MedicalKnowledgeBase:
     def __init__(self):
         self.normal_ranges = {
@@ -24,6 +103,72 @@ class MedicalKnowledgeBase:
             'high': 'ज्यादा',
             'low': 'कम'
         }
+        
+        # Canonical analytes with their synonyms and abbreviations (Hb, HGB, Haemoglobin)
+        self.analytes, self.analyte_aliases, self.body_systems = _load_analyte_lexicon(ANALYTE_LEXICON_PATH)
+        
+        # Banded reference ranges per analyte, with age- and sex-specific variants
+        self.reference_ranges = _load_reference_ranges(REFERENCE_RANGES_PATH)
+    
+    def resolve_analyte(self, test_name):
+        """Canonical analyte id for a printed test name, or None if the lexicon does not know it
+        
+        The whole normalized name is looked up first; otherwise the longest run of its
+        words that is an alias wins ("Blood Sugar (Fasting)" -> glucose), unless a
+        modifier such as "urine" or "ratio" is left outside it.
+        """
+        words = normalize_analyte_name(test_name).split()
+        analyte_id = self.analyte_aliases.get(' '.join(words))
+        if analyte_id:
+            return analyte_id
+        
+        for size in range(min(MAX_ALIAS_WORDS, len(words) - 1), 0, -1):
+            for start in range(len(words) - size + 1):
+                alias = ' '.join(words[start:start + size])
+                if len(alias) < MIN_PARTIAL_ALIAS_LENGTH or alias not in self.analyte_aliases:
+                    continue
+                leftover = words[:start] + words[start + size:]
+                if any(word in PARTIAL_ALIAS_STOP_WORDS for word in leftover):
+                    continue
+                return self.analyte_aliases[alias]
+        return None
+    
+    def get_analyte(self, analyte_id):
+        return self.analytes.get(analyte_id)
+    
+    def get_body_system(self, analyte_id):
+        """Plain-words description of what an analyte tells about the body"""
+        analyte = self.analytes.get(analyte_id)
+        if not analyte:
+            return "body"
+        return self.body_systems.get(analyte.get('system'), "body")
+    
+    def get_reference_variant(self, analyte_id, age=None, sex=None):
+        """The first reference-range variant matching the patient, or None if the analyte has no range
+        
+        Variants are listed most specific first and end with one that has no
+        conditions; a variant conditioned on age or sex is skipped when that is unknown.
+        """
+        reference = self.reference_ranges.get(analyte_id)
+        if not reference:
+            return None
+        
+        for variant in reference['variants']:
+            if variant['sex'] and variant['sex'] != sex:
+                continue
+            if variant['min_age'] is not None and (age is None or age < variant['min_age']):
+                continue
+            if variant['max_age'] is not None and (age is None or age > variant['max_age']):
+                continue
+            return variant
+        return None
+    
+    def classify(self, analyte_id, value, age=None, sex=None):
+        """Band (one of BAND_LEVELS) a numeric value falls in for this patient, or None without a range"""
+        variant = self.get_reference_variant(analyte_id, age, sex)
+        if variant is None or value is None:
+            return None
+        return variant['levels'][bisect.bisect_right(variant['bounds'], value)]
     
     def get_normal_range(self, parameter):
         return self.normal_ranges.get(parameter.lower(), None)
@@ -0,0 +1,58 @@
+import re
+
+# Keywords that rank competing OCR candidates against each other
+RANKING_KEYWORDS = [
+    'blood', 'sugar', 'glucose', 'cholesterol', 'pressure', 'hemoglobin',
+    'test', 'result', 'level', 'mg/dl', 'mmhg', 'patient', 'name', 'age',
+    'report', 'analysis', 'normal', 'high', 'low', 'date', 'value'
+]
+
+# Terms that mark extracted text as a medical report at all
+CONTENT_INDICATORS = [
+    'blood', 'sugar', 'glucose', 'cholesterol', 'pressure', 'hemoglobin',
+    'test', 'result', 'level', 'patient', 'report', 'analysis',
+    'mg/dl', 'mmhg', 'normal', 'high', 'low', 'date', 'value',
+    'creatinine', 'urea', 'triglycerides', 'hdl', 'ldl'
+]
+
+MEDICAL_UNITS = ['mg/dl', 'mmhg', 'mg', 'ml', 'units', '%', 'g/dl']
+
+
+class MedicalTextScorer:
+    """Scores OCR text for medical content with one precompiled regex scan
+
+    Every keyword, unit and a digit class share a single alternation inside a
+    lookahead, so one finditer over the lowercased text reports every term
+    starting at each position, including terms that overlap (g/dl inside mg/dl).
+    """
+
+    def __init__(self, ranking_keywords=RANKING_KEYWORDS, content_indicators=CONTENT_INDICATORS,
+                 units=MEDICAL_UNITS):
+        self.ranking_keywords = frozenset(keyword.lower() for keyword in ranking_keywords)
+        self.content_indicators = frozenset(term.lower() for term in content_indicators)
+        self.units = frozenset(unit.lower() for unit in units)
+
+        terms = self.ranking_keywords | self.content_indicators | self.units
+        # Longest first so a term that prefixes another does not hide it
+        alternation = '|'.join(re.escape(term) for term in sorted(terms, key=lambda term: (-len(term), term)))
+        self.pattern = re.compile(f"(?=({alternation}|[0-9]))")
+
+    def score(self, text):
+        """Scan text once and summarise which medical terms, units and numbers it contains"""
+        found = set()
+        has_numbers = False
+
+        for match in self.pattern.finditer((text or '').lower()):
+            term = match.group(1)
+            if term.isdigit():
+                has_numbers = True
+            else:
+                found.add(term)
+
+        return {
+            'keyword_score': len(found & self.ranking_keywords),
+            'content_terms': len(found & self.content_indicators),
+            'has_numbers': has_numbers,
+            'has_units': bool(found & self.units),
+            'length': len(text or '')
+        }
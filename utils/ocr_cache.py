@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.perceptual_hash import PerceptualHashIndex
+
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes, read in chunks so large uploads are never held twice"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """Two-tier OCR result cache: an in-process LRU in front of a size-bounded SQLite store"""
+
+    def __init__(self, db_path, memory_entries=128, disk_max_bytes=200 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'near_duplicate_hits': 0
+        }
+        self.phash_index = PerceptualHashIndex()
+        self._init_db()
+        self._load_phash_index()
+
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and gunicorn workers
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_results ('
+                'cache_key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_ocr_results_access ON ocr_results (last_access)')
+            # Perceptual hashes are stored as hex because SQLite integers are signed 64-bit
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_phashes ('
+                'cache_key TEXT PRIMARY KEY, phash TEXT NOT NULL)'
+            )
+
+    def _load_phash_index(self):
+        """Rebuild the in-memory Hamming index from the hashes of stored results"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    'SELECT p.cache_key, p.phash FROM ocr_phashes p '
+                    'JOIN ocr_results r ON r.cache_key = p.cache_key'
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ OCR CACHE: Could not load perceptual hashes: {e}")
+            return
+
+        for cache_key, phash in rows:
+            self.phash_index.add(cache_key, int(phash, 16))
+
+    @staticmethod
+    def make_key(content_hash, settings_version):
+        """Cache key for an upload under a given OCR settings version"""
+        return f"{content_hash}:{settings_version}"
+
+    def get(self, key, count=True):
+        """Return a cached result and which tier served it, or (None, None) on a miss"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                if count:
+                    self.counters['memory_hits'] += 1
+                return json.loads(self.memory[key]), 'memory'
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute('SELECT result FROM ocr_results WHERE cache_key = ?', (key,)).fetchone()
+                if row:
+                    conn.execute('UPDATE ocr_results SET last_access = ? WHERE cache_key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"⚠️ OCR CACHE: Disk lookup failed: {e}")
+            row = None
+
+        with self.lock:
+            if row:
+                if count:
+                    self.counters['disk_hits'] += 1
+                self._remember(key, row[0])
+                return json.loads(row[0]), 'disk'
+
+            if count:
+                self.counters['misses'] += 1
+            return None, None
+
+    def find_near_duplicate(self, phash, settings_version, max_distance):
+        """Closest stored result with the same settings whose perceptual hash is within max_distance"""
+        suffix = f":{settings_version}"
+        key, distance = self.phash_index.find_nearest(
+            phash, max_distance, key_filter=lambda cache_key: cache_key.endswith(suffix)
+        )
+        if key is None:
+            return None, None, None
+
+        # Counted separately through record_near_duplicate_hit once the match is verified
+        result, _ = self.get(key, count=False)
+        if result is None:
+            # Evicted by another worker since the index was built
+            self.phash_index.remove(key)
+            return None, None, None
+
+        return key, result, distance
+
+    def record_near_duplicate_hit(self):
+        with self.lock:
+            self.counters['near_duplicate_hits'] += 1
+
+    def put(self, key, result, phash=None):
+        """Store a result in both tiers, evicting least recently used entries past the bounds"""
+        payload = json.dumps(result)
+        now = time.time()
+
+        with self.lock:
+            self._remember(key, payload)
+            self.counters['stores'] += 1
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO ocr_results (cache_key, result, size, created_at, last_access) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (key, payload, len(payload), now, now)
+                )
+                if phash is not None:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO ocr_phashes (cache_key, phash) VALUES (?, ?)',
+                        (key, format(phash, '016x'))
+                    )
+                evicted = self._evict_disk(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ OCR CACHE: Disk store failed: {e}")
+            return
+
+        if phash is not None:
+            self.phash_index.add(key, phash)
+
+        if evicted:
+            with self.lock:
+                self.counters['disk_evictions'] += len(evicted)
+            for cache_key in evicted:
+                self.phash_index.remove(cache_key)
+
+    def _remember(self, key, payload):
+        """Insert into the in-process LRU; caller holds the lock"""
+        self.memory[key] = payload
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+            self.counters['memory_evictions'] += 1
+
+    def _evict_disk(self, conn):
+        """Drop least recently used rows until the store fits its byte budget, returning their keys"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_results').fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return []
+
+        evicted = []
+        rows = conn.execute('SELECT cache_key, size FROM ocr_results ORDER BY last_access ASC').fetchall()
+        for cache_key, size in rows:
+            if total <= self.disk_max_bytes:
+                break
+            conn.execute('DELETE FROM ocr_results WHERE cache_key = ?', (cache_key,))
+            conn.execute('DELETE FROM ocr_phashes WHERE cache_key = ?', (cache_key,))
+            total -= size
+            evicted.append(cache_key)
+        return evicted
+
+    def stats(self):
+        """Hit/miss counters plus current tier sizes"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self.memory)
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+
+        try:
+            with self._connect() as conn:
+                count, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results').fetchone()
+            stats['disk_entries'] = count
+            stats['disk_bytes'] = size
+        except sqlite3.Error:
+            stats['disk_entries'] = None
+            stats['disk_bytes'] = None
+
+        return stats
@@ -0,0 +1,104 @@
+import os
+import random
+import sqlite3
+
+
+class OCRConfigStats:
+    """Per-config win counts shared by every worker through SQLite, bucketed by cheap image features"""
+
+    GLOBAL_KEY = '*'
+
+    def __init__(self, db_path, min_observations=5, explore_rate=0.1):
+        self.db_path = db_path
+        self.min_observations = min_observations
+        self.explore_rate = explore_rate
+        self._init_db()
+
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and gunicorn workers
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS config_wins ('
+                'feature_key TEXT NOT NULL, config TEXT NOT NULL, wins INTEGER NOT NULL, '
+                'PRIMARY KEY (feature_key, config))'
+            )
+
+    def _bucket(self, conn, feature_key):
+        rows = conn.execute('SELECT config, wins FROM config_wins WHERE feature_key = ?', (feature_key,)).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def image_features(image):
+        """Bucket an image by aspect ratio, size and estimated text density"""
+        width, height = image.size
+
+        ratio = height / float(width or 1)
+        if ratio > 1.2:
+            aspect = 'portrait'
+        elif ratio < 0.83:
+            aspect = 'landscape'
+        else:
+            aspect = 'square'
+
+        megapixels = (width * height) / 1000000.0
+        if megapixels < 1:
+            size = 'small'
+        elif megapixels < 4:
+            size = 'medium'
+        elif megapixels < 12:
+            size = 'large'
+        else:
+            size = 'huge'
+
+        # Share of dark pixels on a small grayscale thumbnail approximates ink coverage
+        thumbnail = image.convert('L')
+        thumbnail.thumbnail((256, 256))
+        histogram = thumbnail.histogram()
+        dark_fraction = sum(histogram[:128]) / float(sum(histogram) or 1)
+        if dark_fraction < 0.05:
+            density = 'sparse'
+        elif dark_fraction < 0.15:
+            density = 'normal'
+        else:
+            density = 'dense'
+
+        return f"{aspect}|{size}|{density}"
+
+    def ordered_configs(self, feature_key, configs):
+        """Order configs by historical wins for this feature bucket, falling back to global wins
+
+        With early exit only the config tried first can win, so now and then a
+        lower-ranked config is moved to the front to keep its count honest.
+        """
+        try:
+            with self._connect() as conn:
+                counts = self._bucket(conn, feature_key)
+                if sum(counts.values()) < self.min_observations:
+                    counts = self._bucket(conn, self.GLOBAL_KEY)
+        except sqlite3.Error as e:
+            print(f"⚠️ OCR STATS: Could not read config stats: {e}")
+            counts = {}
+
+        # Stable sort keeps the default order for configs with equal wins
+        ordered = sorted(configs, key=lambda config: -counts.get(config, 0))
+        if len(ordered) > 1 and random.random() < self.explore_rate:
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        return ordered
+
+    def record_win(self, feature_key, config):
+        """Count a winning config for its feature bucket and the global bucket"""
+        try:
+            with self._connect() as conn:
+                # Increments happen inside SQLite so concurrent workers never overwrite each other
+                for key in (feature_key, self.GLOBAL_KEY):
+                    conn.execute(
+                        'INSERT INTO config_wins (feature_key, config, wins) VALUES (?, ?, 1) '
+                        'ON CONFLICT (feature_key, config) DO UPDATE SET wins = wins + 1',
+                        (key, config)
+                    )
+        except sqlite3.Error as e:
+            print(f"⚠️ OCR STATS: Could not save config stats: {e}")
@@ -0,0 +1,114 @@
+import re
+
+# Letters Tesseract prints in place of digits, used inside numeric tokens
+LETTER_TO_DIGIT = {'O': '0', 'o': '0', 'l': '1', 'I': '1'}
+
+# Letters that are also unit suffixes or names ("13.5s", "30s", "S1 S2"), and the bar that is also
+# a table border ("|12.5 |"), so they only stand for a digit inside a number: between two digits,
+# or between a digit and a decimal point
+INNER_LETTER_TO_DIGIT = {'S': '5', 's': '5', '|': '1'}
+
+# Table rules Tesseract prints against the first or last character of a cell
+BORDER_CHARS = '|'
+
+# Characters printed in place of letters, used inside words; case follows the neighbouring letters
+WORD_CONFUSIONS_UPPER = {'0': 'O', '1': 'I', '5': 'S', '|': 'I'}
+WORD_CONFUSIONS_LOWER = {'0': 'o', '1': 'l', '5': 's', '|': 'l'}
+
+# Names that legitimately mix letters and digits and must never be "corrected"
+PROTECTED_TOKENS = [
+    'HbA1c', 'A1c', 'T3', 'T4', 'FT3', 'FT4', 'B12', 'B1', 'B6', 'D2', 'D3', 'CA125', 'CA19-9',
+    'CD4', 'CD8', 'IgG1', 'IL6', 'IL-6', 'H1N1', 'CO2', 'HCO3', 'PO4', 'SpO2', 'PaO2', 'PaCO2',
+    'NT-proBNP', 'O2', 'G6PD', 'E2', 'P4', 'COVID-19', '25-OH', 'I-131'
+]
+
+# Characters a numeric token may contain besides digits and misread digits
+NUMERIC_PUNCTUATION = frozenset('.,/%<>-+')
+
+# Whitespace and the separators OCR prints between a label and its value delimit tokens
+TOKEN_CHAR = r'[^\s:=()\[\]]'
+
+# Only tokens mixing digits with letters (or holding a bar) can hold a confusion, so plain
+# words and plain numbers are skipped inside the regex engine without a Python callback
+CANDIDATE_RE = re.compile(
+    rf'(?<!{TOKEN_CHAR})(?:(?={TOKEN_CHAR}*[0-9])(?={TOKEN_CHAR}*[A-Za-z])|(?={TOKEN_CHAR}*\|)){TOKEN_CHAR}+'
+)
+
+
+class OCRTextCorrector:
+    """Fixes character confusions (O/0, l/1, S/5, |/I) in OCR text from each token's context, in one scan
+
+    A token that holds a real digit and otherwise only misread digits and numeric
+    punctuation is numeric, so its letters become digits ("1O.5" -> "10.5"); an S
+    only counts as a 5 inside the number ("1S.2"), never at its edge ("13.5s"), and a
+    bar at a token's edge is a table border and is dropped ("|12.5" -> "12.5"). A
+    digit sitting between two letters is inside a word and becomes the matching
+    letter ("Hem0globin" -> "Hemoglobin"). Protected tokens such as HbA1c are left alone.
+    """
+
+    def __init__(self, protected_tokens=PROTECTED_TOKENS):
+        self.protected = frozenset(token.lower() for token in protected_tokens)
+        self.to_digit = str.maketrans(LETTER_TO_DIGIT)
+
+    def correct(self, text):
+        """Return text with confusable characters fixed token by token"""
+        if not text:
+            return text or ''
+        return CANDIDATE_RE.sub(self._correct_token, text)
+
+    def _correct_token(self, match):
+        token = match.group(0)
+        if token.lower().strip('.,;') in self.protected:
+            return token
+
+        corrected = self._as_number(token)
+        return self._as_word(token) if corrected is None else corrected
+
+    def _as_number(self, token):
+        """Token with misread digits replaced, or None if it is not a numeric token"""
+        token = token.strip(BORDER_CHARS)
+        has_digit = False
+        chars = list(token)
+        for i, char in enumerate(chars):
+            if char.isdigit():
+                has_digit = True
+            elif char in INNER_LETTER_TO_DIGIT:
+                if not self._inside_number(token, i):
+                    return None
+                chars[i] = INNER_LETTER_TO_DIGIT[char]
+            elif char not in LETTER_TO_DIGIT and char not in NUMERIC_PUNCTUATION:
+                return None
+        return ''.join(chars).translate(self.to_digit) if has_digit else None
+
+    @staticmethod
+    def _inside_number(token, i):
+        """Whether position i sits between two digits, or between a digit and a decimal point"""
+        if i == 0 or i == len(token) - 1:
+            return False
+        before, after = token[i - 1], token[i + 1]
+        if not (before.isdigit() or before in '.,') or not (after.isdigit() or after in '.,'):
+            return False
+        return before.isdigit() or after.isdigit()
+
+    def _as_word(self, token):
+        """Token with digits and bars between two letters replaced by the letter they resemble
+
+        A bar left at either edge is a table border ("|g/dL", "Hb|") and is dropped.
+        """
+        chars = list(token)
+        if chars[0] == '|' and token[1:].isalpha():
+            # A bar opening a word is a capital I ("|ron")
+            chars[0] = 'I'
+        for i in range(1, len(chars) - 1):
+            char = chars[i]
+            if char not in WORD_CONFUSIONS_UPPER:
+                continue
+            before, after = chars[i - 1], chars[i + 1]
+            if not (before.isalpha() and after.isalpha()):
+                continue
+            # "Hem0globin" takes a lowercase o, "GLUC0SE" an uppercase O
+            table = WORD_CONFUSIONS_UPPER if before.isupper() and after.isupper() else WORD_CONFUSIONS_LOWER
+            chars[i] = table[char]
+        word = ''.join(chars)
+        # A lone bar is a column rule between cells, not a token to empty out
+        return word.strip(BORDER_CHARS) or word
@@ -0,0 +1,113 @@
+import os
+import shlex
+import hashlib
+import tempfile
+from utils.medical_knowledge import MedicalKnowledgeBase
+from utils.medical_text_scorer import RANKING_KEYWORDS, CONTENT_INDICATORS, MEDICAL_UNITS
+from utils.ocr_text_corrector import PROTECTED_TOKENS
+
+# Analyte names as Indian labs print them on routine panels
+ANALYTE_NAMES = [
+    'Hemoglobin', 'Haemoglobin', 'Hb', 'HGB', 'Hematocrit', 'Haematocrit', 'PCV', 'RBC', 'WBC', 'TLC', 'DLC',
+    'Platelet', 'Platelets', 'Count', 'MCV', 'MCH', 'MCHC', 'RDW', 'ESR', 'Neutrophils', 'Lymphocytes',
+    'Monocytes', 'Eosinophils', 'Basophils',
+    'Glucose', 'Fasting', 'Random', 'Postprandial', 'PP', 'Blood', 'Sugar', 'HbA1c', 'Glycated',
+    'Cholesterol', 'Triglycerides', 'HDL', 'LDL', 'VLDL', 'Lipid', 'Profile',
+    'Creatinine', 'Urea', 'BUN', 'Uric', 'Acid', 'eGFR', 'Sodium', 'Potassium', 'Chloride', 'Calcium',
+    'Phosphorus', 'Bilirubin', 'Direct', 'Indirect', 'Total', 'SGOT', 'SGPT', 'AST', 'ALT', 'ALP',
+    'Alkaline', 'Phosphatase', 'GGT', 'Protein', 'Albumin', 'Globulin', 'Ratio',
+    'TSH', 'T3', 'T4', 'FT3', 'FT4', 'Thyroid', 'Vitamin', 'B12', 'D3', '25-OH', 'Ferritin', 'Iron',
+    'TIBC', 'Transferrin', 'Saturation', 'CRP', 'Pressure', 'Systolic', 'Diastolic', 'Pulse'
+]
+
+# Units as they appear on reports, in their printed case
+LAB_UNITS = [
+    'mg/dL', 'mg/dl', 'g/dL', 'g/dl', 'g%', 'mmol/L', 'umol/L', 'µmol/L', 'mmHg', 'mEq/L', 'IU/L', 'U/L',
+    'mIU/L', 'uIU/mL', 'µIU/mL', 'ng/mL', 'ng/dL', 'pg/mL', 'pmol/L', 'nmol/L', 'ug/dL', 'µg/dL', 'fL',
+    'pg', 'cells/cumm', 'cells/µL', '/cumm', 'lakh/cumm', 'mill/cumm', 'mm/hr', 'mL/min/1.73m2', '%'
+]
+
+# Tesseract user-patterns: \d is a digit and \* repeats the previous element
+NUMBER_PATTERNS = [
+    r'\d\*',
+    r'\d\*.\d\*',
+    r'\d\*.\d\*%',
+    r'\d\*%',
+    r'\d\*/\d\*',
+    r'<\d\*.\d\*',
+    r'>\d\*.\d\*',
+    r'<\d\*',
+    r'>\d\*',
+    r'\d\*-\d\*',
+    r'\d\*.\d\*-\d\*.\d\*',
+    r'\d\*,\d\d\d',
+    r'\d\*,\d\d,\d\d\d'
+]
+
+
+def build_user_words():
+    """Sorted word list from the analyte lexicon, units and medical keywords the project knows"""
+    words = set()
+    knowledge_base = MedicalKnowledgeBase()
+    names = list(ANALYTE_NAMES) + list(PROTECTED_TOKENS) + list(RANKING_KEYWORDS) + list(CONTENT_INDICATORS)
+    names += [parameter.replace('_', ' ') for parameter in knowledge_base.normal_ranges]
+    for analyte in knowledge_base.analytes.values():
+        names += [analyte['name']] + analyte['aliases']
+
+    for name in names:
+        for word in name.split():
+            words.add(word)
+            if word.isalpha():
+                # Reports print names in title case, capitals or lowercase
+                words.update((word.lower(), word.upper(), word.capitalize()))
+
+    for unit in list(LAB_UNITS) + list(MEDICAL_UNITS) + [entry['unit'] for entry in knowledge_base.normal_ranges.values()]:
+        words.update(unit.split())
+
+    return sorted(words)
+
+
+def _write_if_changed(path, content):
+    """Atomically replace path with content unless it already holds exactly that"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return
+    except OSError:
+        pass
+
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def write_tesseract_vocabulary(directory):
+    """Write the user-words and user-patterns files and return the Tesseract arguments using them
+
+    Returns {'args', 'digest', 'words', 'patterns'}; digest changes whenever either file
+    does, so OCR results read with an older vocabulary are not reused from the cache.
+    """
+    words = build_user_words()
+    words_content = '\n'.join(words) + '\n'
+    patterns_content = '\n'.join(NUMBER_PATTERNS) + '\n'
+
+    os.makedirs(directory, exist_ok=True)
+    words_path = os.path.join(directory, 'tesseract_user_words.txt')
+    patterns_path = os.path.join(directory, 'tesseract_user_patterns.txt')
+    _write_if_changed(words_path, words_content)
+    _write_if_changed(patterns_path, patterns_content)
+
+    digest = hashlib.sha1((words_content + patterns_content).encode('utf-8')).hexdigest()[:12]
+    return {
+        'args': f"--user-words {shlex.quote(words_path)} --user-patterns {shlex.quote(patterns_path)}",
+        'digest': digest,
+        'words': len(words),
+        'patterns': len(NUMBER_PATTERNS)
+    }
@@ -0,0 +1,305 @@
+import os
+import time
+import atexit
+import pickle
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from multiprocessing.connection import wait as wait_for_ready
+
+try:
+    import resource
+except ImportError:  # No rlimits on Windows; workers run without a memory cap there
+    resource = None
+
+
+class OCRJobTimeout(FuturesTimeoutError):
+    """A job ran past its deadline and its worker was killed"""
+
+
+class OCRWorkerCrashed(RuntimeError):
+    """A worker process died while running a job"""
+
+
+def _portable_exception(error):
+    """The exception itself if it survives pickling, otherwise a RuntimeError carrying its message"""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(conn, memory_limit_bytes):
+    """Worker loop: run jobs received over the pipe and send back results or exceptions"""
+    # The pool runs jobs in parallel already, so keep Tesseract itself single-threaded
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+    if memory_limit_bytes and resource is not None:
+        # Inherited by the tesseract processes this worker starts
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+        except (ValueError, OSError) as e:
+            print(f"⚠️ OCR WORKER: Could not set memory limit: {e}")
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        job_id, fn, args, kwargs = job
+        try:
+            reply = (job_id, True, fn(*args, **kwargs))
+        except Exception as e:
+            reply = (job_id, False, _portable_exception(e))
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((job_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Job:
+    __slots__ = ('job_id', 'fn', 'args', 'kwargs', 'timeout', 'future', 'deadline')
+
+    def __init__(self, job_id, fn, args, kwargs, timeout, future):
+        self.job_id = job_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.future = future
+        self.deadline = None
+
+
+class _Worker:
+    __slots__ = ('process', 'conn', 'job', 'jobs_done')
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.job = None
+        self.jobs_done = 0
+
+
+class OCRWorkerPool:
+    """Pool of OCR worker processes with a job queue, per-job deadlines and memory caps
+
+    Each worker gets an RLIMIT_AS cap at startup. A dispatcher thread hands queued
+    jobs to idle workers over pipes, kills any worker whose job passes its deadline
+    and replaces workers that die, time out or reach their job quota. Jobs return
+    concurrent.futures.Future objects, so callers use them like an executor's.
+
+    Workers are spawned and run _worker_main from this side-effect-free module, but
+    spawn still re-imports the entry script as __mp_main__, so that script must
+    not build agents at import time (see app.py).
+    """
+
+    def __init__(self, workers, memory_limit_mb=None, job_timeout=None, max_jobs_per_worker=None,
+                 mp_context='spawn'):
+        self.context = multiprocessing.get_context(mp_context)
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.job_ids = itertools.count()
+        self.shutting_down = False
+        self.counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'crashes': 0,
+            'restarts': 0
+        }
+
+        # Submitting writes to this pipe so the dispatcher wakes without polling
+        self.wake_reader, self.wake_writer = self.context.Pipe(duplex=False)
+        self.workers = [self._spawn_worker() for _ in range(max(1, workers))]
+
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name='ocr-worker-dispatcher', daemon=True)
+        self.dispatcher.start()
+        # Runs before multiprocessing reaps daemon workers at exit, so they are not mistaken for crashes
+        atexit.register(self.shutdown)
+
+    def _spawn_worker(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_bytes),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def submit(self, fn, *args, job_timeout=None, **kwargs):
+        """Queue fn(*args, **kwargs) for a worker; job_timeout overrides the pool's deadline"""
+        future = Future()
+        with self.lock:
+            if self.shutting_down:
+                raise RuntimeError('OCR worker pool is shut down')
+            timeout = self.job_timeout if job_timeout is None else job_timeout
+            self.pending.append(_Job(next(self.job_ids), fn, args, kwargs, timeout, future))
+            self.counters['submitted'] += 1
+            self.wake_writer.send_bytes(b'.')
+        return future
+
+    def shutdown(self):
+        """Cancel queued jobs, fail running ones and stop every worker"""
+        with self.lock:
+            if self.shutting_down:
+                return
+            self.shutting_down = True
+            self.wake_writer.send_bytes(b'.')
+        self.dispatcher.join()
+
+    def stats(self):
+        """Job counters plus current queue depth and live worker count"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['pending'] = len(self.pending)
+            stats['busy_workers'] = sum(1 for worker in self.workers if worker.job)
+            stats['workers'] = len(self.workers)
+        return stats
+
+    def _dispatch_loop(self):
+        while True:
+            with self.lock:
+                if self.shutting_down:
+                    break
+            self._assign_jobs()
+
+            waitables = [self.wake_reader]
+            deadlines = []
+            for worker in self.workers:
+                waitables.append(worker.process.sentinel)
+                if worker.job:
+                    waitables.append(worker.conn)
+                    if worker.job.deadline:
+                        deadlines.append(worker.job.deadline)
+
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait_for_ready(waitables, timeout)
+
+            if self.wake_reader in ready:
+                while self.wake_reader.poll():
+                    self.wake_reader.recv_bytes()
+
+            now = time.monotonic()
+            for worker in list(self.workers):
+                if worker.job and worker.conn in ready:
+                    self._collect(worker)
+                elif not worker.process.is_alive():
+                    print(f"⚠️ OCR WORKER: Worker {worker.process.pid} exited (code {worker.process.exitcode}), restarting")
+                    self._record('crashes' if worker.job else 'restarts')
+                    self._replace(worker, OCRWorkerCrashed(f"OCR worker exited with code {worker.process.exitcode}"))
+                elif worker.job and worker.job.deadline and now >= worker.job.deadline:
+                    print(f"⚠️ OCR WORKER: Job exceeded {worker.job.timeout}s, killing worker {worker.process.pid}")
+                    self._record('timeouts')
+                    self._replace(worker, OCRJobTimeout(f"OCR job exceeded its {worker.job.timeout}s deadline"))
+
+        self._stop_workers()
+
+    def _assign_jobs(self):
+        """Hand queued jobs to idle workers, skipping jobs cancelled while queued"""
+        assignments = []
+        with self.lock:
+            for worker in self.workers:
+                if worker.job:
+                    continue
+                while self.pending:
+                    job = self.pending.popleft()
+                    if job.future.set_running_or_notify_cancel():
+                        worker.job = job
+                        assignments.append(worker)
+                        break
+
+        for worker in assignments:
+            job = worker.job
+            job.deadline = time.monotonic() + job.timeout if job.timeout else None
+            try:
+                worker.conn.send((job.job_id, job.fn, job.args, job.kwargs))
+            except (OSError, EOFError) as e:
+                self._record('crashes')
+                self._replace(worker, OCRWorkerCrashed(f"OCR worker unreachable: {e}"))
+            except Exception as e:
+                # Arguments that cannot be pickled never reach the worker
+                worker.job = None
+                self._record('failed')
+                job.future.set_exception(e)
+
+    def _collect(self, worker):
+        """Resolve a finished job's future and recycle the worker if it used up its quota"""
+        try:
+            _, succeeded, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._record('crashes')
+            self._replace(worker, OCRWorkerCrashed('OCR worker closed its pipe mid-job'))
+            return
+        except Exception as e:
+            # The reply arrived whole but could not be unpickled; the worker itself is fine
+            succeeded, payload = False, RuntimeError(f"Unreadable OCR worker reply: {e}")
+
+        job = worker.job
+        worker.job = None
+        worker.jobs_done += 1
+        if succeeded:
+            self._record('completed')
+            job.future.set_result(payload)
+        else:
+            self._record('failed')
+            job.future.set_exception(payload)
+
+        if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            # Fresh processes keep slow leaks in Tesseract or Pillow from accumulating
+            self._record('restarts')
+            self._replace(worker)
+
+    def _replace(self, worker, error=None):
+        """Stop a worker, fail its job with error and start a fresh process in its slot"""
+        if worker.job:
+            worker.job.future.set_exception(error or OCRWorkerCrashed('OCR worker was replaced'))
+            worker.job = None
+
+        self._terminate(worker)
+        replacement = self._spawn_worker()
+        with self.lock:
+            self.workers[self.workers.index(worker)] = replacement
+
+    def _terminate(self, worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(5)
+        worker.conn.close()
+
+    def _stop_workers(self):
+        with self.lock:
+            pending = list(self.pending)
+            self.pending.clear()
+        for job in pending:
+            job.future.cancel()
+
+        for worker in self.workers:
+            if worker.job:
+                worker.job.future.set_exception(RuntimeError('OCR worker pool is shut down'))
+                worker.job = None
+            else:
+                try:
+                    worker.conn.send(None)
+                    worker.process.join(1)
+                except (OSError, EOFError):
+                    pass
+            self._terminate(worker)
+
+    def _record(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
@@ -0,0 +1,83 @@
+import threading
+from PIL import Image
+
+
+def dhash(image, hash_size=8):
+    """Difference hash: compares neighbouring pixels of a tiny grayscale thumbnail"""
+    thumbnail = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(thumbnail.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(first, second):
+    """Number of differing bits between two hashes"""
+    return bin(first ^ second).count('1')
+
+
+class PerceptualHashIndex:
+    """Multi-index hashing over 64-bit hashes for fast Hamming-distance lookups
+
+    The hash is split into equal bands. Two hashes within distance d of each other
+    must agree exactly on at least one band whenever d < number of bands, so only
+    keys sharing a band are compared bit by bit.
+    """
+
+    def __init__(self, bands=8, hash_bits=64):
+        self.bands = bands
+        self.band_bits = hash_bits // bands
+        self.band_mask = (1 << self.band_bits) - 1
+        self.tables = [{} for _ in range(bands)]
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+    def _band_values(self, value):
+        return [(value >> (band * self.band_bits)) & self.band_mask for band in range(self.bands)]
+
+    def add(self, key, value):
+        """Index a key under its hash, replacing any previous hash for that key"""
+        with self.lock:
+            if key in self.hashes:
+                self._discard(key)
+            self.hashes[key] = value
+            for band, band_value in enumerate(self._band_values(value)):
+                self.tables[band].setdefault(band_value, set()).add(key)
+
+    def remove(self, key):
+        with self.lock:
+            if key in self.hashes:
+                self._discard(key)
+
+    def _discard(self, key):
+        """Remove a key from every band table; caller holds the lock"""
+        value = self.hashes.pop(key)
+        for band, band_value in enumerate(self._band_values(value)):
+            keys = self.tables[band].get(band_value)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.tables[band][band_value]
+
+    def find_nearest(self, value, max_distance, key_filter=None):
+        """Closest indexed key within max_distance as (key, distance), or (None, None)"""
+        with self.lock:
+            candidates = set()
+            for band, band_value in enumerate(self._band_values(value)):
+                candidates.update(self.tables[band].get(band_value, ()))
+
+            best_key = None
+            best_distance = None
+            for key in candidates:
+                if key_filter and not key_filter(key):
+                    continue
+                distance = hamming_distance(value, self.hashes[key])
+                if distance <= max_distance and (best_distance is None or distance < best_distance):
+                    best_key = key
+                    best_distance = distance
+
+        return best_key, best_distance
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+
+
+class ReportJobStore:
+    """Results of progressive report jobs in SQLite, keyed by job id and dropped after a TTL
+
+    A job starts 'running' with its preliminary result and moves to 'done' or
+    'failed' once the full-resolution pass finishes in the background. Jobs live
+    under OCR_STATE_DIR, so a poll served by another gunicorn worker or after a
+    restart still finds them; a job whose worker died mid-pass stays 'running'
+    until the TTL drops it.
+    """
+
+    def __init__(self, db_path, ttl_seconds=1800):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._init_db()
+
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and gunicorn workers
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS report_jobs ('
+                'job_id TEXT PRIMARY KEY, status TEXT NOT NULL, preliminary TEXT, final TEXT, '
+                'superseded INTEGER NOT NULL, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_report_jobs_updated ON report_jobs (updated)')
+
+    def create(self, preliminary):
+        """Register a job with its preliminary result and return the new job id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            self._expire(conn, now)
+            conn.execute(
+                'INSERT INTO report_jobs (job_id, status, preliminary, final, superseded, error, created, updated) '
+                'VALUES (?, ?, ?, NULL, 0, NULL, ?, ?)',
+                (job_id, 'running', json.dumps(preliminary), now, now)
+            )
+        return job_id
+
+    def finish(self, job_id, final, superseded):
+        """Store the full-resolution result and whether it replaces the preliminary one"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE report_jobs SET status = ?, final = ?, superseded = ?, updated = ? WHERE job_id = ?',
+                ('done', json.dumps(final), int(bool(superseded)), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        """Mark a job whose full-resolution pass failed; its preliminary result stays available"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE report_jobs SET status = ?, error = ?, updated = ? WHERE job_id = ?',
+                ('failed', error, time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        """A job's state, or None if it is unknown or expired"""
+        with self._connect() as conn:
+            self._expire(conn, time.time())
+            row = conn.execute(
+                'SELECT job_id, status, preliminary, final, superseded, error, created, updated '
+                'FROM report_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'preliminary': json.loads(row[2]) if row[2] else None,
+            'final': json.loads(row[3]) if row[3] else None,
+            'superseded': bool(row[4]),
+            'error': row[5],
+            'created': row[6],
+            'updated': row[7]
+        }
+
+    def stats(self):
+        with self._connect() as conn:
+            self._expire(conn, time.time())
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM report_jobs GROUP BY status').fetchall())
+        return {status: counts.get(status, 0) for status in ('running', 'done', 'failed')}
+
+    def _expire(self, conn, now):
+        """Drop jobs untouched for longer than the TTL, including running ones a dead worker left behind"""
+        conn.execute('DELETE FROM report_jobs WHERE updated < ?', (now - self.ttl_seconds,))
@@ -0,0 +1,64 @@
+import os
+import json
+import functools
+
+UNIT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'units.json')
+
+
+def normalize_unit(unit):
+    """Comparison key for a printed unit: lowercase, micro sign as u, no spaces ("µmol/L" -> "umol/l")"""
+    return ''.join((unit or '').lower().replace('μ', 'u').replace('µ', 'u').split()).rstrip('.')
+
+
+@functools.lru_cache(maxsize=None)
+def _load_unit_registry(path):
+    """Canonical unit and {unit key: multiplier} per analyte, with division factors precomputed"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    aliases = {normalize_unit(alias): normalize_unit(unit) for alias, unit in data.get('unit_aliases', {}).items()}
+    analytes = {}
+    for analyte_id, entry in data['analytes'].items():
+        factors = {}
+        for unit, factor in entry['factors'].items():
+            # {"divide": 88.4} keeps the published divisor readable in the file
+            factors[normalize_unit(unit)] = 1.0 / factor['divide'] if isinstance(factor, dict) else float(factor)
+        analytes[analyte_id] = {'unit': entry['unit'], 'factors': factors}
+    return analytes, aliases
+
+
+class UnitRegistry:
+    """Converts lab values to each analyte's canonical unit (the unit its reference ranges use)
+
+    A value with no unit is taken to already be in the canonical unit. Any printed
+    unit the analyte has no conversion for yields None ("29.1 pg" is no hemoglobin
+    in g/dL), so the value is not judged against the wrong scale.
+    """
+
+    def __init__(self, path=UNIT_REGISTRY_PATH):
+        self.analytes, self.aliases = _load_unit_registry(path)
+
+    def canonical_unit(self, analyte_id):
+        entry = self.analytes.get(analyte_id)
+        return entry['unit'] if entry else None
+
+    def to_canonical(self, analyte_id, value, unit):
+        """(value in the canonical unit, canonical unit), or None if the unit cannot be converted
+
+        Analytes the registry has no entry for keep their value and unit as printed.
+        """
+        if value is None:
+            return None
+        entry = self.analytes.get(analyte_id)
+        if entry is None:
+            return value, unit
+
+        key = normalize_unit(unit)
+        key = self.aliases.get(key, key)
+        if not key:
+            return value, entry['unit']
+
+        factor = entry['factors'].get(key)
+        if factor is None:
+            return None
+        return value * factor, entry['unit']